@@ -0,0 +1,305 @@
+"""
+ASGI Application for Student Introduction Evaluation Tool
+Serves the same routes as web_app.py on an asyncio server, so one process can
+hold many concurrent evaluations waiting on LanguageTool.
+
+Run with any ASGI server, e.g. uvicorn (in requirements.txt):
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+"""
+
+import asyncio
+import functools
+import json
+import mimetypes
+from pathlib import Path
+from urllib.parse import unquote, parse_qsl
+
+from jinja2 import Environment, FileSystemLoader
+
+from student_evaluator.service import (
+    SAMPLE_TRANSCRIPT,
+    SAMPLE_DURATION,
+    InvalidRequest,
+    create_evaluator,
+    create_memory_sampler,
+    create_cohort_analytics,
+    create_evaluation_store,
+    history_query,
+    parse_cohort,
+    parse_evaluate_request,
+    authorize_priority,
+    client_id,
+    wants_profile
+)
+from student_evaluator.utils.admission import AdmissionController, AdmissionRejected
+from student_evaluator.utils import lifecycle
+from student_evaluator.config import ADMISSION_MAX_TRANSCRIPT_BYTES
+
+BASE_DIR = Path(__file__).resolve().parent
+STATIC_DIR = BASE_DIR / 'static'
+MAX_BODY_BYTES = 2 * ADMISSION_MAX_TRANSCRIPT_BYTES + 4096
+
+# Size limits, per-client rate limits and concurrent evaluation slots per priority class
+admission = AdmissionController()
+
+# Initialize evaluator (configured through environment variables, see service.create_evaluator)
+evaluator = create_evaluator()
+
+# Optional RSS/tracemalloc sampling every N requests (MEMORY_SAMPLE_EVERY)
+memory_sampler = create_memory_sampler()
+
+# Streaming class/school/term aggregates for percentile ranks (ANALYTICS=0 disables)
+analytics = create_cohort_analytics()
+
+# Optional SQLite history of every evaluation (EVALUATION_STORE=<file>)
+evaluation_store = create_evaluation_store()
+
+# index.html is a Flask template; only url_for('static', ...) needs providing
+templates = Environment(loader=FileSystemLoader(str(BASE_DIR / 'templates')), autoescape=True)
+templates.globals['url_for'] = lambda endpoint, filename: f'/{endpoint}/{filename}'
+
+
+class RequestTooLarge(Exception):
+    """Raised when a request body exceeds MAX_BODY_BYTES."""
+
+
+async def send_response(send, status: int, body: bytes, content_type: str, headers=None):
+    """Send a complete HTTP response."""
+    raw_headers = [
+        (b'content-type', content_type.encode('latin-1')),
+        (b'content-length', str(len(body)).encode('latin-1'))
+    ]
+    for name, value in (headers or {}).items():
+        raw_headers.append((name.lower().encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_json(send, status: int, payload, headers=None):
+    """Send a JSON response."""
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    await send_response(send, status, body, 'application/json', headers)
+
+
+async def read_body(receive) -> bytes:
+    """Read the request body, refusing anything over MAX_BODY_BYTES."""
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise RequestTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+def header(scope, name: str):
+    """Return a request header value (or None)."""
+    name = name.lower().encode('latin-1')
+    for key, value in scope.get('headers', []):
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking call (SQLite, locks, /proc reads) on the default executor."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+
+async def index(scope, receive, send):
+    """Render the main page."""
+    body = templates.get_template('index.html').render().encode('utf-8')
+    await send_response(send, 200, body, 'text/html; charset=utf-8')
+
+
+async def evaluate(scope, receive, send):
+    """
+    Evaluate endpoint - receives transcript and duration, returns scores.
+    """
+    try:
+        try:
+            data = json.loads(await read_body(receive) or b'null')
+        except ValueError:
+            data = None
+
+        # Size and rate limits apply before any parsing work
+        remote = scope.get('client') or (None, None)
+        client = client_id(header(scope, 'x-forwarded-for'), remote[0])
+        fields = data if isinstance(data, dict) else {}
+        batch_token = header(scope, 'x-batch-token')
+        priority = authorize_priority(fields.get('priority'), batch_token)
+        admission.precheck(client, fields.get('transcript'), priority)
+        # Rubric lookup may compile a rubric file
+        params = await run_blocking(parse_evaluate_request, data, evaluator, analytics, batch_token)
+
+        # Run evaluation
+        async with admission.slot_async(params['priority']):
+            results = await evaluator.evaluate_async(
+                params['transcript'],
+                params['duration'],
+                submission_id=params['submission_id'],
+                stages=params['stages'],
+                rubric=params['rubric'],
+                word_timestamps=params['word_timestamps'],
+                profile=wants_profile(header(scope, 'x-profile')),
+                time_budget=params['time_budget'],
+                priority=params['priority']
+            )
+        if memory_sampler is not None:
+            await run_blocking(memory_sampler.record)
+        if analytics is not None:
+            results['percentiles'] = await run_blocking(analytics.observe, results, **params['cohort'])
+        if evaluation_store is not None:
+            await run_blocking(evaluation_store.add, results, student_id=params['student_id'],
+                               **params['cohort'])
+
+        await send_json(send, 200, {
+            'success': True,
+            'results': results
+        })
+
+    except RequestTooLarge:
+        await send_json(send, 413, {
+            'success': False,
+            'error': 'Request is too large.'
+        })
+
+    except InvalidRequest as e:
+        await send_json(send, e.status, {
+            'success': False,
+            'error': e.message
+        })
+
+    except AdmissionRejected as e:
+        headers = {}
+        if e.retry_after is not None:
+            headers['Retry-After'] = str(max(1, round(e.retry_after)))
+        await send_json(send, e.status, {
+            'success': False,
+            'error': e.message
+        }, headers)
+
+    except Exception as e:
+        await send_json(send, 500, {
+            'success': False,
+            'error': str(e)
+        })
+
+
+async def metrics(scope, receive, send):
+    """Return runtime counters for monitoring."""
+    await send_json(send, 200, {
+        **evaluator.metrics(),
+        'admission': admission.stats()
+    })
+
+
+async def cohort_summary(scope, receive, send):
+    """Return per-criterion statistics for a cohort (?school=&class=&term=)."""
+    if analytics is None:
+        await send_json(send, 404, {
+            'success': False,
+            'error': 'Analytics are disabled (ANALYTICS=0).'
+        })
+        return
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    try:
+        cohort = parse_cohort(query)
+    except InvalidRequest as e:
+        await send_json(send, e.status, {
+            'success': False,
+            'error': e.message
+        })
+        return
+    await send_json(send, 200, await run_blocking(analytics.summary, **cohort))
+
+
+async def history(scope, receive, send):
+    """Return a student's score history (?student_id=) or a class's latest results (?school=&class=)."""
+    if evaluation_store is None:
+        await send_json(send, 404, {
+            'success': False,
+            'error': 'The evaluation store is disabled (set EVALUATION_STORE).'
+        })
+        return
+    query = dict(parse_qsl(scope.get('query_string', b'').decode('latin-1')))
+    try:
+        await send_json(send, 200, await run_blocking(history_query, evaluation_store, query))
+    except InvalidRequest as e:
+        await send_json(send, e.status, {
+            'success': False,
+            'error': e.message
+        })
+
+
+async def debug_memory(scope, receive, send):
+    """Return memory samples (enable with MEMORY_SAMPLE_EVERY; ?sample=1 samples now)."""
+    if memory_sampler is None:
+        await send_json(send, 404, {
+            'success': False,
+            'error': 'Memory sampling is disabled (set MEMORY_SAMPLE_EVERY).'
+        })
+        return
+    if b'sample=1' in scope.get('query_string', b'').split(b'&'):
+        await run_blocking(memory_sampler.sample)
+    await send_json(send, 200, memory_sampler.stats())
+
+
+async def get_sample(scope, receive, send):
+    """Return sample transcript for testing."""
+    await send_json(send, 200, {
+        'transcript': SAMPLE_TRANSCRIPT,
+        'duration': SAMPLE_DURATION
+    })
+
+
+async def static_file(scope, receive, send):
+    """Serve files from the static directory."""
+    relative = unquote(scope['path'][len('/static/'):])
+    path = (STATIC_DIR / relative).resolve()
+    if STATIC_DIR not in path.parents or not path.is_file():
+        await send_response(send, 404, b'Not Found', 'text/plain')
+        return
+    content_type = mimetypes.guess_type(str(path))[0] or 'application/octet-stream'
+    await send_response(send, 200, path.read_bytes(), content_type)
+
+
+ROUTES = {
+    ('GET', '/'): index,
+    ('POST', '/evaluate'): evaluate,
+    ('GET', '/metrics'): metrics,
+    ('GET', '/analytics'): cohort_summary,
+    ('GET', '/history'): history,
+    ('GET', '/debug/memory'): debug_memory,
+    ('GET', '/sample'): get_sample
+}
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Stop the LanguageTool JVM and worker threads with the server
+                lifecycle.close_all()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+
+    handler = ROUTES.get((scope['method'], scope['path']))
+    if handler is None and scope['method'] == 'GET' and scope['path'].startswith('/static/'):
+        handler = static_file
+    if handler is None:
+        await send_json(send, 404, {'success': False, 'error': 'Not found'})
+        return
+    await handler(scope, receive, send)
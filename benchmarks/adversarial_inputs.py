@@ -0,0 +1,155 @@
+"""
+Adversarial-input benchmark: checks that evaluation time stays bounded.
+
+Runs the regex-heavy stages (content, clarity, speech_rate, engagement)
+over pasted-garbage transcripts at the maximum accepted size, in both
+engagement modes, and checks:
+
+- every case finishes within --budget seconds;
+- doubling the input at most roughly doubles the time (no super-linear
+  blow-up);
+- oversized inputs are rejected by the input limits;
+- rubric patterns known to backtrack catastrophically are rejected at
+  compile time.
+
+Usage:
+    python -m benchmarks.adversarial_inputs [--budget 2.0] [--grammar] [--engagement-modes document,sentence]
+
+Exits with status 1 if any check fails.
+"""
+
+import argparse
+import sys
+import time
+from typing import Callable, List
+
+from student_evaluator.main import StudentEvaluator
+from student_evaluator.rubric import RubricIndex
+from student_evaluator.config import MAX_TRANSCRIPT_CHARS, MAX_TOKEN_CHARS, ENGAGEMENT_MODES
+from student_evaluator.utils.safety import InputTooLarge, UnsafePattern
+
+STAGES = {'content', 'clarity', 'speech_rate', 'engagement'}
+
+# Largest growth ratio accepted when the input size doubles (linear is ~2)
+MAX_SCALING_RATIO = 3.0
+
+
+def _fill(unit: str, size: int) -> str:
+    return (unit * (size // len(unit) + 1))[:size]
+
+
+# name -> generator of a transcript of (about) the given size
+CASES = {
+    'whitespace_flood': lambda n: 'i' + ' ' * (n - 4) + 'am',
+    'whitespace_runs': lambda n: _fill('i am' + ' ' * 10, n),
+    'newline_flood': lambda n: 'hello' + '\n' * (n - 5),
+    'max_length_tokens': lambda n: _fill('a' * MAX_TOKEN_CHARS + ' ', n),
+    'repeated_prefixes': lambda n: _fill('i i am i my name my ', n),
+    'salutation_prefixes': lambda n: _fill('hell good mornin hel ', n),
+    'filler_flood': lambda n: _fill('um uh like you know ', n),
+    'punctuation_flood': lambda n: _fill('.!? ', n),
+    'no_punctuation': lambda n: _fill('myself thank you family ', n),
+    'digits': lambda n: _fill('class 9 age 12 grade ', n),
+    'unicode': lambda n: _fill('नमस्ते मैं 学生 ', n)
+}
+
+UNSAFE_PATTERNS = [
+    r'(a+)+$',
+    r'(\w+\s*)+x',
+    r'(a|ab)*c',
+    r'(.*)*end',
+    r'(\w+)\s+\1',
+    r'(?:x+x+)+y',
+    r'.*.*.*=',
+    r'.*a.*a.*=',
+    r'\s*(?:\w*)\s*\w*!',
+    r'[a-z]+\w*[A-Z]+\d'
+]
+
+OVERSIZED = {
+    'too_many_characters': 'word ' * (MAX_TRANSCRIPT_CHARS // 5 + 1),
+    'giant_token': 'x' * (MAX_TOKEN_CHARS + 1)
+}
+
+
+def time_case(evaluator: StudentEvaluator, transcript: str, stages: set) -> float:
+    started = time.perf_counter()
+    evaluator.evaluate(transcript, 60, stages=stages)
+    return time.perf_counter() - started
+
+
+def check_cases(evaluator: StudentEvaluator, stages: set, budget: float,
+                report: Callable[[str], None] = print) -> List[str]:
+    """
+    Time every case at half and full size against the budget and scaling limit.
+
+    Args:
+        evaluator: Evaluator to run (already warmed up)
+        stages: Stages to run
+        budget: Seconds allowed per evaluation at maximum size
+        report: Receives one line per case
+
+    Returns:
+        Failure messages (empty if every case stayed within bounds)
+    """
+    failures = []
+    report(f"{'case':<22}{'half (s)':>10}{'full (s)':>10}{'ratio':>8}")
+    for name, make in CASES.items():
+        half = time_case(evaluator, make(MAX_TRANSCRIPT_CHARS // 2), stages)
+        full = time_case(evaluator, make(MAX_TRANSCRIPT_CHARS), stages)
+        # Ratios of very fast cases are noise; only judge measurable ones
+        ratio = full / half if half > 0.01 else 1.0
+        report(f"{name:<22}{half:>10.3f}{full:>10.3f}{ratio:>8.2f}")
+        if full > budget:
+            failures.append(f"{name}: {full:.2f}s exceeds the {budget}s budget")
+        if ratio > MAX_SCALING_RATIO:
+            failures.append(f"{name}: time grew {ratio:.1f}x when the input doubled")
+    return failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Adversarial input latency benchmark')
+    parser.add_argument('--budget', type=float, default=2.0,
+                        help='Seconds allowed per evaluation at maximum size')
+    parser.add_argument('--grammar', action='store_true',
+                        help='Also run the LanguageTool grammar stage')
+    parser.add_argument('--engagement-modes', default=','.join(ENGAGEMENT_MODES),
+                        help='Comma-separated engagement modes to run the cases in')
+    args = parser.parse_args()
+
+    stages = STAGES | {'grammar'} if args.grammar else STAGES
+    failures = []
+
+    for mode in args.engagement_modes.split(','):
+        with StudentEvaluator(use_semantic=False, engagement_mode=mode) as evaluator:
+            # Warm up lazily initialized analyzers
+            evaluator.evaluate('Hello, my name is Asha. Thank you.', 10, stages=stages)
+            print(f"\nEngagement mode: {mode}")
+            failures.extend(f"[{mode}] {failure}" for failure in check_cases(evaluator, stages, args.budget))
+
+    with StudentEvaluator(use_semantic=False) as evaluator:
+        for name, transcript in OVERSIZED.items():
+            try:
+                evaluator.evaluate(transcript, 60, stages=stages)
+                failures.append(f"{name}: was not rejected")
+            except InputTooLarge as e:
+                print(f"✅ {name} rejected: {e}")
+
+    for pattern in UNSAFE_PATTERNS:
+        try:
+            RubricIndex({'closing_phrases': [pattern]})
+            failures.append(f"unsafe pattern {pattern!r} was accepted")
+        except UnsafePattern as e:
+            print(f"✅ {e}")
+
+    if failures:
+        print("\n❌ Failures:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ All adversarial inputs stayed within bounds")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
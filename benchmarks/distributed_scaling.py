@@ -0,0 +1,104 @@
+"""
+Distributed batch grading throughput versus number of workers.
+
+Creates a synthetic manifest, then for each worker count grades it from a
+fresh coordinator store (SQLite file, or the TCP front end with --tcp) and
+prints items per second and the speedup over one worker. Throughput is
+measured between the first and last commit, so worker start-up (imports,
+model loading) is excluded. All workers run on this machine, so the curve
+flattens at the number of CPU cores; run `work` on more nodes to go further.
+
+It also measures the coordinator's own capacity (claim + commit round
+trips per second with no evaluation), which bounds how many workers the
+store can feed: workers x per-worker rate must stay well below it.
+
+Usage:
+    python -m benchmarks.distributed_scaling [--items 2000] [--workers 1,2,4]
+        [--shard-size 50] [--tcp]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from student_evaluator.distributed import LeaseStore, run_workers, serve
+from student_evaluator.service import SAMPLE_TRANSCRIPT
+
+
+def build_manifest(count: int) -> list:
+    sentences = [s.strip() + '.' for s in SAMPLE_TRANSCRIPT.split('.') if s.strip()]
+    return [
+        {
+            'id': f"student-{i}",
+            # Rotate sentences so transcripts differ
+            'transcript': ' '.join(sentences[i % len(sentences):] + sentences[:i % len(sentences)]),
+            'duration_seconds': 50 + i % 20
+        }
+        for i in range(count)
+    ]
+
+
+def run(manifest: list, workers: int, shard_size: int, tcp: bool, directory: str) -> float:
+    path = os.path.join(directory, f"job-{workers}.db")
+    with LeaseStore(path) as store:
+        store.add_manifest(manifest, shard_size)
+    server = None
+    target = path
+    if tcp:
+        store = LeaseStore(path)
+        server = serve(store, '127.0.0.1', 0)
+        target = f"tcp://127.0.0.1:{server.server_address[1]}"
+    started = time.perf_counter()
+    stats = run_workers(target, workers)
+    elapsed = time.perf_counter() - started
+    if server is not None:
+        server.shutdown()
+        store.close()
+    evaluated = sum(s['items'] for s in stats)
+    if evaluated != len(manifest):
+        raise RuntimeError(f"Evaluated {evaluated} of {len(manifest)} items")
+    with LeaseStore(path) as store:
+        return store.status()['items_per_second'] or len(manifest) / elapsed
+
+
+def coordinator_capacity(shard_size: int, directory: str, shards: int = 500) -> float:
+    """Claim + commit round trips per second against an empty-work job."""
+    with LeaseStore(os.path.join(directory, 'capacity.db')) as store:
+        store.add_manifest(({'id': i} for i in range(shards * shard_size)), shard_size)
+        started = time.perf_counter()
+        while True:
+            lease = store.claim('bench')
+            if lease is None:
+                break
+            store.commit(lease['shard'], lease['token'],
+                         [{'id': item['id'], 'result': {}} for item in lease['items']], 'bench')
+        return shards / (time.perf_counter() - started)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Distributed grading scaling benchmark')
+    parser.add_argument('--items', type=int, default=2000)
+    parser.add_argument('--workers', default='1,2,4', help='Comma-separated worker counts')
+    parser.add_argument('--shard-size', type=int, default=50)
+    parser.add_argument('--tcp', action='store_true', help='Workers connect through the TCP front end')
+    args = parser.parse_args()
+
+    manifest = build_manifest(args.items)
+    counts = [int(value) for value in args.workers.split(',')]
+    print(f"\n{'workers':>8}{'items/s':>10}{'speedup':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = None
+        for workers in counts:
+            throughput = run(manifest, workers, args.shard_size, args.tcp, directory)
+            baseline = baseline or throughput
+            print(f"{workers:>8}{throughput:>10.1f}{throughput / baseline:>8.2f}x")
+        capacity = coordinator_capacity(args.shard_size, directory)
+        print(f"\nCoordinator capacity: {capacity:.0f} shards/s "
+              f"(~{capacity * args.shard_size:.0f} items/s across all workers)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Grammar-check latency versus transcript length, single call vs chunked.
+
+Builds transcripts of increasing length from the sample introduction (with
+a few deliberate errors), checks each one with a single LanguageTool call
+and with sentence-aligned chunks checked concurrently, and prints the
+latency curve and error counts side by side.
+
+Requires Java and LanguageTool (language_tool_python downloads it on first use).
+
+Usage:
+    python -m benchmarks.grammar_chunking [--lengths 1000,4000,16000,64000]
+        [--chunk-chars 2000] [--workers 4] [--repeat 3]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+
+from student_evaluator.analyzers.grammar_analyzer import GrammarAnalyzer
+from student_evaluator.service import SAMPLE_TRANSCRIPT
+
+# A few sentences with errors LanguageTool reliably reports
+ERRONEOUS = "She go to school every days. I has two brother. "
+
+
+def build_transcript(length: int) -> str:
+    unit = ' '.join(SAMPLE_TRANSCRIPT.split()) + ' ' + ERRONEOUS
+    text = unit * (length // len(unit) + 1)
+    # Cut at the last sentence end before the target length
+    cut = text.rfind('. ', 0, length)
+    return text[:cut + 1] if cut > 0 else text[:length]
+
+
+def time_check(analyzer: GrammarAnalyzer, text: str, repeat: int) -> tuple:
+    timings = []
+    matches = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        matches = analyzer._check(text)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings), len(matches)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Grammar chunking latency benchmark')
+    parser.add_argument('--lengths', default='1000,4000,16000,64000',
+                        help='Comma-separated transcript lengths in characters')
+    parser.add_argument('--chunk-chars', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (median)')
+    args = parser.parse_args()
+
+    lengths = [int(value) for value in args.lengths.split(',')]
+    # A chunk size above every length keeps the single-call path
+    single = GrammarAnalyzer(chunk_chars=max(lengths) + 1)
+    chunked = GrammarAnalyzer(chunk_chars=args.chunk_chars, max_workers=args.workers)
+    single._init_tool()
+    if single.tool is None:
+        print("❌ LanguageTool is not available (Java is required)")
+        return 1
+    # Share one LanguageTool server so both modes hit the same backend
+    chunked.tool = single.tool
+
+    # Warm up the JVM
+    single._check(build_transcript(1000))
+
+    print(f"\n{'chars':>8}{'single (s)':>12}{'chunked (s)':>13}{'speedup':>9}{'errors':>14}")
+    for length in lengths:
+        text = build_transcript(length)
+        single_time, single_errors = time_check(single, text, args.repeat)
+        chunked_time, chunked_errors = time_check(chunked, text, args.repeat)
+        print(f"{len(text):>8}{single_time:>12.3f}{chunked_time:>13.3f}"
+              f"{single_time / chunked_time:>8.1f}x{single_errors:>7}/{chunked_errors:<6}")
+
+    chunked.tool = None
+    chunked.close()
+    single.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
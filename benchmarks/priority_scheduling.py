@@ -0,0 +1,130 @@
+"""
+Interactive latency while a batch regrade floods the grammar backend.
+
+Batch threads evaluate continuously with priority 'batch' while
+interactive requests arrive at a steady rate. The run is repeated with
+priority scheduling off and on, and interactive latency percentiles plus
+the scheduler's per-class queue waits are printed.
+
+By default the grammar backend is simulated: a server with a fixed number
+of worker threads and a fixed service time per check, so the benchmark runs
+without Java. --languagetool uses the real LanguageTool server instead.
+
+Usage:
+    python -m benchmarks.priority_scheduling [--batch-threads 16]
+        [--interactive 40] [--interval 0.1] [--backend-threads 4]
+        [--service-ms 50] [--languagetool]
+"""
+
+import argparse
+import contextlib
+import io
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from student_evaluator.main import StudentEvaluator
+from student_evaluator.service import SAMPLE_TRANSCRIPT
+
+
+class SimulatedLanguageTool:
+    """A grammar server with `threads` workers taking `service_seconds` per check (FIFO queue)."""
+
+    def __init__(self, threads: int, service_seconds: float):
+        self._workers = ThreadPoolExecutor(max_workers=threads)
+        self.service_seconds = service_seconds
+
+    def check(self, text):
+        self._workers.submit(time.sleep, self.service_seconds).result()
+        return []
+
+    def close(self):
+        self._workers.shutdown()
+
+
+def percentile(values, share: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+def run(scheduling: bool, args) -> dict:
+    evaluator = StudentEvaluator(
+        use_semantic=False, priority_scheduling=scheduling,
+        scheduler_capacity={'grammar': args.backend_threads}
+    )
+    if args.languagetool:
+        evaluator.grammar_analyzer._init_tool()
+        if evaluator.grammar_analyzer.tool is None:
+            raise RuntimeError('LanguageTool is not available (Java is required)')
+    else:
+        evaluator.grammar_analyzer.tool = SimulatedLanguageTool(args.backend_threads, args.service_ms / 1000)
+
+    stop = threading.Event()
+    batch_done = []
+
+    def batch_worker():
+        while not stop.is_set():
+            evaluator.evaluate(SAMPLE_TRANSCRIPT, 52, stages=['grammar'], priority='batch')
+            batch_done.append(1)
+
+    batch_threads = [threading.Thread(target=batch_worker, daemon=True) for _ in range(args.batch_threads)]
+    for thread in batch_threads:
+        thread.start()
+    # Let the batch load build a queue first
+    time.sleep(0.5)
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(args.interactive):
+        request_started = time.perf_counter()
+        evaluator.evaluate(SAMPLE_TRANSCRIPT, 52, stages=['grammar'], priority='interactive')
+        latencies.append(time.perf_counter() - request_started)
+        time.sleep(max(0.0, args.interval - latencies[-1]))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    for thread in batch_threads:
+        thread.join()
+    scheduling_stats = evaluator.metrics().get('scheduling', {}).get('grammar')
+    evaluator.close()
+    return {
+        'p50': statistics.median(latencies),
+        'p95': percentile(latencies, 0.95),
+        'max': max(latencies),
+        'batch_per_second': len(batch_done) / elapsed,
+        'scheduling': scheduling_stats
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Priority scheduling benchmark')
+    parser.add_argument('--batch-threads', type=int, default=16, help='Concurrent batch evaluations')
+    parser.add_argument('--interactive', type=int, default=40, help='Interactive requests to time')
+    parser.add_argument('--interval', type=float, default=0.1, help='Seconds between interactive requests')
+    parser.add_argument('--backend-threads', type=int, default=4,
+                        help='Grammar backend worker threads (and scheduler capacity)')
+    parser.add_argument('--service-ms', type=float, default=50, help='Simulated time per grammar check')
+    parser.add_argument('--languagetool', action='store_true', help='Use the real LanguageTool server')
+    args = parser.parse_args()
+
+    print(f"\n{'scheduling':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'max (ms)':>10}{'batch/s':>9}")
+    results = {}
+    for scheduling in (False, True):
+        # Stage progress messages from the worker threads would bury the table
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = results[scheduling] = run(scheduling, args)
+        print(f"{'on' if scheduling else 'off':>10}{result['p50'] * 1000:>10.1f}"
+              f"{result['p95'] * 1000:>10.1f}{result['max'] * 1000:>10.1f}{result['batch_per_second']:>9.1f}")
+
+    print("\nQueue wait per class (scheduling on, ms):")
+    for name, stats in results[True]['scheduling']['classes'].items():
+        wait = stats['wait_ms']
+        print(f"  {name:<12} granted {stats['granted']:>6}  mean {wait['mean']:>8.1f}"
+              f"  p95 {wait['p95']:>8.1f}  max {wait['max']:>8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
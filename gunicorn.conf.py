@@ -0,0 +1,12 @@
+"""
+Gunicorn settings (loaded automatically from the working directory).
+
+Workers stop their LanguageTool JVM and evaluator threads when they exit,
+including when they are recycled, so no orphaned Java processes are left.
+"""
+
+
+def worker_exit(server, worker):
+    """Close every evaluator and reap leftover LanguageTool processes."""
+    from student_evaluator.utils import lifecycle
+    lifecycle.close_all()
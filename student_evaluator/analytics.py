@@ -0,0 +1,578 @@
+"""
+Cohort analytics over evaluation results.
+
+`CohortAnalytics` keeps, for every cohort a result belongs to (district,
+school, class, each overall and per term), running statistics and a
+mergeable quantile sketch per rubric criterion. Results are added one at a
+time as they stream in; batch workers each build their own aggregate and
+the aggregates are merged afterwards (`merge()`, or `to_dict()` /
+`from_dict()` across processes).
+
+Percentile-rank queries read a sorted summary of at most a few hundred
+points, so they cost the same for a class of 30 as for a district of a
+million results.
+
+Criteria are the score sections of a result ('content_structure',
+'speech_rate', ...) plus 'overall', all as percentages of their maximum,
+so results scored against different rubrics remain comparable.
+"""
+
+import bisect
+import json
+import math
+import random
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .config import ANALYTICS_SKETCH_K, ANALYTICS_MAX_COHORTS
+
+OVERALL = 'overall'
+
+
+class UnknownCohort(LookupError):
+    """Raised when a school, class or term is not in the configured cohort list."""
+
+
+class RunningStats:
+    """Count, mean, variance, min and max in one pass (Welford), mergeable (Chan et al.)."""
+
+    __slots__ = ('count', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other: 'RunningStats'):
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation."""
+        return math.sqrt(self.m2 / self.count) if self.count else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'm2': self.m2,
+            'min': self.min if self.count else None,
+            'max': self.max if self.count else None
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'RunningStats':
+        stats = cls()
+        stats.count = data['count']
+        stats.mean = data['mean']
+        stats.m2 = data['m2']
+        if stats.count:
+            stats.min, stats.max = data['min'], data['max']
+        return stats
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: a stack of compactors, level h holding items of weight 2^h.
+
+    When a level fills up it is sorted and every other item (random offset)
+    is promoted to the next level, so memory stays O(k) however many values
+    are added, and rank error is about 1/k. Two sketches merge by
+    concatenating their levels and compacting.
+    """
+
+    def __init__(self, k: int = ANALYTICS_SKETCH_K, seed: Optional[int] = None):
+        """
+        Args:
+            k: Accuracy parameter (capacity of the top level)
+            seed: Seed for the compaction coin flips (for reproducible runs)
+        """
+        self.k = k
+        self.count = 0
+        self.levels: List[List[float]] = [[]]
+        self._rng = random.Random(seed)
+        self._cdf = None
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def add(self, value: float):
+        self.levels[0].append(value)
+        self.count += 1
+        self._cdf = None
+        if len(self.levels[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: 'QuantileSketch'):
+        while len(self.levels) < len(other.levels):
+            self.levels.append([])
+        for level, items in enumerate(other.levels):
+            self.levels[level].extend(items)
+        self.count += other.count
+        self._cdf = None
+        self._compress()
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) >= self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append([])
+                items.sort()
+                # An odd item out stays behind so total weight is preserved
+                keep = [items.pop()] if len(items) % 2 else []
+                offset = self._rng.randrange(2)
+                self.levels[level + 1].extend(items[offset::2])
+                self.levels[level] = keep
+            level += 1
+
+    def _summary(self) -> Tuple[List[float], List[float]]:
+        """Sorted values and cumulative weights (cached until the next update)."""
+        if self._cdf is None:
+            weighted = sorted(
+                (value, 1 << level)
+                for level, items in enumerate(self.levels)
+                for value in items
+            )
+            values, cumulative, total = [], [], 0
+            for value, weight in weighted:
+                total += weight
+                values.append(value)
+                cumulative.append(total)
+            self._cdf = (values, cumulative)
+        return self._cdf
+
+    def rank(self, value: float) -> float:
+        """
+        Fraction of added values below `value` (ties count half), in [0, 1].
+
+        Cost depends only on k, not on how many values were added.
+        """
+        values, cumulative = self._summary()
+        if not values:
+            return 0.0
+        total = cumulative[-1]
+        low = bisect.bisect_left(values, value)
+        high = bisect.bisect_right(values, value)
+        below = cumulative[low - 1] if low else 0
+        equal = (cumulative[high - 1] if high else 0) - below
+        return (below + equal / 2) / total
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Approximate q-quantile (0 <= q <= 1), or None if empty."""
+        values, cumulative = self._summary()
+        if not values:
+            return None
+        target = q * cumulative[-1]
+        index = min(bisect.bisect_left(cumulative, target), len(values) - 1)
+        return values[index]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'k': self.k, 'count': self.count, 'levels': [list(items) for items in self.levels]}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'QuantileSketch':
+        sketch = cls(k=data['k'])
+        sketch.count = data['count']
+        sketch.levels = [list(items) for items in data['levels']] or [[]]
+        return sketch
+
+
+class CriterionAggregate:
+    """Running statistics plus a quantile sketch for one criterion of one cohort."""
+
+    __slots__ = ('stats', 'sketch')
+
+    def __init__(self, k: int = ANALYTICS_SKETCH_K):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(k)
+
+    def add(self, value: float):
+        self.stats.add(value)
+        self.sketch.add(value)
+
+    def merge(self, other: 'CriterionAggregate'):
+        self.stats.merge(other.stats)
+        self.sketch.merge(other.sketch)
+
+    def summary(self) -> Dict[str, Any]:
+        if self.stats.count == 0:
+            return {'count': 0}
+        return {
+            'count': self.stats.count,
+            'mean': round(self.stats.mean, 2),
+            'std': round(self.stats.std, 2),
+            'min': round(self.stats.min, 2),
+            'max': round(self.stats.max, 2),
+            'p10': round(self.sketch.quantile(0.1), 2),
+            'p50': round(self.sketch.quantile(0.5), 2),
+            'p90': round(self.sketch.quantile(0.9), 2)
+        }
+
+
+def criterion_scores(results: Dict[str, Any]) -> Dict[str, float]:
+    """
+    Extract each criterion as a percentage of its maximum.
+
+    Args:
+        results: Result dict from StudentEvaluator.evaluate()
+
+    Returns:
+        Mapping of criterion name to percentage (0-100), including 'overall'
+    """
+    scores = {OVERALL: float(results['percentage'])}
+    for name, section in results.get('scores', {}).items():
+        score = section.get('total', section.get('score'))
+        maximum = section.get('max', section.get('max_score'))
+        if score is not None and maximum:
+            scores[name] = round(100.0 * score / maximum, 2)
+    return scores
+
+
+def cohort_keys(school: Optional[str] = None, class_name: Optional[str] = None,
+                term: Optional[str] = None) -> List[Tuple[str, Tuple]]:
+    """
+    Cohorts a result belongs to, most specific first, as (level, key) pairs.
+
+    A key is (term, school, class) with None meaning "any". Class names are
+    only meaningful within a school, so a class without a school is ignored.
+    """
+    levels = [('district', (None, None))]
+    if school is not None:
+        levels.insert(0, ('school', (school, None)))
+        if class_name is not None:
+            levels.insert(0, ('class', (school, class_name)))
+    keys = []
+    for level, (s, c) in levels:
+        if term is not None:
+            keys.append((level, (term, s, c)))
+        keys.append((level, (None, s, c)))
+    return keys
+
+
+class CohortAnalytics:
+    """
+    Streaming per-cohort, per-criterion aggregates with percentile ranks.
+
+    Thread-safe. The least recently updated cohorts are dropped beyond
+    `max_cohorts`, which bounds memory but lets a client that invents
+    cohort names push real cohorts out. Servers facing untrusted clients
+    should pass the list of real cohorts as `cohorts`; results naming any
+    other school, class or term are then refused with UnknownCohort.
+    """
+
+    def __init__(self, k: int = ANALYTICS_SKETCH_K, max_cohorts: int = ANALYTICS_MAX_COHORTS,
+                 cohorts: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            k: Quantile sketch accuracy parameter (rank error about 1/k)
+            max_cohorts: Cohorts kept in memory
+            cohorts: Accepted cohorts, {"schools": {school: [class, ...]},
+                "terms": [term, ...]}; None accepts any name
+        """
+        self.k = k
+        self.max_cohorts = max_cohorts
+        self.allowed = None
+        if cohorts is not None:
+            self.allowed = {
+                'schools': {
+                    school: frozenset(classes or ())
+                    for school, classes in cohorts.get('schools', {}).items()
+                },
+                'terms': frozenset(cohorts.get('terms', ()))
+            }
+        self._cohorts: 'OrderedDict[Tuple, Dict[str, CriterionAggregate]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, results: Dict[str, Any], school: Optional[str] = None,
+            class_name: Optional[str] = None, term: Optional[str] = None):
+        """
+        Add one evaluation result to every cohort it belongs to.
+
+        Args:
+            results: Result dict from StudentEvaluator.evaluate()
+            school: School the student attends
+            class_name: Class within the school
+            term: Term or assessment period
+
+        Raises:
+            UnknownCohort: If the cohort is not in the configured list
+        """
+        self.check_cohort(school, class_name, term)
+        scores = criterion_scores(results)
+        with self._lock:
+            for _, key in cohort_keys(school, class_name, term):
+                self._add(key, scores)
+
+    def check_cohort(self, school: Optional[str] = None, class_name: Optional[str] = None,
+                     term: Optional[str] = None):
+        """
+        Check a cohort against the configured list (a no-op without one).
+
+        Raises:
+            UnknownCohort: If the school, class or term is not listed
+        """
+        if self.allowed is None:
+            return
+        schools = self.allowed['schools']
+        if school is not None and school not in schools:
+            raise UnknownCohort(f"Unknown school '{school}'")
+        if school is not None and class_name is not None and class_name not in schools[school]:
+            raise UnknownCohort(f"Unknown class '{class_name}' in school '{school}'")
+        if term is not None and term not in self.allowed['terms']:
+            raise UnknownCohort(f"Unknown term '{term}'")
+
+    def _add(self, key: Tuple, scores: Dict[str, float]):
+        criteria = self._cohorts.get(key)
+        if criteria is None:
+            criteria = self._cohorts[key] = {}
+            while len(self._cohorts) > self.max_cohorts:
+                self._cohorts.popitem(last=False)
+        self._cohorts.move_to_end(key)
+        for name, value in scores.items():
+            aggregate = criteria.get(name)
+            if aggregate is None:
+                aggregate = criteria[name] = CriterionAggregate(self.k)
+            aggregate.add(value)
+
+    def percentile_rank(self, value: float, criterion: str = OVERALL,
+                        school: Optional[str] = None, class_name: Optional[str] = None,
+                        term: Optional[str] = None) -> Optional[float]:
+        """
+        Percentile (0-100) of a criterion percentage within one cohort.
+
+        Returns:
+            Percentile rank, or None if the cohort has no data for the criterion
+        """
+        key = (term, school, class_name if school is not None else None)
+        with self._lock:
+            aggregate = self._cohorts.get(key, {}).get(criterion)
+            if aggregate is None or aggregate.stats.count == 0:
+                return None
+            return round(100.0 * aggregate.sketch.rank(value), 1)
+
+    def observe(self, results: Dict[str, Any], school: Optional[str] = None,
+                class_name: Optional[str] = None, term: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rank a result against its cohorts, then add it to them.
+
+        Ranks are computed against the results seen before this one, so the
+        first result of a cohort has no percentile.
+
+        Args:
+            results: Result dict from StudentEvaluator.evaluate()
+            school: School the student attends
+            class_name: Class within the school
+            term: Term or assessment period
+
+        Returns:
+            Dictionary with the most specific cohort's per-criterion
+            percentiles ('criteria'), its size ('count'), and the overall
+            percentile at each cohort level ('levels')
+
+        Raises:
+            UnknownCohort: If the cohort is not in the configured list
+        """
+        self.check_cohort(school, class_name, term)
+        scores = criterion_scores(results)
+        keys = cohort_keys(school, class_name, term)
+        with self._lock:
+            levels = {}
+            for level, key in keys:
+                # With a term, rank within the term (the first key of each level)
+                if level in levels:
+                    continue
+                aggregate = self._cohorts.get(key, {}).get(OVERALL)
+                levels[level] = (
+                    round(100.0 * aggregate.sketch.rank(scores[OVERALL]), 1)
+                    if aggregate is not None and aggregate.stats.count else None
+                )
+
+            criteria = self._cohorts.get(keys[0][1], {})
+            ranked = {
+                name: round(100.0 * criteria[name].sketch.rank(value), 1)
+                if name in criteria and criteria[name].stats.count else None
+                for name, value in scores.items()
+            }
+            count = criteria[OVERALL].stats.count if OVERALL in criteria else 0
+
+            for _, key in keys:
+                self._add(key, scores)
+
+        return {
+            'cohort': _describe(keys[0][1]),
+            'count': count,
+            'criteria': ranked,
+            'levels': levels
+        }
+
+    def summary(self, school: Optional[str] = None, class_name: Optional[str] = None,
+                term: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Per-criterion statistics of one cohort, with its weakest criterion.
+
+        Returns:
+            Dictionary with cohort, count, criteria (mean/std/min/max/p10/p50/p90
+            per criterion) and weakest (criterion with the lowest mean, or None)
+        """
+        key = (term, school, class_name if school is not None else None)
+        with self._lock:
+            criteria = {
+                name: aggregate.summary()
+                for name, aggregate in self._cohorts.get(key, {}).items()
+            }
+        rubric_criteria = {name: c for name, c in criteria.items() if name != OVERALL and c['count']}
+        weakest = min(rubric_criteria, key=lambda name: rubric_criteria[name]['mean'], default=None)
+        return {
+            'cohort': _describe(key),
+            'count': criteria[OVERALL]['count'] if OVERALL in criteria else 0,
+            'criteria': criteria,
+            'weakest': weakest
+        }
+
+    def cohorts(self) -> List[Dict[str, Optional[str]]]:
+        """List the cohorts currently tracked."""
+        with self._lock:
+            return [_describe(key) for key in self._cohorts]
+
+    def merge(self, other: 'CohortAnalytics'):
+        """Fold another aggregate (e.g. from a batch worker) into this one."""
+        with other._lock:
+            incoming = [(key, dict(criteria)) for key, criteria in other._cohorts.items()]
+        with self._lock:
+            for key, criteria in incoming:
+                target = self._cohorts.get(key)
+                if target is None:
+                    target = self._cohorts[key] = {}
+                self._cohorts.move_to_end(key)
+                for name, aggregate in criteria.items():
+                    if name not in target:
+                        target[name] = CriterionAggregate(self.k)
+                    target[name].merge(aggregate)
+            while len(self._cohorts) > self.max_cohorts:
+                self._cohorts.popitem(last=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-serializable snapshot (see from_dict)."""
+        with self._lock:
+            return {
+                'k': self.k,
+                'cohorts': [
+                    {
+                        'key': list(key),
+                        'criteria': {
+                            name: {
+                                'stats': aggregate.stats.to_dict(),
+                                'sketch': aggregate.sketch.to_dict()
+                            }
+                            for name, aggregate in criteria.items()
+                        }
+                    }
+                    for key, criteria in self._cohorts.items()
+                ]
+            }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], max_cohorts: int = ANALYTICS_MAX_COHORTS,
+                  cohorts: Optional[Dict[str, Any]] = None) -> 'CohortAnalytics':
+        analytics = cls(k=data['k'], max_cohorts=max_cohorts, cohorts=cohorts)
+        for cohort in data['cohorts']:
+            criteria = {}
+            for name, state in cohort['criteria'].items():
+                aggregate = CriterionAggregate(analytics.k)
+                aggregate.stats = RunningStats.from_dict(state['stats'])
+                aggregate.sketch = QuantileSketch.from_dict(state['sketch'])
+                criteria[name] = aggregate
+            analytics._cohorts[tuple(cohort['key'])] = criteria
+        return analytics
+
+    def save(self, path: str):
+        """Write a snapshot to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f)
+
+    @classmethod
+    def load(cls, path: str, max_cohorts: int = ANALYTICS_MAX_COHORTS,
+             cohorts: Optional[Dict[str, Any]] = None) -> 'CohortAnalytics':
+        """Read a snapshot written by save()."""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f), max_cohorts, cohorts)
+
+
+def merge_snapshots(paths: Iterable[str]) -> CohortAnalytics:
+    """
+    Merge snapshot files written by batch workers into one aggregate.
+
+    Args:
+        paths: Files written by CohortAnalytics.save()
+
+    Returns:
+        The merged aggregate
+    """
+    merged = None
+    for path in paths:
+        part = CohortAnalytics.load(path)
+        if merged is None:
+            merged = part
+        else:
+            merged.merge(part)
+    return merged if merged is not None else CohortAnalytics()
+
+
+def _describe(key: Tuple) -> Dict[str, Optional[str]]:
+    term, school, class_name = key
+    return {'term': term, 'school': school, 'class': class_name}
+
+
+def main():
+    """Merge batch-worker snapshots or print a cohort summary."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Cohort analytics snapshots')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    merge = subparsers.add_parser('merge', help='Merge snapshot files into one')
+    merge.add_argument('output', help='Merged snapshot to write')
+    merge.add_argument('inputs', nargs='+', help='Snapshots written by batch workers')
+    summary = subparsers.add_parser('summary', help='Print statistics for a cohort')
+    summary.add_argument('snapshot', help='Snapshot file')
+    summary.add_argument('--school')
+    summary.add_argument('--class', dest='class_name')
+    summary.add_argument('--term')
+    args = parser.parse_args()
+
+    if args.command == 'merge':
+        merged = merge_snapshots(args.inputs)
+        merged.save(args.output)
+        print(f"✅ Merged {len(args.inputs)} snapshots ({len(merged.cohorts())} cohorts) into {args.output}")
+    else:
+        analytics = CohortAnalytics.load(args.snapshot)
+        print(json.dumps(analytics.summary(args.school, args.class_name, args.term), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""
+Nearest-neighbour index of rubric category exemplars.
+
+The keyword regexes miss paraphrases ("my mom and dad", "I'm in eighth
+standard"). This index holds embeddings of exemplar phrases for each rubric
+category as one normalized matrix (optionally int8-quantized). Every
+transcript sentence is compared with all exemplars in a single matrix
+multiply; a category is detected when its best exemplar similarity reaches
+the threshold.
+
+Batches are vectorized end to end: the sentences of all transcripts are
+encoded in one call and scored against the exemplar matrix in large row
+blocks, then reduced per category and per transcript.
+"""
+
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ..config import CATEGORY_EXEMPLARS, CATEGORY_MATCH_THRESHOLD
+from ..utils.embedding_store import normalize_rows, quantize_int8
+
+
+class CategoryIndex:
+    """Exemplar embeddings per rubric category, matched against transcript sentences."""
+
+    def __init__(
+        self,
+        semantic_analyzer,
+        exemplars: Optional[Dict[str, List[str]]] = None,
+        threshold: float = CATEGORY_MATCH_THRESHOLD,
+        quantize: bool = False
+    ):
+        """
+        Encode the exemplars and build the index.
+
+        Args:
+            semantic_analyzer: SemanticAnalyzer used to embed exemplars and transcripts
+            exemplars: Category name -> exemplar phrases (defaults to CATEGORY_EXEMPLARS)
+            threshold: Minimum cosine similarity for a category to count as present
+            quantize: Store the exemplar matrix as int8 with per-row scales
+        """
+        exemplars = exemplars if exemplars is not None else CATEGORY_EXEMPLARS
+        categories = [name for name, phrases in exemplars.items() if phrases]
+        phrases = [phrase for name in categories for phrase in exemplars[name]]
+        counts = [len(exemplars[name]) for name in categories]
+        matrix = normalize_rows(semantic_analyzer.encode(phrases)) if phrases else None
+        self._build(semantic_analyzer, categories, counts, matrix, threshold, quantize)
+
+    def _build(self, semantic_analyzer, categories: List[str], counts: List[int],
+               matrix: Optional[np.ndarray], threshold: float, quantize: bool):
+        self.semantic_analyzer = semantic_analyzer
+        self.categories = list(categories)
+        self.threshold = threshold
+        # Exemplars are grouped by category; starts[i] is category i's first row
+        self._starts = np.cumsum([0] + list(counts))[:-1]
+        self._counts = np.asarray(counts, dtype=np.int64)
+        self._scales = None
+        self._matrix = matrix
+        if matrix is not None and quantize:
+            self._matrix, self._scales = quantize_int8(matrix)
+
+    def __len__(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    @property
+    def quantized(self) -> bool:
+        return self._scales is not None
+
+    def category_similarities(self, sentence_embeddings: np.ndarray) -> np.ndarray:
+        """
+        Best exemplar similarity per category for each sentence.
+
+        Args:
+            sentence_embeddings: (sentences, dim) normalized embeddings
+
+        Returns:
+            (sentences, categories) float32 array
+        """
+        if self._matrix is None or not len(sentence_embeddings):
+            return np.zeros((len(sentence_embeddings), len(self.categories)), dtype=np.float32)
+        # int8 rows are scaled back after the multiply (one scale per exemplar column)
+        similarities = np.asarray(sentence_embeddings, dtype=np.float32) @ self._matrix.T.astype(np.float32)
+        if self._scales is not None:
+            similarities *= self._scales
+        return np.maximum.reduceat(similarities, self._starts, axis=1)
+
+    def batch_similarities(self, transcripts: List[str], block_rows: int = 8192) -> np.ndarray:
+        """
+        Best similarity per category for many transcripts in one vectorized pass.
+
+        Args:
+            transcripts: Transcript texts
+            block_rows: Sentences scored per matrix multiply (bounds memory)
+
+        Returns:
+            (transcripts, categories) float32 array; compare with self.threshold
+        """
+        if not transcripts:
+            return np.zeros((0, len(self.categories)), dtype=np.float32)
+        sentences, bounds = self._embed(transcripts)
+        return np.maximum.reduceat(self._score_blocks(sentences, block_rows), bounds[:-1], axis=0)
+
+    def detect(self, transcript: str) -> Dict[str, Any]:
+        """
+        Detect rubric categories in one transcript.
+
+        Args:
+            transcript: Transcript text
+
+        Returns:
+            Dictionary with 'detected' (category -> similarity and the
+            best-matching sentence), 'similarities' for every category and
+            the threshold used
+        """
+        return self.detect_batch([transcript])[0]
+
+    def detect_batch(self, transcripts: List[str], block_rows: int = 8192) -> List[Dict[str, Any]]:
+        """
+        Detect rubric categories in many transcripts (see detect()).
+
+        Args:
+            transcripts: Transcript texts
+            block_rows: Sentences scored per matrix multiply
+
+        Returns:
+            One detect() result per transcript
+        """
+        units = [self.semantic_analyzer.split_transcript(t) for t in transcripts]
+        sentences, bounds = self._embed(transcripts, units)
+        per_sentence = self._score_blocks(sentences, block_rows)
+
+        results = []
+        for i, parts in enumerate(units):
+            block = per_sentence[bounds[i]:bounds[i + 1]]
+            best = block.argmax(axis=0)
+            maxima = block[best, np.arange(len(self.categories))]
+            results.append({
+                'detected': {
+                    category: {
+                        'similarity': round(float(maxima[j]), 3),
+                        'sentence': parts[best[j]]
+                    }
+                    for j, category in enumerate(self.categories) if maxima[j] >= self.threshold
+                },
+                'similarities': {
+                    category: round(float(maxima[j]), 3) for j, category in enumerate(self.categories)
+                },
+                'threshold': self.threshold
+            })
+        return results
+
+    def _embed(self, transcripts: List[str], units: Optional[List[List[str]]] = None) -> tuple:
+        """Sentence embeddings of all transcripts (one encode call) and per-transcript row bounds."""
+        if units is None:
+            units = [self.semantic_analyzer.split_transcript(t) for t in transcripts]
+        flat = [unit for parts in units for unit in parts]
+        sentences = self.semantic_analyzer.embed_sentences(flat) if flat else np.zeros((0, 0), np.float32)
+        bounds = np.cumsum([0] + [len(parts) for parts in units])
+        return sentences, bounds
+
+    def _score_blocks(self, sentences: np.ndarray, block_rows: int) -> np.ndarray:
+        if len(sentences) <= block_rows:
+            return self.category_similarities(sentences)
+        return np.vstack([
+            self.category_similarities(sentences[start:start + block_rows])
+            for start in range(0, len(sentences), block_rows)
+        ])
+
+    def save(self, path: str):
+        """
+        Write the index to a .npz file so workers skip re-encoding the exemplars.
+
+        Args:
+            path: Output file
+        """
+        arrays = {
+            'matrix': self._matrix if self._matrix is not None else np.zeros((0, 0), np.float32),
+            'counts': self._counts,
+            'categories': np.asarray(self.categories),
+            'threshold': np.float32(self.threshold)
+        }
+        if self._scales is not None:
+            arrays['scales'] = self._scales
+        with open(path, 'wb') as f:
+            np.savez(f, **arrays)
+
+    @classmethod
+    def load(cls, path: str, semantic_analyzer) -> 'CategoryIndex':
+        """
+        Read an index written by save().
+
+        Args:
+            path: Index file
+            semantic_analyzer: Analyzer with the same model the index was built with
+
+        Raises:
+            ValueError: If the embedding dimension does not match the analyzer's model
+        """
+        with np.load(path) as data:
+            matrix = data['matrix'] if data['matrix'].size else None
+            if matrix is not None and matrix.shape[1] != semantic_analyzer.dimension:
+                raise ValueError(
+                    f"Category index has dimension {matrix.shape[1]}, "
+                    f"model has {semantic_analyzer.dimension}"
+                )
+            index = cls.__new__(cls)
+            index._build(semantic_analyzer, data['categories'].tolist(), data['counts'].tolist(),
+                         matrix, float(data['threshold']), False)
+            if 'scales' in data:
+                index._scales = data['scales']
+        return index
@@ -1,8 +1,8 @@
 """Clarity Analyzer - 15 points total."""
 
-import re
-from typing import Dict, Any, List
-from ..config import FILLER_WORDS, MAX_SCORES
+from typing import Dict, Any, Optional
+from ..config import MAX_SCORES
+from ..rubric import RubricIndex, default_rubric
 from ..utils.keywords import tokenize_words
 from ..utils.scorer import score_filler_rate
 
@@ -10,27 +10,31 @@ from ..utils.scorer import score_filler_rate
 class ClarityAnalyzer:
     """Analyzes clarity through filler word detection."""
     
-    def __init__(self):
-        self.max_score = MAX_SCORES['clarity']
-        self.filler_words = FILLER_WORDS
+    def __init__(self, rubric: Optional[RubricIndex] = None):
+        self.rubric = rubric or default_rubric()
+        self.max_score = self.rubric.max_scores['clarity']
+        self.filler_words = self.rubric.data['filler_words']
     
-    def analyze(self, text: str) -> Dict[str, Any]:
+    def analyze(self, text: str, rubric: Optional[RubricIndex] = None) -> Dict[str, Any]:
         """
         Analyze clarity based on filler word usage.
         
         Args:
             text: Transcript text
+            rubric: Rubric to score against (defaults to the analyzer's rubric)
             
         Returns:
             Dictionary with filler word analysis and score
         """
+        rubric = rubric or self.rubric
+        max_score = rubric.max_scores['clarity']
         words = tokenize_words(text)
         total_words = len(words)
         
         if total_words == 0:
             return {
-                'score': self.max_score,
-                'max_score': self.max_score,
+                'score': max_score,
+                'max_score': max_score,
                 'filler_count': 0,
                 'filler_rate': 0,
                 'total_words': 0,
@@ -38,48 +42,51 @@ class ClarityAnalyzer:
             }
         
         # Count filler words
-        filler_count, filler_details = self._count_filler_words(text)
+        filler_count, filler_details = self._count_filler_words(text, rubric)
         
         # Calculate filler rate (percentage)
         filler_rate = (filler_count / total_words) * 100
         filler_rate = round(filler_rate, 2)
         
-        # Get score
+        # Get score (filler tiers are defined on the default 15-point scale)
         score = score_filler_rate(filler_rate)
+        if max_score != MAX_SCORES['clarity']:
+            score = round(score * max_score / MAX_SCORES['clarity'], 1)
         
         return {
             'score': score,
-            'max_score': self.max_score,
+            'max_score': max_score,
             'filler_count': filler_count,
             'filler_rate': filler_rate,
             'total_words': total_words,
             'filler_details': filler_details
         }
     
-    def _count_filler_words(self, text: str) -> tuple:
+    def _count_filler_words(self, text: str, rubric: Optional[RubricIndex] = None) -> tuple:
         """
         Count occurrences of filler words.
         
         Args:
             text: Input text
+            rubric: Rubric providing the precompiled filler patterns
             
         Returns:
             Tuple of (total_count, details_dict)
         """
+        rubric = rubric or self.rubric
         text_lower = text.lower()
         total_count = 0
         details = {}
         
-        for filler in self.filler_words:
+        for filler, pattern in rubric.filler_patterns:
             # Use word boundary matching for single words
             # and phrase matching for multi-word fillers
-            if ' ' in filler:
+            if pattern is None:
                 # Multi-word filler (e.g., "you know")
                 count = text_lower.count(filler)
             else:
                 # Single word filler with word boundaries
-                pattern = r'\b' + re.escape(filler) + r'\b'
-                count = len(re.findall(pattern, text_lower))
+                count = len(pattern.findall(text_lower))
             
             if count > 0:
                 details[filler] = count
@@ -1,42 +1,45 @@
 """Content and Structure Analyzer - 40 points total."""
 
 import re
-from typing import Dict, Any
-from ..config import (
-    SALUTATION_EXCELLENT,
-    SALUTATION_GOOD,
-    SALUTATION_NORMAL,
-    SALUTATION_SCORES,
-    MUST_HAVE_KEYWORDS,
-    GOOD_TO_HAVE_KEYWORDS,
-    CLOSING_PHRASES,
-    MAX_SCORES
-)
-from ..utils.keywords import find_keywords
+from typing import Dict, Any, Optional
+from ..config import MAX_SCORES
+from ..rubric import RubricIndex, default_rubric, SALUTATION_LEVELS
 
 
 class ContentAnalyzer:
     """Analyzes content structure and completeness of introduction."""
     
-    def __init__(self):
-        self.max_salutation = MAX_SCORES['salutation']
-        self.max_keywords = MAX_SCORES['keywords']
-        self.max_flow = MAX_SCORES['flow']
-        self.max_total = MAX_SCORES['content_total']
+    def __init__(self, rubric: Optional[RubricIndex] = None):
+        self.rubric = rubric or default_rubric()
+        self.max_salutation = self.rubric.max_scores['salutation']
+        self.max_keywords = self.rubric.max_scores['keywords']
+        self.max_flow = self.rubric.max_scores['flow']
+        self.max_total = self.rubric.max_scores['content_total']
     
-    def analyze(self, text: str) -> Dict[str, Any]:
+    def analyze(
+        self,
+        text: str,
+        rubric: Optional[RubricIndex] = None,
+        categories: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """
         Analyze content and structure.
         
         Args:
             text: Transcript text
+            rubric: Rubric to score against (defaults to the analyzer's rubric)
+            categories: CategoryIndex.detect() output; detected categories the
+                keyword patterns missed are credited as well
             
         Returns:
             Dictionary with scores and details
         """
-        salutation_result = self._analyze_salutation(text)
-        keywords_result = self._analyze_keywords(text)
-        flow_result = self._analyze_flow(text)
+        rubric = rubric or self.rubric
+        max_total = rubric.max_scores['content_total']
+        
+        salutation_result = self._analyze_salutation(text, rubric)
+        keywords_result = self._analyze_keywords(text, rubric, categories)
+        flow_result = self._analyze_flow(text, rubric)
         
         total_score = (
             salutation_result['score'] + 
@@ -49,140 +52,148 @@ class ContentAnalyzer:
             'keywords': keywords_result,
             'flow': flow_result,
             'total_score': total_score,
-            'max_score': self.max_total,
-            'percentage': round((total_score / self.max_total) * 100, 1)
+            'max_score': max_total,
+            'percentage': round((total_score / max_total) * 100, 1)
         }
     
-    def _analyze_salutation(self, text: str) -> Dict[str, Any]:
+    def _analyze_salutation(self, text: str, rubric: RubricIndex) -> Dict[str, Any]:
         """Analyze salutation level (5 points)."""
-        text_lower = text.lower()
         first_sentence = text.split('.')[0].lower() if '.' in text else text[:100].lower()
-        
-        # Check excellent salutations
-        for phrase in SALUTATION_EXCELLENT:
-            if phrase in first_sentence:
-                return {
-                    'score': SALUTATION_SCORES['excellent'],
-                    'max_score': self.max_salutation,
-                    'level': 'Excellent',
-                    'phrase_found': phrase
-                }
-        
-        # Check good salutations
-        for phrase in SALUTATION_GOOD:
-            if phrase in first_sentence:
-                return {
-                    'score': SALUTATION_SCORES['good'],
-                    'max_score': self.max_salutation,
-                    'level': 'Good',
-                    'phrase_found': phrase
-                }
-        
-        # Check normal salutations
-        for phrase in SALUTATION_NORMAL:
-            if phrase in first_sentence:
-                return {
-                    'score': SALUTATION_SCORES['normal'],
-                    'max_score': self.max_salutation,
-                    'level': 'Normal',
-                    'phrase_found': phrase
-                }
+        max_salutation = rubric.max_scores['salutation']
+        
+        # One trie scan finds every salutation phrase; the best level wins,
+        # and within a level the first listed phrase is reported
+        found = rubric.salutation_trie.find_all(first_sentence)
+        for level in SALUTATION_LEVELS:
+            for phrase in rubric.salutations[level]:
+                if phrase in found:
+                    return {
+                        'score': rubric.salutation_scores[level],
+                        'max_score': max_salutation,
+                        'level': level.capitalize(),
+                        'phrase_found': phrase
+                    }
         
         return {
-            'score': SALUTATION_SCORES['none'],
-            'max_score': self.max_salutation,
+            'score': rubric.salutation_scores['none'],
+            'max_score': max_salutation,
             'level': 'None',
             'phrase_found': None
         }
     
-    def _analyze_keywords(self, text: str) -> Dict[str, Any]:
+    def _analyze_keywords(
+        self,
+        text: str,
+        rubric: RubricIndex,
+        categories: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
         """Analyze keyword presence (30 points max: 20 must-have + 10 good-to-have)."""
+        text_lower = text.lower()
+        max_must_have = rubric.max_scores['must_have']
+        max_good_to_have = rubric.max_scores['good_to_have']
+        detected = categories['detected'] if categories else {}
+        semantic_found = []
+        
         must_have_score = 0
         must_have_found = []
         
         # Check must-have keywords (4 points each, max 20)
-        for keyword, data in MUST_HAVE_KEYWORDS.items():
-            if find_keywords(text, data['patterns']):
-                must_have_score += data['score']
+        for keyword, patterns, score in rubric.must_have_keywords:
+            if any(pattern.search(text_lower) for pattern in patterns):
+                must_have_score += score
                 must_have_found.append(keyword)
+            elif keyword in detected:
+                # Paraphrase the patterns missed, found by sentence embeddings
+                must_have_score += score
+                must_have_found.append(keyword)
+                semantic_found.append(keyword)
         
         # Cap at 20 points
-        must_have_score = min(must_have_score, 20)
+        must_have_score = min(must_have_score, max_must_have)
         
         good_to_have_score = 0
         good_to_have_found = []
         
         # Check good-to-have keywords (2 points each, max 10)
-        for keyword, data in GOOD_TO_HAVE_KEYWORDS.items():
-            if find_keywords(text, data['patterns']):
-                good_to_have_score += data['score']
+        for keyword, patterns, score in rubric.good_to_have_keywords:
+            if any(pattern.search(text_lower) for pattern in patterns):
+                good_to_have_score += score
+                good_to_have_found.append(keyword)
+            elif keyword in detected:
+                good_to_have_score += score
                 good_to_have_found.append(keyword)
+                semantic_found.append(keyword)
         
         # Cap at 10 points
-        good_to_have_score = min(good_to_have_score, 10)
+        good_to_have_score = min(good_to_have_score, max_good_to_have)
         
         total_keyword_score = must_have_score + good_to_have_score
         
-        return {
+        result = {
             'score': total_keyword_score,
-            'max_score': self.max_keywords,
+            'max_score': rubric.max_scores['keywords'],
             'must_have': {
                 'score': must_have_score,
-                'max': 20,
+                'max': max_must_have,
                 'found': must_have_found,
                 'count': len(must_have_found)
             },
             'good_to_have': {
                 'score': good_to_have_score,
-                'max': 10,
+                'max': max_good_to_have,
                 'found': good_to_have_found,
                 'count': len(good_to_have_found)
             }
         }
+        if categories is not None:
+            result['semantic_found'] = semantic_found
+        return result
     
-    def _analyze_flow(self, text: str) -> Dict[str, Any]:
+    def _analyze_flow(self, text: str, rubric: RubricIndex) -> Dict[str, Any]:
         """
         Analyze flow/order (5 points).
         Expected order: Salutation → Basic details → Additional details → Closing
         """
         text_lower = text.lower()
         sentences = [s.strip() for s in re.split(r'[.!?]+', text) if s.strip()]
+        max_flow = rubric.max_scores['flow']
         
         if not sentences:
             return {
                 'score': 0,
-                'max_score': self.max_flow,
+                'max_score': max_flow,
                 'order_followed': False,
                 'reason': 'No sentences found'
             }
         
         # Check if there's a closing
         has_closing = any(
-            re.search(pattern, text_lower) 
-            for pattern in CLOSING_PHRASES
+            pattern.search(text_lower)
+            for pattern in rubric.closing_patterns
         )
         
         # Simple heuristic: Check if salutation is in first sentence
         # and closing is near the end
-        has_salutation_first = any(
-            phrase in sentences[0].lower()
-            for phrase in SALUTATION_EXCELLENT + SALUTATION_GOOD + SALUTATION_NORMAL
-        )
+        has_salutation_first = bool(rubric.salutation_trie.find_all(sentences[0].lower()))
         
         # Award full points if basic structure is present
         if has_salutation_first or has_closing:
             return {
-                'score': self.max_flow,
-                'max_score': self.max_flow,
+                'score': max_flow,
+                'max_score': max_flow,
                 'order_followed': True,
                 'has_salutation_first': has_salutation_first,
                 'has_closing': has_closing
             }
         
-        # Partial credit if at least some structure exists
+        # Partial credit if at least some structure exists (2 of the
+        # default 5 points, scaled to the rubric's maximum)
+        partial = 2
+        if max_flow != MAX_SCORES['flow']:
+            partial = round(partial * max_flow / MAX_SCORES['flow'], 1)
         return {
-            'score': 2,
-            'max_score': self.max_flow,
+            'score': partial,
+            'max_score': max_flow,
             'order_followed': False,
             'has_salutation_first': has_salutation_first,
             'has_closing': has_closing
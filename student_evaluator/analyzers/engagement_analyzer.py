@@ -1,32 +1,76 @@
 """Engagement Analyzer - 15 points total."""
 
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, List, Optional
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
-from ..config import MAX_SCORES
+from ..config import (
+    MAX_SCORES,
+    ENGAGEMENT_MODES,
+    ENGAGEMENT_SENTENCE_CACHE_SIZE,
+    ENGAGEMENT_SENTENCE_CACHE_MAX_CHARS,
+    ENGAGEMENT_DOCUMENT_CHUNK_WORDS
+)
+from ..rubric import RubricIndex, default_rubric
+from ..utils.keywords import split_sentences, tokenize_words
+from ..utils.lifecycle import Closeable
 from ..utils.scorer import score_sentiment
 
 
-class EngagementAnalyzer:
+class EngagementAnalyzer(Closeable):
     """Analyzes engagement through sentiment analysis."""
     
-    def __init__(self):
+    def __init__(self, mode: str = 'document', cache_size: int = ENGAGEMENT_SENTENCE_CACHE_SIZE):
+        """
+        Args:
+            mode: 'document' scores the whole transcript in one VADER call;
+                'sentence' scores each sentence (memoized) and aggregates them,
+                adding an engagement curve
+            cache_size: Sentence scores kept in the LRU cache ('sentence' mode)
+        """
+        if mode not in ENGAGEMENT_MODES:
+            raise ValueError(f"Unknown engagement mode '{mode}'. Choose from {ENGAGEMENT_MODES}")
         self.max_score = MAX_SCORES['engagement']
+        self.mode = mode
         self.analyzer = SentimentIntensityAnalyzer()
+        # Boilerplate sentences ("Thank you for listening.") repeat across
+        # transcripts, so their scores are memoized per analyzer
+        self._sentence_scores = lru_cache(maxsize=cache_size)(self.analyzer.polarity_scores)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return sentence cache counters."""
+        info = self._sentence_scores.cache_info()
+        lookups = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'max_size': info.maxsize,
+            'hit_rate': round(info.hits / lookups, 3) if lookups else 0.0
+        }
     
-    def analyze(self, text: str) -> Dict[str, Any]:
+    def close(self):
+        """Drop cached sentence scores."""
+        self._sentence_scores.cache_clear()
+    
+    def analyze(self, text: str, rubric: Optional[RubricIndex] = None) -> Dict[str, Any]:
         """
         Analyze engagement using sentiment analysis.
         
         Args:
             text: Transcript text
+            rubric: Rubric whose engagement maximum the score is scaled to
+                (defaults to config.py)
             
         Returns:
-            Dictionary with sentiment scores and engagement score
+            Dictionary with sentiment scores and engagement score (plus
+            per-sentence details and an engagement curve in 'sentence' mode)
         """
+        max_score = (rubric or default_rubric()).max_scores['engagement']
+        
         if not text.strip():
             return {
                 'score': 0,
-                'max_score': self.max_score,
+                'max_score': max_score,
                 'sentiment_compound': 0,
                 'sentiment_positive': 0,
                 'sentiment_neutral': 0,
@@ -35,7 +79,11 @@ class EngagementAnalyzer:
             }
         
         # Get sentiment scores
-        sentiment_scores = self.analyzer.polarity_scores(text)
+        curve = None
+        if self.mode == 'sentence':
+            sentiment_scores, curve = self._score_sentences(text)
+        else:
+            sentiment_scores = self._score_document(text)
         
         # Extract compound score (normalized from -1 to 1)
         compound = sentiment_scores['compound']
@@ -52,6 +100,8 @@ class EngagementAnalyzer:
         
         # Calculate engagement score based on normalized compound
         score = score_sentiment(positive_score_metric)
+        if max_score != MAX_SCORES['engagement']:
+            score = round(score * max_score / MAX_SCORES['engagement'], 1)
         
         # Interpret sentiment
         if compound_normalized >= 0.7:
@@ -61,9 +111,9 @@ class EngagementAnalyzer:
         else:
             interpretation = "Negative (disinterested, anxious)"
         
-        return {
+        results = {
             'score': score,
-            'max_score': self.max_score,
+            'max_score': max_score,
             'sentiment_compound': round(compound, 3),
             'sentiment_positive': round(sentiment_scores['pos'], 3),
             'sentiment_neutral': round(sentiment_scores['neu'], 3),
@@ -71,3 +121,95 @@ class EngagementAnalyzer:
             'compound_normalized': round(compound_normalized, 3),
             'interpretation': interpretation
         }
+        
+        if curve is not None:
+            results['mode'] = 'sentence'
+            results['engagement_curve'] = curve
+            if curve:
+                lowest = min(curve, key=lambda point: point['compound'])
+                results['lowest_sentence'] = lowest
+        
+        return results
+    
+    def _score_document(self, text: str) -> Dict[str, float]:
+        """
+        Score the whole transcript, in word windows if it is long.
+        
+        VADER rescans the full word list for every sentiment word, so one
+        call on pasted text of tens of thousands of words takes seconds.
+        Transcripts up to ENGAGEMENT_DOCUMENT_CHUNK_WORDS words are scored
+        in a single call as before; longer ones are scored per window and
+        averaged weighted by window length.
+        
+        Args:
+            text: Transcript text
+            
+        Returns:
+            VADER scores dict with compound/pos/neu/neg
+        """
+        words = text.split()
+        if len(words) <= ENGAGEMENT_DOCUMENT_CHUNK_WORDS:
+            return self.analyzer.polarity_scores(text)
+        
+        totals = {'compound': 0.0, 'pos': 0.0, 'neu': 0.0, 'neg': 0.0}
+        for start in range(0, len(words), ENGAGEMENT_DOCUMENT_CHUNK_WORDS):
+            chunk = words[start:start + ENGAGEMENT_DOCUMENT_CHUNK_WORDS]
+            scores = self.analyzer.polarity_scores(' '.join(chunk))
+            for key in totals:
+                totals[key] += scores[key] * len(chunk)
+        return {key: value / len(words) for key, value in totals.items()}
+    
+    def _score_sentences(self, text: str) -> tuple:
+        """
+        Score each sentence and aggregate into document-level scores.
+        
+        Sentence scores are averaged weighted by word count, so a long
+        flat sentence weighs more than a short "Thank you!".
+        
+        Args:
+            text: Transcript text
+            
+        Returns:
+            Tuple of (aggregate scores dict with compound/pos/neu/neg,
+            engagement curve as a list of per-sentence points)
+        """
+        sentences = split_sentences(text) or [text.strip()]
+        
+        totals = {'compound': 0.0, 'pos': 0.0, 'neu': 0.0, 'neg': 0.0}
+        total_weight = 0
+        curve: List[Dict[str, Any]] = []
+        for index, sentence in enumerate(sentences):
+            scores = self._score_sentence(sentence)
+            weight = max(1, len(tokenize_words(sentence)))
+            for key in totals:
+                totals[key] += scores[key] * weight
+            total_weight += weight
+            curve.append({
+                'index': index,
+                'sentence': sentence,
+                'compound': round(scores['compound'], 3),
+                'compound_normalized': round((scores['compound'] + 1) / 2, 3)
+            })
+        
+        aggregate = {key: value / total_weight for key, value in totals.items()}
+        return aggregate, curve
+    
+    def _score_sentence(self, sentence: str) -> Dict[str, float]:
+        """
+        Score one sentence, from the cache if it is short.
+        
+        Text without punctuation arrives as one huge "sentence", which is
+        scored in word windows like a long document. Only sentences up to
+        ENGAGEMENT_SENTENCE_CACHE_MAX_CHARS characters are cached.
+        
+        Args:
+            sentence: Sentence text
+            
+        Returns:
+            VADER scores dict with compound/pos/neu/neg
+        """
+        # Collapse whitespace so line breaks do not defeat the cache
+        sentence = ' '.join(sentence.split())
+        if len(sentence) <= ENGAGEMENT_SENTENCE_CACHE_MAX_CHARS:
+            return self._sentence_scores(sentence)
+        return self._score_document(sentence)
@@ -1,67 +1,295 @@
 """Grammar and Language Analyzer - 20 points total."""
 
-from typing import Dict, Any
+import copy
+import re
+import threading
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
 import language_tool_python
-from ..config import MAX_SCORES
-from ..utils.keywords import tokenize_words, calculate_ttr
+from ..config import MAX_SCORES, GRAMMAR_CHUNK_CHARS, GRAMMAR_MAX_WORKERS
+from ..rubric import RubricIndex, default_rubric
+from ..utils import lifecycle
+from ..utils.keywords import tokenize_words, calculate_mattr, calculate_mtld
 from ..utils.scorer import score_grammar, score_vocabulary
 
 
-class GrammarAnalyzer:
+# End of a sentence: terminal punctuation followed by whitespace
+_SENTENCE_END = re.compile(r'[.!?]+\s+')
+
+# Rule-based approximation of common LanguageTool findings, used when a
+# request's time budget leaves no time for LanguageTool (analyze_quick).
+# Entries are (pattern, message, agreement); the reported offset is group 1
+# if the pattern has one. Agreement rules are skipped after an auxiliary
+# ("does she have", "did I is" is left to LanguageTool).
+_QUICK_RULES = [
+    (re.compile(r'\b(\w+)\s+\1\b', re.IGNORECASE), 'Possible typo: you repeated a word', False),
+    (re.compile(r'(?:^|[.!?]\s+)([a-z])'), 'This sentence does not start with an uppercase letter', False),
+    (re.compile(r"(?<![\w'])(i)(?!\w)"), 'The pronoun "I" should be uppercase', False),
+    (re.compile(r'\b(a)\s+[aeio]\w', re.IGNORECASE), 'Use "an" instead of "a" before a vowel sound', False),
+    (re.compile(r'\b(an)\s+[bcdfgjklmnpqrstvwxyz]\w', re.IGNORECASE),
+     'Use "a" instead of "an" before a consonant sound', False),
+    (re.compile(r'\bi\s+(is|are|has)\b', re.IGNORECASE), 'The verb does not agree with "I"', True),
+    (re.compile(r"\b(?:he|she|it)\s+(are|have|don't)\b", re.IGNORECASE),
+     'The verb does not agree with the singular subject', True),
+    (re.compile(r"\b(?:we|they)\s+(is|has|was|doesn't)\b", re.IGNORECASE),
+     'The verb does not agree with the plural subject', True),
+    (re.compile(r'\w(\s+)[,;:.!?](?=\s|$)'), 'Remove the space before the punctuation', False)
+]
+_AUXILIARIES = frozenset([
+    'do', 'does', 'did', 'can', 'could', 'will', 'would', 'shall', 'should',
+    'may', 'might', 'must', 'let', 'make', 'makes', 'help', 'helps'
+])
+_PREVIOUS_WORD = re.compile(r"([\w']+)\s*$")
+
+# Characters of surrounding text kept on each side of a match in its context
+CONTEXT_CHARS = 20
+
+
+class QuickMatch(NamedTuple):
+    """A grammar issue found by the rule-based check (the LanguageTool match fields used here)."""
+    message: str
+    context: str
+    offset: int
+    error_length: int
+
+
+class GrammarAnalyzer(lifecycle.Closeable):
     """Analyzes grammar errors and vocabulary richness."""
     
-    def __init__(self):
+    def __init__(self, chunk_chars: int = GRAMMAR_CHUNK_CHARS, max_workers: int = GRAMMAR_MAX_WORKERS):
+        """
+        Args:
+            chunk_chars: Texts longer than this are split at sentence
+                boundaries into chunks of at most this many characters
+            max_workers: Chunks of one text checked concurrently against
+                LanguageTool
+        """
+        self.chunk_chars = chunk_chars
+        self.max_workers = max_workers
         self.max_grammar = MAX_SCORES['grammar']
         self.max_vocabulary = MAX_SCORES['vocabulary']
         self.max_total = MAX_SCORES['grammar_total']
         
         # Initialize LanguageTool (lazy loading)
         self.tool = None
+        self._tool_lock = threading.Lock()
+        
+        # Optional MicroBatcher that coalesces concurrent check() calls
+        self.batcher = None
+        # Optional PriorityScheduler of the LanguageTool server; extra chunk
+        # workers then need a free slot of the request's priority class
+        self.scheduler = None
     
     def _init_tool(self):
         """Initialize LanguageTool if not already initialized."""
         if self.tool is None:
+            # Concurrent first requests must not each start a LanguageTool server
+            with self._tool_lock:
+                if self.tool is None:
+                    try:
+                        self.tool = language_tool_python.LanguageTool('en-US')
+                        # Make sure the JVM is stopped at exit even if close() is never called
+                        lifecycle.register(self)
+                    except Exception as e:
+                        print(f"Warning: Could not initialize LanguageTool: {e}")
+                        self.tool = None
+    
+    def check_batch(self, texts: List[str]) -> List[List[Any]]:
+        """
+        Check several texts with a single LanguageTool call.
+        
+        Texts are joined with blank lines, checked once, and each match is
+        mapped back to the text it came from with its offset made relative
+        to that text. The context LanguageTool cut from the joined text is
+        replaced by one cut from the match's own text, so no match shows
+        another (possibly another user's) text.
+        
+        Args:
+            texts: Texts to check
+            
+        Returns:
+            List of match lists, one per input text
+        """
+        self._init_tool()
+        if len(texts) == 1:
+            return [self.tool.check(texts[0])]
+        
+        separator = '\n\n'
+        starts = []
+        position = 0
+        for text in texts:
+            starts.append(position)
+            position += len(text) + len(separator)
+        
+        results = [[] for _ in texts]
+        for match in self.tool.check(separator.join(texts)):
+            index = bisect_right(starts, match.offset) - 1
+            start = starts[index]
+            # Drop matches that straddle the separator between two texts
+            if match.offset + match_length(match) > start + len(texts[index]):
+                continue
+            results[index].append(_shift_match(match, -start, texts[index]))
+        return results
+    
+    def _check(self, text: str, priority: Optional[str] = None) -> List[Any]:
+        """
+        Run a grammar check, through the micro-batcher when one is attached.
+        
+        Texts longer than chunk_chars are checked in chunks instead (see
+        _check_chunked); the micro-batcher would only join them up again.
+        """
+        if len(text) > self.chunk_chars:
+            return self._check_chunked(text, priority)
+        if self.batcher is not None:
+            return self.batcher.submit(text).result()
+        return self.tool.check(text)
+    
+    def _check_chunked(self, text: str, priority: Optional[str] = None) -> List[Any]:
+        """
+        Check a long text as concurrent sentence-aligned chunks.
+        
+        LanguageTool's cost grows faster than linearly with input length,
+        and one huge request occupies a single server thread. Chunks are
+        exact slices of the text, so every match is shifted back by its
+        chunk's start offset and the merged list (in text order) has the
+        same offsets a single call would report.
+        
+        The chunks of one text are checked by the calling thread (which
+        holds the request's scheduler slot, if any) and up to max_workers - 1
+        helper threads of this request only, so one request's chunks never
+        queue behind another's. With a scheduler attached, each helper
+        first takes a free slot of the request's priority class and none is
+        started otherwise, so the LanguageTool server never sees more calls
+        than the scheduler's capacity.
+        
+        Args:
+            text: Text to check
+            priority: Scheduler priority class of the request
+            
+        Returns:
+            Matches with offsets relative to `text`
+        """
+        chunks = split_chunks(text, self.chunk_chars)
+        if len(chunks) == 1:
+            return self.tool.check(text)
+        
+        tool = self.tool
+        scheduler = self.scheduler
+        pending = deque(enumerate(chunks))
+        chunk_matches = [None] * len(chunks)
+        errors = []
+        
+        def work():
+            while not errors:
+                try:
+                    index, (_, chunk) = pending.popleft()
+                except IndexError:
+                    return
+                try:
+                    chunk_matches[index] = tool.check(chunk)
+                except Exception as e:
+                    errors.append(e)
+        
+        def helper():
             try:
-                self.tool = language_tool_python.LanguageTool('en-US')
-            except Exception as e:
-                print(f"Warning: Could not initialize LanguageTool: {e}")
-                self.tool = None
+                work()
+            finally:
+                if scheduler is not None:
+                    scheduler.release(priority)
+        
+        helpers = []
+        for _ in range(min(self.max_workers, len(chunks)) - 1):
+            if scheduler is not None and not scheduler.try_acquire(priority):
+                break
+            thread = threading.Thread(target=helper, name='grammar-chunk', daemon=True)
+            thread.start()
+            helpers.append(thread)
+        work()
+        for thread in helpers:
+            thread.join()
+        if errors:
+            raise errors[0]
+        
+        matches = []
+        for (start, _), found in zip(chunks, chunk_matches):
+            matches.extend(_shift_match(match, start, text) for match in found)
+        return matches
     
-    def analyze(self, text: str) -> Dict[str, Any]:
+    def analyze(self, text: str, rubric: Optional[RubricIndex] = None,
+                priority: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze grammar and vocabulary.
         
         Args:
             text: Transcript text
+            rubric: Rubric selecting the vocabulary metric and the maximum
+                scores (defaults to config.py)
+            priority: Scheduler priority class of the request (see _check_chunked)
             
         Returns:
             Dictionary with grammar and vocabulary scores
         """
-        grammar_result = self._analyze_grammar(text)
-        vocabulary_result = self._analyze_vocabulary(text)
+        rubric = rubric or default_rubric()
+        grammar_result = self._analyze_grammar(text, rubric, priority)
+        vocabulary_result = self._analyze_vocabulary(text, rubric)
+        return self._combine(grammar_result, vocabulary_result, rubric)
+    
+    def analyze_quick(self, text: str, rubric: Optional[RubricIndex] = None,
+                      priority: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Analyze grammar with the rule-based check instead of LanguageTool.
+        
+        Used when a request's time budget cannot wait for LanguageTool; the
+        vocabulary part is unchanged.
+        
+        Args:
+            text: Transcript text
+            rubric: Rubric selecting the vocabulary metric
+            priority: Unused (no LanguageTool call); accepted like analyze()
+            
+        Returns:
+            Same structure as analyze(); the grammar part has method 'rules'
+        """
+        rubric = rubric or default_rubric()
+        grammar_result = self._grammar_result(text, quick_check(text), rubric)
+        grammar_result['method'] = 'rules'
+        grammar_result['note'] = 'Rule-based approximation (LanguageTool skipped to meet the time budget)'
+        vocabulary_result = self._analyze_vocabulary(text, rubric)
+        return self._combine(grammar_result, vocabulary_result, rubric)
+    
+    def _combine(self, grammar_result: Dict[str, Any], vocabulary_result: Dict[str, Any],
+                 rubric: RubricIndex) -> Dict[str, Any]:
+        """Add the grammar and vocabulary parts up to the rubric's grammar_total."""
+        max_total = rubric.max_scores['grammar_total']
+        parts_max = grammar_result['max_score'] + vocabulary_result['max_score']
         
         total_score = grammar_result['score'] + vocabulary_result['score']
+        if max_total != parts_max:
+            total_score = round(total_score * max_total / parts_max, 1)
         
         return {
             'grammar': grammar_result,
             'vocabulary': vocabulary_result,
             'total_score': total_score,
-            'max_score': self.max_total,
-            'percentage': round((total_score / self.max_total) * 100, 1)
+            'max_score': max_total,
+            'percentage': round((total_score / max_total) * 100, 1)
         }
     
-    def _analyze_grammar(self, text: str) -> Dict[str, Any]:
+    def _analyze_grammar(self, text: str, rubric: RubricIndex,
+                         priority: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze grammar errors (10 points).
         Uses LanguageTool to detect errors.
         """
         self._init_tool()
+        max_grammar = rubric.max_scores['grammar']
         
         if self.tool is None:
             # Fallback: assume perfect grammar if tool not available
             return {
-                'score': self.max_grammar,
-                'max_score': self.max_grammar,
+                'score': max_grammar,
+                'max_score': max_grammar,
                 'error_count': 0,
                 'errors_per_100': 0,
                 'errors': [],
@@ -69,45 +297,18 @@ class GrammarAnalyzer:
             }
         
         try:
-            # Check grammar
-            matches = self.tool.check(text)
-            error_count = len(matches)
-            
-            # Calculate errors per 100 words
-            words = tokenize_words(text)
-            word_count = len(words)
-            
-            if word_count == 0:
-                errors_per_100 = 0
-            else:
-                errors_per_100 = (error_count / word_count) * 100
-            
-            # Calculate score
-            score = score_grammar(errors_per_100)
-            
-            # Extract error details (limited to first 5)
-            error_details = []
-            for match in matches[:5]:
-                error_details.append({
-                    'message': match.message,
-                    'context': match.context,
-                    'offset': match.offset
-                })
-            
-            return {
-                'score': score,
-                'max_score': self.max_grammar,
-                'error_count': error_count,
-                'errors_per_100': round(errors_per_100, 2),
-                'word_count': word_count,
-                'errors': error_details
-            }
+            # Check grammar (long texts in concurrent chunks)
+            matches = self._check(text, priority)
+            result = self._grammar_result(text, matches, rubric)
+            if len(text) > self.chunk_chars:
+                result['chunks'] = len(split_chunks(text, self.chunk_chars))
+            return result
         
         except Exception as e:
             # Fallback on error
             return {
-                'score': self.max_grammar,
-                'max_score': self.max_grammar,
+                'score': max_grammar,
+                'max_score': max_grammar,
                 'error_count': 0,
                 'errors_per_100': 0,
                 'errors': [],
@@ -115,29 +316,208 @@ class GrammarAnalyzer:
                 'note': 'Error in grammar check, assuming no errors'
             }
     
-    def _analyze_vocabulary(self, text: str) -> Dict[str, Any]:
-        """
-        Analyze vocabulary richness using TTR (10 points).
-        TTR = unique words / total words
-        """
-        ttr = calculate_ttr(text)
-        score = score_vocabulary(ttr)
+    def _grammar_result(self, text: str, matches: List[Any], rubric: RubricIndex) -> Dict[str, Any]:
+        """Score a list of grammar matches (10 points, scaled to the rubric's maximum)."""
+        max_grammar = rubric.max_scores['grammar']
+        error_count = len(matches)
         
+        # Calculate errors per 100 words
         words = tokenize_words(text)
-        unique_words = set(words)
+        word_count = len(words)
+        
+        if word_count == 0:
+            errors_per_100 = 0
+        else:
+            errors_per_100 = (error_count / word_count) * 100
+        
+        # Calculate score
+        score = score_grammar(errors_per_100)
+        if max_grammar != MAX_SCORES['grammar']:
+            score = round(score * max_grammar / MAX_SCORES['grammar'], 1)
+        
+        # Extract error details (limited to first 5)
+        error_details = []
+        for match in matches[:5]:
+            error_details.append({
+                'message': match.message,
+                'context': match.context,
+                'offset': match.offset
+            })
         
         return {
             'score': score,
-            'max_score': self.max_vocabulary,
+            'max_score': max_grammar,
+            'error_count': error_count,
+            'errors_per_100': round(errors_per_100, 2),
+            'word_count': word_count,
+            'errors': error_details
+        }
+    
+    def _analyze_vocabulary(self, text: str, rubric: RubricIndex) -> Dict[str, Any]:
+        """
+        Analyze vocabulary richness (10 points).
+        
+        TTR = unique words / total words is always reported. The rubric's
+        vocabulary metric (TTR, MATTR or MTLD) decides the score; MATTR and
+        MTLD do not penalize longer introductions the way TTR does.
+        """
+        settings = rubric.vocabulary
+        metric = settings['metric']
+        max_vocabulary = rubric.max_scores['vocabulary']
+        words = tokenize_words(text)
+        unique_count = len(set(words))
+        ttr = round(unique_count / len(words), 3) if words else 0.0
+        
+        if metric == 'mattr':
+            value = calculate_mattr(words, settings.get('mattr_window', 50))
+        elif metric == 'mtld':
+            value = calculate_mtld(words, settings.get('mtld_threshold', 0.72))
+        else:
+            value = ttr
+        score = score_vocabulary(value, metric, settings.get('bands'))
+        if max_vocabulary != MAX_SCORES['vocabulary']:
+            score = round(score * max_vocabulary / MAX_SCORES['vocabulary'], 1)
+        
+        result = {
+            'score': score,
+            'max_score': max_vocabulary,
             'ttr': ttr,
             'total_words': len(words),
-            'unique_words': len(unique_words)
+            'unique_words': unique_count
         }
+        if metric != 'ttr':
+            result['metric'] = metric
+            result[metric] = value
+        return result
     
-    def __del__(self):
-        """Cleanup LanguageTool on deletion."""
-        if self.tool is not None:
+    def close(self):
+        """Stop the LanguageTool server (it is restarted on the next check)."""
+        with self._tool_lock:
+            tool, self.tool = self.tool, None
+        if tool is not None:
             try:
-                self.tool.close()
-            except:
-                pass
+                tool.close()
+            except Exception as e:
+                print(f"Warning: Could not stop LanguageTool: {e}")
+        lifecycle.unregister(self)
+    
+    def __del__(self):
+        """Cleanup LanguageTool on deletion (close() is the reliable path)."""
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+def split_chunks(text: str, max_chars: int) -> List[Tuple[int, str]]:
+    """
+    Split text into consecutive chunks of at most max_chars characters.
+    
+    Chunks end at sentence boundaries (after the punctuation and the
+    whitespace that follows it). A single sentence longer than max_chars
+    is split at the last whitespace before the limit, or hard at the limit
+    if it has none. Concatenating the chunks gives back the text.
+    
+    Args:
+        text: Text to split
+        max_chars: Largest chunk length
+        
+    Returns:
+        List of (start offset, chunk) tuples
+    """
+    boundaries = [m.end() for m in _SENTENCE_END.finditer(text)]
+    boundaries.append(len(text))
+    
+    chunks = []
+    start = 0
+    index = 0
+    while start < len(text):
+        limit = start + max_chars
+        # Furthest sentence boundary that keeps the chunk within the limit
+        end = start
+        while index < len(boundaries) and boundaries[index] <= limit:
+            end = boundaries[index]
+            index += 1
+        if end == start:
+            # One sentence is longer than a chunk: break it at whitespace
+            end = min(limit, len(text))
+            space = text.rfind(' ', start + 1, end)
+            if end < len(text) and space > start:
+                end = space + 1
+        chunks.append((start, text[start:end]))
+        start = end
+    return chunks
+
+
+def quick_check(text: str) -> List[QuickMatch]:
+    """
+    Find common grammar mistakes with regular expressions.
+    
+    A fast, linear-time approximation of LanguageTool for a handful of
+    frequent issues (repeated words, capitalization, a/an, basic
+    subject-verb agreement, spacing, missing final punctuation). It finds
+    fewer errors than LanguageTool.
+    
+    Args:
+        text: Text to check
+        
+    Returns:
+        Matches in text order, at most one per offset
+    """
+    found = {}
+    for pattern, message, agreement in _QUICK_RULES:
+        for match in pattern.finditer(text):
+            start = match.start(1) if pattern.groups else match.start()
+            if agreement:
+                previous = _PREVIOUS_WORD.search(text, max(0, match.start() - 20), match.start())
+                if previous and previous.group(1).lower() in _AUXILIARIES:
+                    continue
+            if start not in found:
+                length = (match.end(1) if pattern.groups else match.end()) - start
+                found[start] = QuickMatch(message, _context(text, start, length), start, length)
+    stripped = text.rstrip()
+    if stripped and stripped[-1] not in '.!?"\')':
+        end = len(stripped) - 1
+        found.setdefault(end, QuickMatch(
+            'The text does not end with punctuation', stripped[-40:], end, 1
+        ))
+    return [found[offset] for offset in sorted(found)]
+
+
+def match_length(match: Any) -> int:
+    """
+    Length of the text a match covers.
+    
+    language_tool_python 3.x names it `error_length`; 2.x used `errorLength`.
+    """
+    length = getattr(match, 'error_length', None)
+    return match.errorLength if length is None else length
+
+
+def _context(text: str, offset: int, length: int) -> str:
+    """Text around a match: CONTEXT_CHARS characters on each side of it."""
+    return text[max(0, offset - CONTEXT_CHARS):offset + length + CONTEXT_CHARS]
+
+
+def _shift_match(match: Any, shift: int, text: Optional[str] = None) -> Any:
+    """
+    Return a copy of a LanguageTool match (or QuickMatch) with its offset moved by `shift`.
+    
+    Args:
+        match: Match found in a larger (joined or chunked) text
+        shift: Amount added to the offset
+        text: Text the shifted offset refers to; when given, the context is
+            cut from it again instead of from the text that was checked
+    """
+    offset = match.offset + shift
+    if isinstance(match, QuickMatch):
+        shifted = match._replace(offset=offset)
+        if text is not None:
+            shifted = shifted._replace(context=_context(text, offset, match.error_length))
+        return shifted
+    shifted = copy.copy(match)
+    shifted.offset = offset
+    if text is not None:
+        shifted.context = _context(text, offset, match_length(match))
+        shifted.offset_in_context = offset - max(0, offset - CONTEXT_CHARS)
+    return shifted
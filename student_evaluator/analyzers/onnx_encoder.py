@@ -0,0 +1,185 @@
+"""
+Lightweight CPU sentence encoder backed by ONNX Runtime.
+
+Runs an exported (and optionally int8-quantized) MiniLM model with the
+`tokenizers` library instead of PyTorch + sentence-transformers, which
+cuts memory use and cold-start time enough to run on small hosts.
+
+Export a model once (requires torch and transformers at export time only):
+    python -m student_evaluator.analyzers.onnx_encoder \
+        --model sentence-transformers/all-MiniLM-L6-v2 \
+        --output models/all-MiniLM-L6-v2-onnx
+"""
+
+import argparse
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+from ..config import SEMANTIC_MAX_SEQ_LENGTH
+
+MODEL_FILE = 'model.onnx'
+QUANTIZED_MODEL_FILE = 'model_quantized.onnx'
+TOKENIZER_FILE = 'tokenizer.json'
+
+
+class OnnxSentenceEncoder:
+    """
+    Mean-pooled sentence encoder with the same encode() surface as
+    SentenceTransformer, so SemanticAnalyzer can use either backend.
+    """
+
+    def __init__(self, model_dir: str, max_seq_length: int = SEMANTIC_MAX_SEQ_LENGTH,
+                 num_threads: int = 1, quantized: bool = True):
+        """
+        Load an exported model directory.
+
+        Args:
+            model_dir: Directory containing model(.quantized).onnx and tokenizer.json
+            max_seq_length: Maximum word-pieces per input (longer inputs are truncated)
+            num_threads: ONNX Runtime intra-op threads
+            quantized: Prefer the int8-quantized model when present
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / QUANTIZED_MODEL_FILE
+        if not quantized or not model_path.exists():
+            model_path = model_dir / MODEL_FILE
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"No ONNX model in {model_dir}; export one with "
+                f"python -m student_evaluator.analyzers.onnx_encoder"
+            )
+
+        self.tokenizer = Tokenizer.from_file(str(model_dir / TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=max_seq_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            str(model_path), options, providers=['CPUExecutionProvider']
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.model_path = str(model_path)
+        self._dimension = None
+
+    def encode(self, sentences: List[str], batch_size: int = 32,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = True) -> np.ndarray:
+        """
+        Encode sentences into embeddings.
+
+        Args:
+            sentences: Texts to encode
+            batch_size: Inputs per inference call
+            convert_to_numpy: Accepted for SentenceTransformer compatibility
+            normalize_embeddings: L2-normalize the pooled embeddings
+
+        Returns:
+            float32 array of shape (len(sentences), dim)
+        """
+        if isinstance(sentences, str):
+            sentences = [sentences]
+
+        batches = []
+        for start in range(0, len(sentences), batch_size):
+            encodings = self.tokenizer.encode_batch(sentences[start:start + batch_size])
+            input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+            attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                'input_ids': input_ids,
+                'attention_mask': attention_mask,
+                'token_type_ids': np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+            feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+
+            token_embeddings = self.session.run(None, feeds)[0]
+
+            # Mean pooling over real (non-padding) tokens, as sentence-transformers does
+            mask = attention_mask[:, :, None].astype(np.float32)
+            pooled = (token_embeddings * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            batches.append(pooled.astype(np.float32))
+
+        if not batches:
+            return np.zeros((0, self.get_sentence_embedding_dimension()), dtype=np.float32)
+
+        embeddings = np.vstack(batches)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding dimension of the loaded model."""
+        if self._dimension is None:
+            self._dimension = int(self.encode(['dimension probe']).shape[1])
+        return self._dimension
+
+
+def export_onnx_model(model_name: str, output_dir: str, quantize: bool = True) -> str:
+    """
+    Export a Hugging Face sentence-transformers model to ONNX.
+
+    Args:
+        model_name: Hugging Face model id
+        output_dir: Directory to write model.onnx and tokenizer.json into
+        quantize: Also write a dynamically int8-quantized copy
+
+    Returns:
+        Path to the model the encoder will load
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name)
+    model.eval()
+    tokenizer.save_pretrained(str(output))
+
+    sample = tokenizer(["An example sentence"], return_tensors='pt')
+    input_names = ['input_ids', 'attention_mask', 'token_type_ids']
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    model_path = output / MODEL_FILE
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            str(model_path),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantized_path = output / QUANTIZED_MODEL_FILE
+        quantize_dynamic(str(model_path), str(quantized_path), weight_type=QuantType.QInt8)
+        return str(quantized_path)
+    return str(model_path)
+
+
+def main():
+    """Command-line interface for exporting a model."""
+    parser = argparse.ArgumentParser(description="Export a sentence encoder to ONNX")
+    parser.add_argument('--model', default='sentence-transformers/all-MiniLM-L6-v2',
+                        help='Hugging Face model id')
+    parser.add_argument('--output', required=True, help='Output directory')
+    parser.add_argument('--no-quantize', action='store_true',
+                        help='Skip writing the int8-quantized model')
+    args = parser.parse_args()
+
+    path = export_onnx_model(args.model, args.output, quantize=not args.no_quantize)
+    print(f"✅ Exported ONNX model to: {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -3,26 +3,87 @@ Enhanced Semantic Analyzer using Sentence Transformers
 Adds NLP-based semantic similarity scoring to the evaluation.
 """
 
-from typing import Dict, Any
-from sentence_transformers import SentenceTransformer, util
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional
 import numpy as np
 
+# sentence-transformers (PyTorch) is only needed for the default backend
+try:
+    from sentence_transformers import SentenceTransformer
+    SENTENCE_TRANSFORMERS_AVAILABLE = True
+except ImportError:
+    SENTENCE_TRANSFORMERS_AVAILABLE = False
 
-class SemanticAnalyzer:
+from ..config import (
+    SEMANTIC_BACKENDS,
+    SEMANTIC_ONNX_MODEL_DIR,
+    SEMANTIC_POOLING_MODES,
+    SEMANTIC_SENTENCE_MAX_WORDS,
+    SEMANTIC_SENTENCE_CACHE_SIZE
+)
+from ..utils.embedding_store import EmbeddingStore, normalize_rows
+from ..utils.keywords import split_sentences
+from ..utils.lifecycle import Closeable
+
+
+class SemanticAnalyzer(Closeable):
     """
     Analyzes semantic similarity between transcript and rubric descriptions.
     Uses sentence-transformers for embedding-based comparison.
+    
+    Transcripts are embedded sentence by sentence (all sentences in one
+    encode call), so nothing past the model's maximum sequence length is
+    dropped; sentence embeddings are kept in an LRU cache.
     """
     
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    def __init__(
+        self,
+        model_name: str = 'all-MiniLM-L6-v2',
+        backend: str = 'torch',
+        model_path: Optional[str] = None,
+        pooling: str = 'mean',
+        max_sentence_words: int = SEMANTIC_SENTENCE_MAX_WORDS,
+        cache_size: int = SEMANTIC_SENTENCE_CACHE_SIZE
+    ):
         """
         Initialize the semantic analyzer with a sentence transformer model.
         
         Args:
             model_name: Name of the sentence-transformers model to use
+            backend: 'torch' (sentence-transformers) or 'onnx' (onnxruntime, CPU only)
+            model_path: Exported model directory for the 'onnx' backend
+            pooling: 'mean' compares descriptions with the mean of the sentence
+                embeddings; 'max' uses each description's best-matching sentence
+            max_sentence_words: Longer sentences are split into windows of this many words
+            cache_size: Sentence embeddings kept in the LRU cache
         """
-        print(f"Loading semantic model: {model_name}...")
-        self.model = SentenceTransformer(model_name)
+        if backend not in SEMANTIC_BACKENDS:
+            raise ValueError(f"Unknown semantic backend '{backend}', expected one of {SEMANTIC_BACKENDS}")
+        if pooling not in SEMANTIC_POOLING_MODES:
+            raise ValueError(f"Unknown pooling '{pooling}', expected one of {SEMANTIC_POOLING_MODES}")
+        self.backend = backend
+        self.pooling = pooling
+        self.max_sentence_words = max(1, max_sentence_words)
+        
+        # Normalized sentence -> embedding; boilerplate sentences ("Thank you
+        # for listening.") repeat across transcripts
+        self.cache_size = cache_size
+        self._sentence_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._cache_hits = 0
+        self._cache_misses = 0
+        
+        if backend == 'onnx':
+            from .onnx_encoder import OnnxSentenceEncoder
+            model_path = model_path or SEMANTIC_ONNX_MODEL_DIR
+            print(f"Loading ONNX semantic model from: {model_path}...")
+            self.model = OnnxSentenceEncoder(model_path)
+        else:
+            if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                raise ImportError("sentence-transformers is required for the 'torch' backend")
+            print(f"Loading semantic model: {model_name}...")
+            self.model = SentenceTransformer(model_name)
         print("Semantic model loaded successfully!")
         
         # Define ideal descriptions for each criterion
@@ -50,6 +111,145 @@ class SemanticAnalyzer:
                 "Expresses excitement and genuine interest"
             ]
         }
+        
+        # Optional MicroBatcher that coalesces concurrent encode calls
+        self.batcher = None
+        
+        # Rubric descriptions never change, so encode them once up front
+        self.criterion_embeddings = {
+            criterion: self.encode(descriptions)
+            for criterion, descriptions in self.criterion_descriptions.items()
+        }
+    
+    def close(self):
+        """Release the model and cached sentence embeddings (the analyzer cannot encode afterwards)."""
+        self.model = None
+        with self._cache_lock:
+            self._sentence_cache.clear()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return sentence embedding cache counters."""
+        with self._cache_lock:
+            lookups = self._cache_hits + self._cache_misses
+            return {
+                'hits': self._cache_hits,
+                'misses': self._cache_misses,
+                'size': len(self._sentence_cache),
+                'max_size': self.cache_size,
+                'hit_rate': round(self._cache_hits / lookups, 3) if lookups else 0.0
+            }
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode texts into L2-normalized float32 embeddings.
+        
+        Args:
+            texts: List of texts to encode
+            
+        Returns:
+            Array of shape (len(texts), dim); dot products are cosine similarities
+        """
+        embeddings = self.model.encode(
+            list(texts),
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return np.asarray(embeddings, dtype=np.float32)
+    
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        """Encode texts, through the micro-batcher when one is attached."""
+        if self.batcher is None:
+            return self.encode(texts)
+        futures = [self.batcher.submit(text) for text in texts]
+        return np.vstack([future.result() for future in futures])
+    
+    def encode_batch(self, texts: List[str]) -> List[np.ndarray]:
+        """Batch function for a MicroBatcher: one embedding row per text."""
+        return list(self.encode(texts))
+    
+    def split_transcript(self, transcript: str) -> List[str]:
+        """
+        Split a transcript into the units that are embedded.
+        
+        Args:
+            transcript: Transcript text
+            
+        Returns:
+            Sentences, with sentences longer than max_sentence_words split
+            into word windows (at least one unit, even for empty text)
+        """
+        units = []
+        for sentence in split_sentences(transcript):
+            words = sentence.split()
+            for start in range(0, len(words), self.max_sentence_words):
+                units.append(' '.join(words[start:start + self.max_sentence_words]))
+        return units or [transcript.strip()]
+    
+    def embed_sentences(self, sentences: List[str]) -> np.ndarray:
+        """
+        Embed sentences through the LRU cache; all misses are encoded in one call.
+        
+        Sentences are cached by their lowercased, whitespace-collapsed form
+        (the default model is uncased, so this does not change embeddings).
+        
+        Args:
+            sentences: Sentences to embed
+            
+        Returns:
+            Array of shape (len(sentences), dim)
+        """
+        keys = [' '.join(sentence.lower().split()) for sentence in sentences]
+        found = {}
+        with self._cache_lock:
+            for key in dict.fromkeys(keys):
+                embedding = self._sentence_cache.get(key)
+                if embedding is not None:
+                    self._sentence_cache.move_to_end(key)
+                    found[key] = embedding
+            self._cache_hits += len(found)
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            self._cache_misses += len(missing)
+        
+        if missing:
+            embeddings = self._embed(missing)
+            found.update(zip(missing, embeddings))
+            with self._cache_lock:
+                for key, embedding in zip(missing, embeddings):
+                    self._sentence_cache[key] = embedding
+                    self._sentence_cache.move_to_end(key)
+                while len(self._sentence_cache) > self.cache_size:
+                    self._sentence_cache.popitem(last=False)
+        
+        return np.vstack([found[key] for key in keys])
+    
+    def embed_transcripts(self, transcripts: List[str]) -> List[np.ndarray]:
+        """
+        Sentence embeddings of several transcripts, encoded together.
+        
+        Args:
+            transcripts: Transcript texts
+            
+        Returns:
+            One (sentences, dim) array per transcript
+        """
+        units = [self.split_transcript(transcript) for transcript in transcripts]
+        embeddings = self.embed_sentences([unit for parts in units for unit in parts])
+        bounds = np.cumsum([0] + [len(parts) for parts in units])
+        return [embeddings[bounds[i]:bounds[i + 1]] for i in range(len(units))]
+    
+    def _similarities(self, targets: np.ndarray, sentence_embeddings: np.ndarray) -> np.ndarray:
+        """Pooled cosine similarity of each target row to a transcript's sentences."""
+        if self.pooling == 'max':
+            return (targets @ sentence_embeddings.T).max(axis=1)
+        return targets @ pool_mean(sentence_embeddings)
+    
+    def _similarity_scores(self, similarities: np.ndarray) -> Dict[str, Any]:
+        """Summarize one transcript's similarities to each criterion's descriptions."""
+        return {
+            'max_similarity': round(float(similarities.max()), 3),
+            'avg_similarity': round(float(similarities.mean()), 3),
+            'all_similarities': [round(float(s), 3) for s in similarities]
+        }
     
     def analyze_content_semantics(self, transcript: str) -> Dict[str, Any]:
         """
@@ -61,30 +261,74 @@ class SemanticAnalyzer:
         Returns:
             Dictionary with semantic similarity scores
         """
-        transcript_embedding = self.model.encode(transcript, convert_to_tensor=True)
+        sentence_embeddings = self.embed_transcripts([transcript])[0]
         
         scores = {}
-        for criterion, descriptions in self.criterion_descriptions.items():
-            # Get embeddings for all ideal descriptions
-            desc_embeddings = self.model.encode(descriptions, convert_to_tensor=True)
-            
-            # Calculate cosine similarity
-            similarities = util.cos_sim(transcript_embedding, desc_embeddings)
-            
-            # Take maximum similarity across all descriptions
-            max_similarity = float(similarities.max())
-            
-            # Average similarity across all descriptions
-            avg_similarity = float(similarities.mean())
-            
-            scores[criterion] = {
-                'max_similarity': round(max_similarity, 3),
-                'avg_similarity': round(avg_similarity, 3),
-                'all_similarities': [round(float(s), 3) for s in similarities[0]]
-            }
+        for criterion, desc_embeddings in self.criterion_embeddings.items():
+            # Cosine similarity against every ideal description
+            similarities = self._similarities(desc_embeddings, sentence_embeddings)
+            scores[criterion] = self._similarity_scores(similarities)
         
         return scores
     
+    def add_to_store(self, store: EmbeddingStore, ids: List[str], transcripts: List[str]):
+        """
+        Encode transcripts in one batch and persist them in an embedding store.
+        
+        Each transcript is stored as the normalized mean of its sentence
+        embeddings, so score_store matches 'mean' pooling.
+        
+        Args:
+            store: Target embedding store (created with dim=self.dimension)
+            ids: Identifier for each transcript
+            transcripts: Transcript texts
+        """
+        pooled = [pool_mean(embeddings) for embeddings in self.embed_transcripts(transcripts)]
+        store.add(ids, np.vstack(pooled))
+    
+    def score_store(
+        self,
+        store: EmbeddingStore,
+        batch_size: int = 8192,
+        ids: Optional[List[str]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Score stored transcript embeddings against the rubric without re-encoding.
+        
+        All rubric descriptions are stacked into one matrix, so each batch of
+        stored rows costs a single matrix multiply.
+        
+        Args:
+            store: Embedding store to score (may be opened read-only)
+            batch_size: Stored rows per matrix multiply
+            ids: Optional subset of ids to return (defaults to all)
+            
+        Returns:
+            Mapping of id to the same per-criterion structure as
+            analyze_content_semantics
+        """
+        criteria = list(self.criterion_embeddings)
+        stacked = normalize_rows(np.vstack([self.criterion_embeddings[c] for c in criteria]))
+        bounds = np.cumsum([0] + [len(self.criterion_embeddings[c]) for c in criteria])
+        
+        similarities = store.similarities(stacked, batch_size=batch_size)
+        wanted = None if ids is None else set(ids)
+        
+        results = {}
+        for row, item_id in zip(similarities, store.ids):
+            if wanted is not None and item_id not in wanted:
+                continue
+            results[item_id] = {
+                criterion: self._similarity_scores(row[bounds[i]:bounds[i + 1]])
+                for i, criterion in enumerate(criteria)
+            }
+        return results
+    
+    @property
+    def dimension(self) -> int:
+        """Embedding dimension of the loaded model."""
+        return self.model.get_sentence_embedding_dimension()
+    
     def analyze_keyword_semantics(self, transcript: str, keywords: list) -> Dict[str, Any]:
         """
         Analyze semantic similarity between transcript and specific keywords.
@@ -99,17 +343,17 @@ class SemanticAnalyzer:
         if not keywords:
             return {'semantic_match_score': 0.0, 'details': []}
         
-        transcript_embedding = self.model.encode(transcript, convert_to_tensor=True)
-        keyword_embeddings = self.model.encode(keywords, convert_to_tensor=True)
+        sentence_embeddings = self.embed_transcripts([transcript])[0]
+        keyword_embeddings = self._embed(list(keywords))
         
         # Calculate similarities
-        similarities = util.cos_sim(transcript_embedding, keyword_embeddings)
+        similarities = self._similarities(keyword_embeddings, sentence_embeddings)
         
         details = []
         for i, keyword in enumerate(keywords):
             details.append({
                 'keyword': keyword,
-                'similarity': round(float(similarities[0][i]), 3)
+                'similarity': round(float(similarities[i]), 3)
             })
         
         # Average similarity as overall score
@@ -124,7 +368,8 @@ class SemanticAnalyzer:
         self, 
         rule_based_score: int, 
         transcript: str, 
-        max_score: int = 40
+        max_score: int = 40,
+        semantic_results: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Enhance content score by combining rule-based and semantic approaches.
@@ -133,11 +378,13 @@ class SemanticAnalyzer:
             rule_based_score: Score from rule-based keyword matching
             transcript: The transcript text
             max_score: Maximum possible score
+            semantic_results: Precomputed analyze_content_semantics output
             
         Returns:
             Enhanced score with semantic analysis
         """
-        semantic_results = self.analyze_content_semantics(transcript)
+        if semantic_results is None:
+            semantic_results = self.analyze_content_semantics(transcript)
         
         # Get content semantic similarity
         content_sim = semantic_results['content']['avg_similarity']
@@ -160,7 +407,8 @@ class SemanticAnalyzer:
         self,
         sentiment_score: int,
         transcript: str,
-        max_score: int = 15
+        max_score: int = 15,
+        semantic_results: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
         """
         Enhance engagement score with semantic similarity to positive expressions.
@@ -169,11 +417,13 @@ class SemanticAnalyzer:
             sentiment_score: Score from VADER sentiment
             transcript: The transcript text
             max_score: Maximum possible score
+            semantic_results: Precomputed analyze_content_semantics output
             
         Returns:
             Enhanced engagement score
         """
-        semantic_results = self.analyze_content_semantics(transcript)
+        if semantic_results is None:
+            semantic_results = self.analyze_content_semantics(transcript)
         engagement_sim = semantic_results['engagement']['avg_similarity']
         
         # Combine sentiment (60%) and semantic (40%)
@@ -189,3 +439,10 @@ class SemanticAnalyzer:
             'semantic_similarity': engagement_sim,
             'method': 'Sentiment (60%) + Semantic (40%)'
         }
+
+
+def pool_mean(sentence_embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalized mean of normalized sentence embeddings (one transcript vector)."""
+    mean = sentence_embeddings.mean(axis=0)
+    norm = np.linalg.norm(mean)
+    return (mean / norm if norm > 0 else mean).astype(np.float32)
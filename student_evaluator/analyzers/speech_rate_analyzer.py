@@ -1,33 +1,58 @@
 """Speech Rate Analyzer - 10 points total."""
 
-from typing import Dict, Any
-from ..config import SPEECH_RATE_RANGES, MAX_SCORES
+from collections import Counter
+from typing import Dict, Any, Optional
+import numpy as np
+from ..config import (
+    PACE_WINDOW_SECONDS,
+    PACE_STEP_SECONDS,
+    PACE_TIMELINE_MAX_POINTS,
+    PAUSE_MIN_SECONDS,
+    LONG_PAUSE_SECONDS
+)
+from ..rubric import RubricIndex, default_rubric
 from ..utils.scorer import score_from_range
 from ..utils.keywords import tokenize_words
+from ..utils.pace import parse_word_timestamps, rolling_wpm, detect_pauses, classify_bands
 
 
 class SpeechRateAnalyzer:
     """Analyzes speech rate (words per minute)."""
     
-    def __init__(self):
-        self.max_score = MAX_SCORES['speech_rate']
+    def __init__(self, rubric: Optional[RubricIndex] = None):
+        self.rubric = rubric or default_rubric()
+        self.max_score = self.rubric.max_scores['speech_rate']
     
-    def analyze(self, text: str, duration_seconds: int) -> Dict[str, Any]:
+    def analyze(self, text: str, duration_seconds: int,
+                rubric: Optional[RubricIndex] = None,
+                word_timestamps: Any = None) -> Dict[str, Any]:
         """
         Analyze speech rate.
         
         Args:
             text: Transcript text
             duration_seconds: Duration of speech in seconds
+            rubric: Rubric to score against (defaults to the analyzer's rubric)
+            word_timestamps: Optional word timings, as a (starts, ends) pair of
+                arrays or anything parse_word_timestamps accepts; adds a
+                'pace' section (rolling WPM timeline and pauses)
             
         Returns:
             Dictionary with WPM and score
         """
+        rubric = rubric or self.rubric
+        max_score = rubric.max_scores['speech_rate']
+        
+        if word_timestamps is not None:
+            starts, ends = parse_word_timestamps(word_timestamps)
+            if duration_seconds <= 0 and len(ends):
+                duration_seconds = float(ends.max())
+        
         if duration_seconds <= 0:
             return {
                 'wpm': 0,
                 'score': 0,
-                'max_score': self.max_score,
+                'max_score': max_score,
                 'label': 'Invalid duration',
                 'error': 'Duration must be greater than 0'
             }
@@ -40,13 +65,70 @@ class SpeechRateAnalyzer:
         wpm = round(wpm, 1)
         
         # Get score from ranges
-        result = score_from_range(wpm, SPEECH_RATE_RANGES)
+        result = score_from_range(wpm, rubric.speech_rate_ranges)
         
-        return {
+        results = {
             'wpm': wpm,
             'word_count': word_count,
             'duration_seconds': duration_seconds,
             'score': result['score'],
-            'max_score': self.max_score,
+            'max_score': max_score,
             'label': result['label']
         }
+        
+        if word_timestamps is not None:
+            results['pace'] = self._analyze_pace(starts, ends, duration_seconds, rubric)
+        
+        return results
+    
+    def _analyze_pace(self, starts: np.ndarray, ends: np.ndarray,
+                      duration_seconds: float, rubric: RubricIndex) -> Dict[str, Any]:
+        """
+        Analyze pace over time from word timestamps.
+        
+        Args:
+            starts: Sorted word start times in seconds
+            ends: Matching word end times
+            duration_seconds: Recording length
+            rubric: Rubric whose speech rate bands label each window
+            
+        Returns:
+            Dictionary with rolling WPM statistics, time share per band,
+            pause statistics and the pace timeline
+        """
+        duration = max(float(duration_seconds), float(ends.max()) if len(ends) else 0.0)
+        # Coarser steps for long recordings keep the timeline bounded
+        step = max(PACE_STEP_SECONDS, duration / PACE_TIMELINE_MAX_POINTS)
+        window = max(1, round(PACE_WINDOW_SECONDS / step)) * step
+        times, wpm = rolling_wpm(starts, duration, window, step)
+        wpm = np.round(wpm, 1)
+        labels = classify_bands(wpm, rubric.speech_rate_ranges)
+        
+        band_counts = Counter(labels)
+        mean = float(wpm.mean())
+        std = float(wpm.std())
+        
+        pauses = detect_pauses(starts, ends, PAUSE_MIN_SECONDS)
+        gaps = pauses.pop('gaps')
+        pauses.pop('positions')
+        pauses['long_pauses'] = int((gaps >= LONG_PAUSE_SECONDS).sum())
+        
+        return {
+            'window_seconds': round(window, 2),
+            'step_seconds': round(step, 2),
+            'timestamped_words': int(len(starts)),
+            'wpm_mean': round(mean, 1),
+            'wpm_std': round(std, 1),
+            'wpm_min': float(wpm.min()),
+            'wpm_max': float(wpm.max()),
+            # Coefficient of variation: 0 for a perfectly steady pace
+            'wpm_variation': round(std / mean, 3) if mean else 0.0,
+            'band_share': {
+                label: round(count / len(labels), 3) for label, count in band_counts.items()
+            },
+            'pauses': pauses,
+            'timeline': [
+                {'time': round(t, 2), 'wpm': w, 'label': label}
+                for t, w, label in zip(times.tolist(), wpm.tolist(), labels)
+            ]
+        }
@@ -78,6 +78,8 @@ SPEECH_RATE_RANGES = [
 MAX_SCORES = {
     'salutation': 5,
     'keywords': 30,
+    'must_have': 20,
+    'good_to_have': 10,
     'flow': 5,
     'content_total': 40,
     'speech_rate': 10,
@@ -89,5 +91,198 @@ MAX_SCORES = {
     'total': 100
 }
 
+# Vocabulary richness metric: 'ttr' (unique/total, falls with length),
+# 'mattr' (mean TTR over a sliding window) or 'mtld' (mean length of
+# word runs that keep TTR above a threshold); selectable per rubric
+VOCABULARY_METRICS = ('ttr', 'mattr', 'mtld')
+VOCABULARY = {
+    'metric': 'ttr',
+    'mattr_window': 50,
+    'mtld_threshold': 0.72
+}
+
+# Vocabulary score bands per metric: first band whose 'min' the value reaches
+VOCABULARY_BANDS = {
+    'ttr': [
+        {'min': 0.9, 'score': 10}, {'min': 0.7, 'score': 8}, {'min': 0.5, 'score': 6},
+        {'min': 0.3, 'score': 4}, {'min': 0, 'score': 2}
+    ],
+    'mattr': [
+        {'min': 0.85, 'score': 10}, {'min': 0.75, 'score': 8}, {'min': 0.65, 'score': 6},
+        {'min': 0.55, 'score': 4}, {'min': 0, 'score': 2}
+    ],
+    'mtld': [
+        {'min': 100, 'score': 10}, {'min': 80, 'score': 8}, {'min': 60, 'score': 6},
+        {'min': 40, 'score': 4}, {'min': 0, 'score': 2}
+    ]
+}
+
 # Closing phrases
 CLOSING_PHRASES = [r'\bthank\s+you\b', r'\bthanks\b', r'\bthank\s+you\s+for\s+listening\b']
+
+# Near-duplicate submission detection (MinHash + LSH)
+DUPLICATE_SHINGLE_SIZE = 3
+DUPLICATE_NUM_PERM = 64
+DUPLICATE_THRESHOLD = 0.8
+
+# Semantic analysis backends ('torch' uses sentence-transformers, 'onnx' uses onnxruntime)
+SEMANTIC_BACKENDS = ('torch', 'onnx')
+SEMANTIC_ONNX_MODEL_DIR = 'models/all-MiniLM-L6-v2-onnx'
+SEMANTIC_MAX_SEQ_LENGTH = 256
+
+# Semantic similarity is computed per sentence, so long transcripts are not
+# truncated at the model's maximum sequence length. Sentences longer than
+# SEMANTIC_SENTENCE_MAX_WORDS are split into word windows. 'mean' pools the
+# sentence embeddings into one transcript embedding; 'max' takes each
+# description's best-matching sentence.
+SEMANTIC_POOLING_MODES = ('mean', 'max')
+SEMANTIC_SENTENCE_MAX_WORDS = 128
+SEMANTIC_SENTENCE_CACHE_SIZE = 10000
+
+# Embedding-based rubric category detection (complements the keyword regexes).
+# Each transcript sentence is compared with these exemplar phrases; a
+# category counts as present when its best exemplar similarity reaches
+# CATEGORY_MATCH_THRESHOLD. Keys match the rubric keyword names.
+CATEGORY_EXEMPLARS = {
+    'name': ["my name is Asha", "I am called Rahul", "people call me Riya", "this is Arjun speaking"],
+    'age': ["I am thirteen years old", "I turned twelve this year", "my age is fourteen"],
+    'school_class': [
+        "I study in class eight", "I'm in eighth standard", "I am a student of grade seven",
+        "I go to Delhi Public School", "my school is near my house"
+    ],
+    'family': [
+        "my mom and dad", "I live with my parents", "my mother is a teacher and my father is a doctor",
+        "I have an elder brother and a younger sister", "there are four people in my family"
+    ],
+    'hobbies': [
+        "in my free time I play cricket", "I love reading story books", "my hobby is painting",
+        "I enjoy dancing and singing", "I am interested in playing the guitar"
+    ],
+    'about_family': ["my family is very caring and supportive", "what makes my family special is that we laugh a lot"],
+    'origin': ["I am from Jaipur", "I live in a small village near Pune", "my hometown is Chennai"],
+    'ambition': ["I want to become a doctor when I grow up", "my dream is to be an astronaut", "in the future I hope to be an engineer"],
+    'fun_fact': ["a fun fact about me is that I can solve a Rubik's cube", "something unusual about me is that I have two pet turtles"],
+    'strengths': ["I am good at mathematics", "I won a medal in the science olympiad", "my strength is that I never give up"]
+}
+CATEGORY_MATCH_THRESHOLD = 0.6
+
+# Grammar checking of long transcripts: texts longer than GRAMMAR_CHUNK_CHARS
+# are split at sentence boundaries and the chunks of each text checked on up
+# to GRAMMAR_MAX_WORKERS threads (fewer when the grammar scheduler is busy)
+GRAMMAR_CHUNK_CHARS = 2000
+GRAMMAR_MAX_WORKERS = 4
+
+# Micro-batching of concurrent grammar/semantic calls
+MICRO_BATCH_MAX_SIZE = 16
+MICRO_BATCH_MAX_WAIT_MS = 5
+
+# Web admission control
+ADMISSION_MAX_TRANSCRIPT_BYTES = 20000
+ADMISSION_MAX_TRANSCRIPT_WORDS = 3000
+ADMISSION_RATE_PER_SECOND = 0.5
+ADMISSION_BURST = 10
+ADMISSION_MAX_CONCURRENT = 4
+ADMISSION_QUEUE_TIMEOUT_SECONDS = 1.0
+ADMISSION_MAX_TRACKED_CLIENTS = 10000
+# Per priority class overrides of the slot limits above. max_concurrent caps
+# the slots a class may hold out of ADMISSION_MAX_CONCURRENT (None: no cap
+# of its own), so batch requests always leave slots free for interactive
+# ones; batch clients also wait longer for a slot instead of getting 429
+# after 1 s. The per-client rate limit is shared by all classes. The servers
+# admit 'batch' only with the BATCH_TOKEN secret (see service.authorize_priority).
+ADMISSION_CLASSES = {
+    'interactive': {},
+    'batch': {'max_concurrent': 2, 'queue_timeout': 30.0}
+}
+# Reverse proxies in front of the app that append to X-Forwarded-For. The
+# client is the right-most address they did not add; with 0 the header is
+# ignored (clients can write anything into it)
+ADMISSION_TRUSTED_PROXIES = 0
+
+# Async evaluation: threads available for concurrent LanguageTool calls
+ASYNC_IO_WORKERS = 64
+
+# Per-request time budgets (the request's "time_budget" field); slow stages
+# are degraded to their fallbacks to stay within the budget
+MAX_TIME_BUDGET_SECONDS = 60
+
+# Priority scheduling of the shared backends (utils/scheduler.py). Waiting
+# interactive requests always go before queued batch work (lower level
+# first); classes on the same level share slots by weight. Batch work may
+# hold at most max_concurrent slots, leaving the rest for interactive use.
+SCHEDULER_CLASSES = {
+    'interactive': {'level': 0, 'weight': 1.0, 'max_concurrent': None},
+    'batch': {'level': 1, 'weight': 1.0, 'max_concurrent': 2}
+}
+SCHEDULER_DEFAULT_PRIORITY = 'interactive'
+# Concurrent calls allowed per backend
+SCHEDULER_CAPACITY = {'grammar': 4, 'semantic': 2}
+
+# Rubric files (JSON/YAML) are checked for changes at most this often
+RUBRIC_RELOAD_INTERVAL_SECONDS = 5
+
+# Per-tenant rubrics: compiled rubrics kept in memory (least recently used are evicted)
+RUBRIC_CACHE_SIZE = 64
+
+# Longest rubric regex / phrase accepted when a rubric is compiled
+RUBRIC_MAX_PATTERN_LENGTH = 200
+
+# Per-request input limits, enforced by the evaluator itself (web admission
+# control rejects larger bodies earlier). Whitespace runs longer than
+# MAX_WHITESPACE_RUN characters are collapsed before analysis.
+MAX_TRANSCRIPT_CHARS = 50000
+MAX_TOKEN_CHARS = 200
+MAX_WHITESPACE_RUN = 10
+
+# Audio ingestion: chunked energy-based voice activity detection
+AUDIO_CHUNK_SECONDS = 10
+VAD_FRAME_MS = 30
+VAD_ENERGY_THRESHOLD_DB = -40
+VAD_MIN_SILENCE_MS = 300
+
+# Pace over time (when word-level timestamps are available)
+PACE_WINDOW_SECONDS = 10
+PACE_STEP_SECONDS = 2
+PACE_TIMELINE_MAX_POINTS = 600
+PAUSE_MIN_SECONDS = 0.5
+LONG_PAUSE_SECONDS = 2.0
+
+# Engagement: 'document' scores the whole transcript at once, 'sentence'
+# scores (and caches) each sentence and adds an engagement curve
+ENGAGEMENT_MODES = ('document', 'sentence')
+ENGAGEMENT_SENTENCE_CACHE_SIZE = 10000
+# VADER's cost grows quadratically with text length, so 'document' mode
+# scores longer transcripts, and 'sentence' mode longer sentences, in windows
+# of this many words
+ENGAGEMENT_DOCUMENT_CHUNK_WORDS = 1000
+# Only sentences up to this many characters are cached; longer ones are
+# unlikely to repeat and would pin large keys in the cache
+ENGAGEMENT_SENTENCE_CACHE_MAX_CHARS = 500
+
+# Memory sampling for long-running workers (see utils/memory.py)
+MEMORY_SAMPLE_EVERY = 100
+MEMORY_SAMPLE_HISTORY = 100
+MEMORY_TOP_ALLOCATIONS = 10
+
+# On-demand profiling of single evaluations (see utils/profiling.py)
+PROFILE_DIR = 'profiles'
+PROFILE_MODES = ('cprofile', 'sampling')
+PROFILE_SAMPLING_INTERVAL_MS = 5
+PROFILE_MAX_FILES = 200
+PROFILE_TOP_FUNCTIONS = 15
+
+# Cohort analytics (see analytics.py): quantile sketch accuracy (rank error
+# about 1/k) and the number of cohorts kept per process
+ANALYTICS_SKETCH_K = 200
+ANALYTICS_MAX_COHORTS = 2000
+
+# Evaluation store (see store.py): rows buffered per SQLite transaction
+STORE_BATCH_SIZE = 500
+
+# Distributed batch grading (see distributed.py): manifest items per lease,
+# seconds before an unrenewed lease is re-issued, and claims per shard
+# before it is marked failed
+DISTRIBUTED_SHARD_SIZE = 50
+DISTRIBUTED_LEASE_SECONDS = 300
+DISTRIBUTED_MAX_ATTEMPTS = 3
+DISTRIBUTED_PORT = 8765
@@ -0,0 +1,787 @@
+"""
+Multi-node batch grading: a lease coordinator and pull-based workers.
+
+The coordinator splits a manifest (JSON lines, one transcript or recording
+per line) into shards of DISTRIBUTED_SHARD_SIZE items kept in a SQLite
+file. Workers on any node claim a shard (a lease), evaluate its items with
+their own StudentEvaluator and commit the results:
+
+- A lease expires after DISTRIBUTED_LEASE_SECONDS unless renewed. Workers
+  renew between items, so the shard of a crashed or stalled worker is
+  re-issued to the next idle one; a shard claimed DISTRIBUTED_MAX_ATTEMPTS
+  times without completing is marked failed.
+- Every claim increments the shard's fencing token, and results are keyed
+  by manifest item and inserted at most once. A late commit from a worker
+  whose lease was re-issued is therefore harmless: commits are idempotent.
+- Idle workers pull the next pending or expired shard, so faster nodes
+  take more shards and throughput grows with the number of workers until
+  the store saturates (a few short transactions per shard).
+
+Workers reach the store directly (the SQLite file on a shared disk) or
+through `serve()`, a JSON-lines TCP front end for the same store, via
+`RemoteLeaseStore` (for nodes without a shared filesystem, or for testing
+on localhost). The TCP protocol has no authentication; only bind it to a
+trusted network.
+
+Manifest lines:
+    {"id": "s-001", "transcript": "...", "duration_seconds": 52}
+    {"id": "s-002", "transcript_path": "/shared/t/s-002.txt", "duration_seconds": 48}
+    {"id": "s-003", "audio": "/shared/rec/s-003.wav"}
+optionally with "rubric" (tenant name) and "student_id", "school",
+"class_name", "term" (used by `export --store`).
+
+Usage:
+    python -m student_evaluator.distributed init jobs.db manifest.jsonl
+    python -m student_evaluator.distributed work jobs.db --processes 4
+    python -m student_evaluator.distributed serve jobs.db --host 0.0.0.0
+    python -m student_evaluator.distributed work tcp://coordinator:8765 --processes 4
+    python -m student_evaluator.distributed status jobs.db
+    python -m student_evaluator.distributed export jobs.db results.jsonl [--store evaluations.db]
+    python -m student_evaluator.distributed text-stats manifest.jsonl stats.jsonl [--corpus cohort_2024]
+"""
+
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import socket
+import socketserver
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+from .config import (
+    DISTRIBUTED_SHARD_SIZE,
+    DISTRIBUTED_LEASE_SECONDS,
+    DISTRIBUTED_MAX_ATTEMPTS,
+    DISTRIBUTED_PORT
+)
+from .utils.lifecycle import Closeable
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id INTEGER PRIMARY KEY,
+    item_key TEXT NOT NULL UNIQUE,
+    shard INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_items_shard ON items (shard);
+
+CREATE TABLE IF NOT EXISTS shards (
+    shard INTEGER PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    token INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    expires_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_shards_state ON shards (state, expires_at);
+
+CREATE TABLE IF NOT EXISTS results (
+    item_key TEXT PRIMARY KEY,
+    shard INTEGER NOT NULL,
+    worker TEXT,
+    committed_at REAL NOT NULL,
+    error TEXT,
+    result TEXT
+);
+"""
+
+# Shard states
+PENDING, LEASED, DONE, FAILED = 'pending', 'leased', 'done', 'failed'
+
+# Store methods callable over the TCP protocol
+REMOTE_METHODS = ('claim', 'heartbeat', 'commit', 'release', 'status', 'done')
+
+
+class LeaseStore(Closeable):
+    """
+    Manifest shards, leases and results in one SQLite file.
+
+    Thread-safe. Uses SQLite's rollback journal rather than WAL, because
+    WAL's shared-memory index does not work across hosts on a network
+    filesystem.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: float = DISTRIBUTED_LEASE_SECONDS,
+        max_attempts: int = DISTRIBUTED_MAX_ATTEMPTS
+    ):
+        """
+        Args:
+            path: SQLite file (created if missing)
+            lease_seconds: Lifetime of a lease unless renewed
+            max_attempts: Claims per shard before it is marked failed
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._conn
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def add_manifest(self, items: Iterable[Dict[str, Any]],
+                     shard_size: int = DISTRIBUTED_SHARD_SIZE) -> Tuple[int, int]:
+        """
+        Add manifest items, split into new shards.
+
+        Items whose id is already in the store are skipped, so re-running
+        with the same (or an extended) manifest only adds what is new.
+
+        Args:
+            items: Manifest entries, each with a unique 'id'
+            shard_size: Items per shard
+
+        Returns:
+            Tuple of (items added, shards created)
+        """
+        added = shards = 0
+        batch = []
+        for item in items:
+            if 'id' not in item:
+                raise ValueError(f"Manifest item without an 'id': {item}")
+            batch.append(item)
+            if len(batch) >= shard_size:
+                count = self._add_shard(batch)
+                added, shards, batch = added + count, shards + bool(count), []
+        if batch:
+            count = self._add_shard(batch)
+            added, shards = added + count, shards + bool(count)
+        return added, shards
+
+    def _add_shard(self, batch: List[Dict[str, Any]]) -> int:
+        with self._transaction() as conn:
+            shard = conn.execute('SELECT COALESCE(MAX(shard), 0) + 1 FROM shards').fetchone()[0]
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO items (item_key, shard, payload) VALUES (?, ?, ?)',
+                [(str(item['id']), shard, json.dumps(item, separators=(',', ':'))) for item in batch]
+            )
+            added = conn.total_changes - before
+            if added:
+                conn.execute('INSERT INTO shards (shard) VALUES (?)', (shard,))
+        return added
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        """
+        Lease the next pending shard, or an expired lease of another worker.
+
+        Args:
+            worker: Identifier of the claiming worker
+
+        Returns:
+            Lease dict (shard, token, lease_seconds, items not yet
+            committed), or None if no shard is available right now
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            while True:
+                row = conn.execute(
+                    "SELECT shard, attempts FROM shards "
+                    "WHERE state = ? OR (state = ? AND expires_at < ?) "
+                    "ORDER BY state = ?, shard LIMIT 1",
+                    (PENDING, LEASED, now, LEASED)
+                ).fetchone()
+                if row is None:
+                    return None
+                if row['attempts'] >= self.max_attempts:
+                    conn.execute('UPDATE shards SET state = ?, worker = NULL WHERE shard = ?',
+                                 (FAILED, row['shard']))
+                    continue
+                conn.execute(
+                    'UPDATE shards SET state = ?, token = token + 1, worker = ?, expires_at = ?, '
+                    'attempts = attempts + 1 WHERE shard = ?',
+                    (LEASED, worker, now + self.lease_seconds, row['shard'])
+                )
+                token = conn.execute('SELECT token FROM shards WHERE shard = ?',
+                                     (row['shard'],)).fetchone()[0]
+                items = conn.execute(
+                    'SELECT i.item_key, i.payload FROM items i '
+                    'LEFT JOIN results r ON r.item_key = i.item_key '
+                    'WHERE i.shard = ? AND r.item_key IS NULL ORDER BY i.id',
+                    (row['shard'],)
+                ).fetchall()
+                return {
+                    'shard': row['shard'],
+                    'token': token,
+                    'lease_seconds': self.lease_seconds,
+                    'items': [json.loads(item['payload']) for item in items]
+                }
+
+    def heartbeat(self, shard: int, token: int) -> bool:
+        """
+        Renew a lease.
+
+        Returns:
+            False if the lease expired and was re-issued to another worker
+        """
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE shards SET expires_at = ? WHERE shard = ? AND token = ? AND state = ?',
+                (time.time() + self.lease_seconds, shard, token, LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def commit(self, shard: int, token: int, results: List[Dict[str, Any]],
+               worker: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Store results for a shard's items (idempotent).
+
+        Results for items that already have one are ignored, so commits
+        may be retried and stale workers cannot overwrite results. The
+        shard is marked done once every item has a result, whichever lease
+        the results came from.
+
+        Args:
+            shard: Shard of the lease
+            token: Fencing token of the lease
+            results: Dicts with 'id' and either 'result' or 'error'
+            worker: Committing worker
+
+        Returns:
+            Dictionary with accepted and duplicate counts, whether the shard
+            is done and whether the lease was stale
+        """
+        now = time.time()
+        rows = [
+            (str(r['id']), shard, worker, now, r.get('error'),
+             json.dumps(r['result'], separators=(',', ':')) if r.get('result') is not None else None)
+            for r in results
+        ]
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO results (item_key, shard, worker, committed_at, error, result) '
+                'VALUES (?, ?, ?, ?, ?, ?)', rows
+            )
+            accepted = conn.total_changes - before
+            remaining = conn.execute(
+                'SELECT COUNT(*) FROM items i LEFT JOIN results r ON r.item_key = i.item_key '
+                'WHERE i.shard = ? AND r.item_key IS NULL', (shard,)
+            ).fetchone()[0]
+            current = conn.execute('SELECT token, state FROM shards WHERE shard = ?', (shard,)).fetchone()
+            done = remaining == 0
+            if done and current['state'] != DONE:
+                conn.execute('UPDATE shards SET state = ?, completed_at = ? WHERE shard = ?',
+                             (DONE, now, shard))
+        return {
+            'accepted': accepted,
+            'duplicates': len(rows) - accepted,
+            'done': done,
+            'stale': current['token'] != token
+        }
+
+    def release(self, shard: int, token: int) -> bool:
+        """Give a lease back (e.g. on shutdown) so another worker can claim it at once."""
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                'UPDATE shards SET state = ?, worker = NULL, expires_at = NULL '
+                'WHERE shard = ? AND token = ? AND state = ?',
+                (PENDING, shard, token, LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def done(self) -> bool:
+        """True when no shard is pending or leased."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT COUNT(*) FROM shards WHERE state IN (?, ?)', (PENDING, LEASED)
+            ).fetchone()
+        return row[0] == 0
+
+    def status(self) -> Dict[str, Any]:
+        """Shard counts per state, item and result counts, and active workers."""
+        now = time.time()
+        with self._lock:
+            conn = self._conn
+            states = dict(conn.execute('SELECT state, COUNT(*) FROM shards GROUP BY state').fetchall())
+            items = conn.execute('SELECT COUNT(*) FROM items').fetchone()[0]
+            results, errors = conn.execute(
+                'SELECT COUNT(*), COUNT(error) FROM results'
+            ).fetchone()
+            workers = [row[0] for row in conn.execute(
+                'SELECT DISTINCT worker FROM shards WHERE state = ? AND expires_at >= ?', (LEASED, now)
+            )]
+            span = conn.execute('SELECT MIN(committed_at), MAX(committed_at) FROM results').fetchone()
+        elapsed = (span[1] - span[0]) if span[0] is not None else 0
+        return {
+            'shards': {state: states.get(state, 0) for state in (PENDING, LEASED, DONE, FAILED)},
+            'items': items,
+            'results': results,
+            'errors': errors,
+            'active_workers': sorted(workers),
+            'items_per_second': round(results / elapsed, 1) if elapsed > 0 else None
+        }
+
+    def results(self) -> Iterator[Dict[str, Any]]:
+        """Committed results in manifest order: dicts with id, item, result and error."""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT i.payload, r.result, r.error FROM items i '
+                'JOIN results r ON r.item_key = i.item_key ORDER BY i.id'
+            ).fetchall()
+        for row in rows:
+            item = json.loads(row['payload'])
+            yield {
+                'id': item['id'],
+                'item': item,
+                'result': json.loads(row['result']) if row['result'] is not None else None,
+                'error': row['error']
+            }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """One JSON request per line -> one JSON response per line."""
+
+    def handle(self):
+        store = self.server.store
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                method = request.get('method')
+                if method not in REMOTE_METHODS:
+                    raise ValueError(f"Unknown method: {method}")
+                response = {'result': getattr(store, method)(**request.get('params', {}))}
+            except Exception as e:
+                response = {'error': f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(response, separators=(',', ':')).encode('utf-8') + b'\n')
+            self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def serve(store: LeaseStore, host: str = '127.0.0.1', port: int = DISTRIBUTED_PORT) -> _Server:
+    """
+    Expose a lease store over TCP (JSON lines), serving in a background thread.
+
+    Args:
+        store: Store to serve
+        host: Interface to bind (localhost by default; the protocol has no auth)
+        port: TCP port (0 picks a free one; see server.server_address)
+
+    Returns:
+        The running server; call shutdown() to stop it
+    """
+    server = _Server((host, port), _Handler)
+    server.store = store
+    threading.Thread(target=server.serve_forever, name='lease-server', daemon=True).start()
+    return server
+
+
+class RemoteLeaseStore(Closeable):
+    """LeaseStore client speaking the serve() protocol (same methods as the store)."""
+
+    def __init__(self, host: str, port: int = DISTRIBUTED_PORT, timeout: float = 60.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+
+    def _connect(self):
+        self._sock = socket.create_connection(self.address, timeout=self.timeout)
+        self._file = self._sock.makefile('rwb')
+
+    def _call(self, method: str, **params) -> Any:
+        request = json.dumps({'method': method, 'params': params}, separators=(',', ':')).encode('utf-8')
+        with self._lock:
+            # Reconnect once if the coordinator dropped the connection
+            for attempt in range(2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._file.write(request + b'\n')
+                    self._file.flush()
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError('Coordinator closed the connection')
+                    break
+                except OSError:
+                    self._disconnect()
+                    if attempt:
+                        raise
+        response = json.loads(line)
+        if 'error' in response:
+            raise RuntimeError(f"Coordinator error: {response['error']}")
+        return response['result']
+
+    def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+        return self._call('claim', worker=worker)
+
+    def heartbeat(self, shard: int, token: int) -> bool:
+        return self._call('heartbeat', shard=shard, token=token)
+
+    def commit(self, shard: int, token: int, results: List[Dict[str, Any]],
+               worker: Optional[str] = None) -> Dict[str, Any]:
+        return self._call('commit', shard=shard, token=token, results=results, worker=worker)
+
+    def release(self, shard: int, token: int) -> bool:
+        return self._call('release', shard=shard, token=token)
+
+    def status(self) -> Dict[str, Any]:
+        return self._call('status')
+
+    def done(self) -> bool:
+        return self._call('done')
+
+    def _disconnect(self):
+        for resource in (self._file, self._sock):
+            if resource is not None:
+                try:
+                    resource.close()
+                except OSError:
+                    pass
+        self._sock = self._file = None
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def open_store(target: str) -> Closeable:
+    """Open a lease store from a SQLite path or a tcp://host:port address."""
+    if target.startswith('tcp://'):
+        host, _, port = target[len('tcp://'):].rpartition(':')
+        return RemoteLeaseStore(host or '127.0.0.1', int(port))
+    return LeaseStore(target)
+
+
+class Worker:
+    """Claims shards from a lease store and evaluates their items until none are left."""
+
+    def __init__(self, store, evaluator=None, worker_id: Optional[str] = None,
+                 poll_seconds: float = 5.0, quiet: bool = True):
+        """
+        Args:
+            store: LeaseStore or RemoteLeaseStore
+            evaluator: StudentEvaluator to use (default: service.create_evaluator(),
+                configured by the same environment variables as the web apps)
+            worker_id: Name recorded with leases and results (default host:pid)
+            poll_seconds: Wait between claims while other workers hold the remaining leases
+            quiet: Suppress the evaluator's per-stage progress output
+        """
+        if evaluator is None:
+            from .service import create_evaluator
+            evaluator = create_evaluator()
+        self.store = store
+        self.evaluator = evaluator
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll_seconds = poll_seconds
+        self.quiet = quiet
+        self.stats = {'shards': 0, 'items': 0, 'errors': 0, 'lost_leases': 0}
+
+    def run(self, max_shards: Optional[int] = None) -> Dict[str, int]:
+        """
+        Process shards until the job is complete.
+
+        Args:
+            max_shards: Stop after this many shards (None: until done)
+
+        Returns:
+            Counters: shards and items processed, item errors, leases lost
+        """
+        while max_shards is None or self.stats['shards'] < max_shards:
+            lease = self.store.claim(self.worker_id)
+            if lease is None:
+                if self.store.done():
+                    break
+                # Remaining shards are leased; wait for them to finish or expire
+                time.sleep(self.poll_seconds)
+                continue
+            try:
+                self._process(lease)
+            except BaseException:
+                self.store.release(lease['shard'], lease['token'])
+                raise
+        return dict(self.stats)
+
+    def _process(self, lease: Dict[str, Any]):
+        shard, token = lease['shard'], lease['token']
+        renew_every = lease['lease_seconds'] / 3
+        renew_at = time.monotonic() + renew_every
+        results = []
+        for item in lease['items']:
+            if time.monotonic() >= renew_at:
+                if not self.store.heartbeat(shard, token):
+                    # Re-issued to another worker: keep what is done, stop early
+                    self.stats['lost_leases'] += 1
+                    print(f"⚠️ Lease on shard {shard} expired; committing {len(results)} finished items")
+                    break
+                renew_at = time.monotonic() + renew_every
+            results.append(self.evaluate_item(item))
+        if results:
+            self.store.commit(shard, token, results, worker=self.worker_id)
+        self.stats['shards'] += 1
+        self.stats['items'] += len(results)
+        self.stats['errors'] += sum(1 for r in results if 'error' in r)
+
+    def evaluate_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate one manifest item.
+
+        Returns:
+            {'id', 'result'} on success, {'id', 'error'} if evaluation failed
+            (failed items are committed too, so one bad input cannot block its shard)
+        """
+        output = io.StringIO() if self.quiet else None
+        try:
+            with contextlib.redirect_stdout(output) if output is not None else contextlib.nullcontext():
+                transcript = item_transcript(item)
+                if item.get('audio'):
+                    result = self.evaluator.evaluate_audio(
+                        item['audio'], transcript, submission_id=str(item['id']),
+                        rubric=item.get('rubric'), priority='batch'
+                    )
+                else:
+                    if transcript is None:
+                        raise ValueError("Item has no 'transcript', 'transcript_path' or 'audio'")
+                    result = self.evaluator.evaluate(
+                        transcript, item.get('duration_seconds', 0),
+                        submission_id=str(item['id']), rubric=item.get('rubric'),
+                        priority='batch'
+                    )
+            return {'id': item['id'], 'result': result}
+        except Exception as e:
+            return {'id': item['id'], 'error': f"{type(e).__name__}: {e}"}
+
+
+def item_transcript(item: Dict[str, Any]) -> Optional[str]:
+    """Return a manifest item's transcript ('transcript' or the file at 'transcript_path'), or None."""
+    transcript = item.get('transcript')
+    if transcript is None and item.get('transcript_path'):
+        with open(item['transcript_path'], 'r', encoding='utf-8') as f:
+            transcript = f.read()
+    return transcript
+
+
+def _work(target: str, worker_id: str) -> Dict[str, int]:
+    """Worker process entry point."""
+    with open_store(target) as store:
+        evaluator = None
+        try:
+            from .service import create_evaluator
+            evaluator = create_evaluator()
+            return Worker(store, evaluator, worker_id=worker_id).run()
+        finally:
+            if evaluator is not None:
+                evaluator.close()
+
+
+def run_workers(target: str, processes: int = 1) -> List[Dict[str, int]]:
+    """
+    Run worker processes on this node until the job is complete.
+
+    Args:
+        target: SQLite path or tcp://host:port of the coordinator
+        processes: Worker processes (each with its own evaluator)
+
+    Returns:
+        Counters of each worker
+    """
+    host = socket.gethostname()
+    if processes <= 1:
+        return [_work(target, f"{host}:{os.getpid()}")]
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes) as pool:
+        return pool.starmap(_work, [(target, f"{host}:{os.getpid()}-{i}") for i in range(processes)])
+
+
+def read_manifest(path: str) -> Iterator[Dict[str, Any]]:
+    """Yield the entries of a JSON-lines manifest (blank lines skipped)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def export(store: LeaseStore, output: str, evaluation_store: Optional[str] = None) -> Dict[str, int]:
+    """
+    Write committed results to a JSON-lines file, optionally recording them in an EvaluationStore.
+
+    Args:
+        store: Coordinator store
+        output: Output file (one {'id', 'result'} or {'id', 'error'} per line)
+        evaluation_store: SQLite evaluation store (store.py) to add successful results to
+
+    Returns:
+        Counts of exported results and errors
+    """
+    counts = {'results': 0, 'errors': 0}
+    history = None
+    if evaluation_store:
+        from .store import EvaluationStore
+        history = EvaluationStore(evaluation_store)
+    try:
+        with open(output, 'w', encoding='utf-8') as f:
+            for record in store.results():
+                if record['error'] is not None:
+                    counts['errors'] += 1
+                    line = {'id': record['id'], 'error': record['error']}
+                else:
+                    counts['results'] += 1
+                    line = {'id': record['id'], 'result': record['result']}
+                    if history is not None:
+                        item = record['item']
+                        history.add(record['result'], student_id=item.get('student_id'),
+                                    school=item.get('school'), class_name=item.get('class_name'),
+                                    term=item.get('term'))
+                f.write(json.dumps(line, ensure_ascii=False) + '\n')
+    finally:
+        if history is not None:
+            history.close()
+    return counts
+
+
+def text_stats(items: Iterable[Dict[str, Any]], output: str, fillers: Optional[Iterable[str]] = None,
+               corpus_path: Optional[str] = None, top: int = 20) -> Dict[str, Any]:
+    """
+    Corpus text statistics for a manifest, without evaluating it.
+
+    Transcripts are encoded once as integer token ids (utils/vocab.py), and
+    every statistic is an array operation on the ids: TTR of all transcripts
+    in one pass, filler counts per transcript, and corpus term frequencies.
+    The vocabulary grows while encoding, so each TTR equals calculate_ttr.
+
+    Args:
+        items: Manifest entries (entries without a transcript are skipped)
+        output: JSON-lines file with {'id', 'tokens', 'ttr', 'fillers'} per transcript
+        fillers: Filler words/phrases (defaults to the default rubric's)
+        corpus_path: Also save the encoded corpus here (see EncodedCorpus.load)
+        top: Number of most frequent terms to report
+
+    Returns:
+        Summary with documents, tokens, skipped and top_terms
+    """
+    from .rubric import default_rubric
+    from .utils.vocab import Vocabulary, EncodedCorpus, count_fillers
+
+    fillers = list(default_rubric().data['filler_words'] if fillers is None else fillers)
+    corpus = EncodedCorpus(Vocabulary())
+    ids = []
+    skipped = 0
+    for item in items:
+        transcript = item_transcript(item)
+        if transcript is None:
+            skipped += 1
+            continue
+        ids.append(item['id'])
+        corpus.add(transcript)
+
+    ratios = corpus.type_token_ratios()
+    lengths = corpus.lengths()
+    with open(output, 'w', encoding='utf-8') as f:
+        for item_id, encoded, ratio, length in zip(ids, corpus, ratios.tolist(), lengths.tolist()):
+            f.write(json.dumps({
+                'id': item_id,
+                'tokens': length,
+                'ttr': ratio,
+                'fillers': count_fillers(encoded, corpus.vocab, fillers)
+            }, ensure_ascii=False) + '\n')
+    if corpus_path:
+        corpus.save(corpus_path)
+    return {
+        'documents': len(corpus),
+        'tokens': int(lengths.sum()),
+        'skipped': skipped,
+        'top_terms': corpus.stats().top_terms(top)
+    }
+
+
+def main():
+    """Coordinator and worker command-line interface."""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Distributed batch grading')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    init = subparsers.add_parser('init', help='Create or extend a job from a manifest')
+    init.add_argument('db', help='Coordinator SQLite file (on a disk shared by the workers)')
+    init.add_argument('manifest', help='JSON-lines manifest')
+    init.add_argument('--shard-size', type=int, default=DISTRIBUTED_SHARD_SIZE)
+    serve_cmd = subparsers.add_parser('serve', help='Serve a job over TCP for workers without the shared disk')
+    serve_cmd.add_argument('db')
+    serve_cmd.add_argument('--host', default='127.0.0.1')
+    serve_cmd.add_argument('--port', type=int, default=DISTRIBUTED_PORT)
+    serve_cmd.add_argument('--lease-seconds', type=float, default=DISTRIBUTED_LEASE_SECONDS)
+    work = subparsers.add_parser('work', help='Run workers on this node until the job is done')
+    work.add_argument('target', help='Coordinator SQLite file or tcp://host:port')
+    work.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    status = subparsers.add_parser('status', help='Print job progress')
+    status.add_argument('target', help='Coordinator SQLite file or tcp://host:port')
+    export_cmd = subparsers.add_parser('export', help='Write results to a JSON-lines file')
+    export_cmd.add_argument('db')
+    export_cmd.add_argument('output')
+    export_cmd.add_argument('--store', help='Also record results in this evaluation store')
+    stats_cmd = subparsers.add_parser('text-stats', help='TTR, filler counts and term frequencies of a manifest')
+    stats_cmd.add_argument('manifest', help='JSON-lines manifest')
+    stats_cmd.add_argument('output', help='JSON-lines file with per-transcript statistics')
+    stats_cmd.add_argument('--corpus', help='Also save the encoded corpus under this path')
+    stats_cmd.add_argument('--top', type=int, default=20, help='Most frequent terms to print')
+    args = parser.parse_args()
+
+    if args.command == 'init':
+        with LeaseStore(args.db) as store:
+            added, shards = store.add_manifest(read_manifest(args.manifest), args.shard_size)
+        print(f"✅ Added {added} items in {shards} shards to {args.db}")
+    elif args.command == 'serve':
+        store = LeaseStore(args.db, lease_seconds=args.lease_seconds)
+        server = serve(store, args.host, args.port)
+        print(f"🚀 Serving {args.db} on tcp://{args.host}:{server.server_address[1]}")
+        try:
+            while not store.done():
+                time.sleep(5)
+            print("✅ All shards finished")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            store.close()
+    elif args.command == 'work':
+        started = time.time()
+        stats = run_workers(args.target, args.processes)
+        items = sum(s['items'] for s in stats)
+        elapsed = time.time() - started
+        print(f"✅ {len(stats)} workers evaluated {items} items in {elapsed:.1f}s "
+              f"({items / elapsed:.1f}/s, {sum(s['errors'] for s in stats)} errors)")
+    elif args.command == 'status':
+        with open_store(args.target) as store:
+            print(json.dumps(store.status(), indent=2))
+    elif args.command == 'text-stats':
+        summary = text_stats(read_manifest(args.manifest), args.output,
+                             corpus_path=args.corpus, top=args.top)
+        print(f"✅ {summary['documents']} transcripts, {summary['tokens']} tokens "
+              f"({summary['skipped']} items without a transcript skipped)")
+        print(json.dumps(summary['top_terms'], ensure_ascii=False))
+    else:
+        with LeaseStore(args.db) as store:
+            counts = export(store, args.output, args.store)
+        print(f"✅ Exported {counts['results']} results and {counts['errors']} errors to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,492 @@
+"""
+Audio ingestion: recordings in, transcript and measured timing out.
+
+Duration comes from the WAV/FLAC header, so nothing is decoded to learn how
+long a recording is. Speaking time (net of silence) is measured by a
+streaming energy-based voice activity detector that walks the samples in
+fixed-size chunks; WAV samples are memory-mapped, so hour-long recordings
+never need to fit in memory. The transcript comes from a pluggable,
+offline `Transcriber`.
+"""
+
+import abc
+import json
+import struct
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .config import (
+    AUDIO_CHUNK_SECONDS,
+    VAD_FRAME_MS,
+    VAD_ENERGY_THRESHOLD_DB,
+    VAD_MIN_SILENCE_MS
+)
+
+# FLAC decoding is optional - requires soundfile (libsndfile)
+try:
+    import soundfile
+    SOUNDFILE_AVAILABLE = True
+except ImportError:
+    SOUNDFILE_AVAILABLE = False
+
+# Offline speech recognition is optional - requires vosk
+try:
+    import vosk
+    VOSK_AVAILABLE = True
+except ImportError:
+    VOSK_AVAILABLE = False
+
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Sample width in bytes -> (numpy dtype, full-scale value) for integer PCM
+_PCM_DTYPES = {
+    1: (np.uint8, 128.0),
+    2: (np.int16, 32768.0),
+    4: (np.int32, 2147483648.0)
+}
+
+
+class AudioFormatError(ValueError):
+    """Raised for files that are not readable WAV/FLAC recordings."""
+
+
+def read_wav_header(path: str) -> Dict[str, Any]:
+    """
+    Parse a RIFF/WAVE header without reading the sample data.
+
+    Args:
+        path: Path to a .wav file
+
+    Returns:
+        Dictionary with format, sample_rate, channels, bits_per_sample,
+        encoding ('pcm' or 'float'), num_frames, duration_seconds and
+        data_offset (byte offset of the first sample)
+    """
+    with open(path, 'rb') as f:
+        riff = f.read(12)
+        if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+            raise AudioFormatError(f"{path} is not a WAV file")
+
+        fmt = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise AudioFormatError(f"{path} has no data chunk")
+            chunk_id, chunk_size = struct.unpack('<4sI', chunk)
+
+            if chunk_id == b'fmt ':
+                body = f.read(chunk_size)
+                format_tag, channels, sample_rate, _, block_align, bits = struct.unpack(
+                    '<HHIIHH', body[:16]
+                )
+                if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # The real format is the first two bytes of the SubFormat GUID
+                    format_tag = struct.unpack('<H', body[24:26])[0]
+                fmt = (format_tag, channels, sample_rate, block_align, bits)
+            elif chunk_id == b'data':
+                if fmt is None:
+                    raise AudioFormatError(f"{path} has data before its fmt chunk")
+                data_offset = f.tell()
+                break
+            else:
+                f.seek(chunk_size, 1)
+
+            # Chunks are padded to an even number of bytes
+            if chunk_size % 2:
+                f.seek(1, 1)
+
+        file_size = f.seek(0, 2)
+
+    format_tag, channels, sample_rate, block_align, bits = fmt
+    if format_tag == WAVE_FORMAT_PCM:
+        encoding = 'pcm'
+    elif format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        encoding = 'float'
+    else:
+        raise AudioFormatError(f"Unsupported WAV encoding 0x{format_tag:04x} in {path}")
+    if channels < 1 or sample_rate < 1 or block_align != channels * (bits // 8):
+        raise AudioFormatError(f"Invalid WAV header in {path}")
+
+    # Streamed recordings often leave the data size as 0 or 0xFFFFFFFF;
+    # trust the file size in that case (and for truncated files)
+    data_size = min(chunk_size, file_size - data_offset)
+    if chunk_size in (0, 0xFFFFFFFF):
+        data_size = file_size - data_offset
+    num_frames = data_size // block_align
+
+    return {
+        'format': 'wav',
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'bits_per_sample': bits,
+        'encoding': encoding,
+        'num_frames': num_frames,
+        'duration_seconds': num_frames / sample_rate,
+        'data_offset': data_offset
+    }
+
+
+def read_flac_header(path: str) -> Dict[str, Any]:
+    """
+    Parse the STREAMINFO block of a FLAC file.
+
+    Args:
+        path: Path to a .flac file
+
+    Returns:
+        Dictionary with format, sample_rate, channels, bits_per_sample,
+        num_frames and duration_seconds (None if the encoder did not
+        record the total sample count)
+    """
+    with open(path, 'rb') as f:
+        if f.read(4) != b'fLaC':
+            raise AudioFormatError(f"{path} is not a FLAC file")
+        block_header = f.read(4)
+        if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+            raise AudioFormatError(f"{path} does not start with STREAMINFO")
+        info = f.read(34)
+        if len(info) < 34:
+            raise AudioFormatError(f"Truncated STREAMINFO in {path}")
+
+    # Bytes 10-17: sample rate (20 bits), channels-1 (3), bits-1 (5), total samples (36)
+    packed = int.from_bytes(info[10:18], 'big')
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    num_frames = packed & 0xFFFFFFFFF
+    if sample_rate == 0:
+        raise AudioFormatError(f"Invalid sample rate in {path}")
+
+    return {
+        'format': 'flac',
+        'sample_rate': sample_rate,
+        'channels': channels,
+        'bits_per_sample': bits,
+        'encoding': 'pcm',
+        'num_frames': num_frames,
+        'duration_seconds': num_frames / sample_rate if num_frames else None
+    }
+
+
+def audio_info(path: str) -> Dict[str, Any]:
+    """
+    Read a recording's header (format detected from its magic bytes).
+
+    Args:
+        path: Path to a WAV or FLAC file
+
+    Returns:
+        Header dictionary (see read_wav_header / read_flac_header)
+    """
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic == b'RIFF':
+        info = read_wav_header(path)
+    elif magic == b'fLaC':
+        info = read_flac_header(path)
+    else:
+        raise AudioFormatError(f"{path} is not a WAV or FLAC file")
+    info['path'] = str(path)
+    return info
+
+
+def iter_chunks(info: Dict[str, Any], chunk_seconds: float = AUDIO_CHUNK_SECONDS) -> Iterator[np.ndarray]:
+    """
+    Yield the recording as mono float32 chunks in [-1, 1].
+
+    WAV data is memory-mapped and converted one chunk at a time; FLAC is
+    decoded block by block through soundfile.
+
+    Args:
+        info: Header from audio_info()
+        chunk_seconds: Length of each chunk
+
+    Yields:
+        1-D float32 arrays of at most chunk_seconds * sample_rate samples
+    """
+    chunk_frames = max(1, int(chunk_seconds * info['sample_rate']))
+
+    if info['format'] == 'flac':
+        if not SOUNDFILE_AVAILABLE:
+            raise ImportError("soundfile is required to decode FLAC audio (pip install soundfile)")
+        for block in soundfile.blocks(info['path'], blocksize=chunk_frames,
+                                      dtype='float32', always_2d=True):
+            yield block.mean(axis=1)
+        return
+
+    channels = info['channels']
+    width = info['bits_per_sample'] // 8
+    num_frames = info['num_frames']
+    if num_frames == 0:
+        return
+
+    if info['encoding'] == 'float':
+        dtype, scale, offset = (np.float32 if width == 4 else np.float64), 1.0, 0.0
+    elif width == 3:
+        dtype, scale, offset = np.uint8, 8388608.0, 0.0
+    elif width in _PCM_DTYPES:
+        dtype, scale = _PCM_DTYPES[width]
+        offset = 128.0 if width == 1 else 0.0
+    else:
+        raise AudioFormatError(f"Unsupported sample width: {info['bits_per_sample']} bits")
+
+    values_per_frame = channels * (3 if width == 3 else 1)
+    samples = np.memmap(info['path'], dtype=dtype, mode='r', offset=info['data_offset'],
+                        shape=(num_frames, values_per_frame))
+
+    for start in range(0, num_frames, chunk_frames):
+        block = np.asarray(samples[start:start + chunk_frames])
+        if width == 3:
+            # Little-endian 24-bit: assemble into int32 and sign-extend
+            raw = block.reshape(len(block), channels, 3).astype(np.int32)
+            block = raw[..., 0] | (raw[..., 1] << 8) | (raw[..., 2] << 16)
+            block = np.where(block >= 1 << 23, block - (1 << 24), block)
+        block = block.astype(np.float32)
+        if offset:
+            block -= offset
+        block /= scale
+        yield block.mean(axis=1) if channels > 1 else block[:, 0]
+
+
+def detect_speech(
+    chunks: Iterator[np.ndarray],
+    sample_rate: int,
+    frame_ms: float = VAD_FRAME_MS,
+    threshold_db: float = VAD_ENERGY_THRESHOLD_DB,
+    min_silence_ms: float = VAD_MIN_SILENCE_MS
+) -> Dict[str, Any]:
+    """
+    Energy-based voice activity detection over a stream of sample chunks.
+
+    Each frame is speech when its RMS level is above `threshold_db` (dBFS).
+    Gaps shorter than `min_silence_ms` (between words, plosives) are
+    bridged, so only real pauses count as silence. Only one frame of
+    carry-over is kept between chunks.
+
+    Args:
+        chunks: Mono float samples in [-1, 1], e.g. from iter_chunks()
+        sample_rate: Samples per second
+        frame_ms: Analysis frame length
+        threshold_db: RMS level separating speech from silence
+        min_silence_ms: Shortest gap counted as a pause
+
+    Returns:
+        Dictionary with speech_seconds, silence_seconds, pause_count and
+        segments (list of (start, end) seconds of speech)
+    """
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    frame_seconds = frame_len / sample_rate
+    min_gap = max(1, int(round(min_silence_ms / frame_ms)))
+    threshold = 10 ** (threshold_db / 20)
+
+    segments = []
+    segment_start = None
+    last_speech = None
+    frame_index = 0
+    remainder = np.zeros(0, dtype=np.float32)
+
+    for chunk in chunks:
+        if len(remainder):
+            chunk = np.concatenate([remainder, chunk])
+        usable = len(chunk) - len(chunk) % frame_len
+        remainder = chunk[usable:]
+        if usable == 0:
+            continue
+
+        frames = chunk[:usable].reshape(-1, frame_len).astype(np.float64)
+        rms = np.sqrt(np.mean(frames * frames, axis=1))
+        speech_frames = np.flatnonzero(rms >= threshold) + frame_index
+        frame_index += len(frames)
+
+        for index in speech_frames.tolist():
+            if segment_start is None:
+                segment_start = index
+            elif index - last_speech > min_gap:
+                segments.append((segment_start, last_speech + 1))
+                segment_start = index
+            last_speech = index
+
+    if segment_start is not None:
+        segments.append((segment_start, last_speech + 1))
+
+    total_seconds = frame_index * frame_seconds + len(remainder) / sample_rate
+    speech_seconds = sum(end - start for start, end in segments) * frame_seconds
+
+    return {
+        'speech_seconds': round(speech_seconds, 3),
+        'silence_seconds': round(max(0.0, total_seconds - speech_seconds), 3),
+        'pause_count': max(0, len(segments) - 1),
+        'segments': [
+            (round(start * frame_seconds, 3), round(end * frame_seconds, 3))
+            for start, end in segments
+        ]
+    }
+
+
+class Transcriber(abc.ABC):
+    """
+    Offline speech-to-text interface.
+
+    Implementations receive the recording's header and the detected speech
+    segments, and may stream the audio with iter_chunks() rather than
+    loading it whole.
+    """
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def transcribe(self, info: Dict[str, Any], segments: List[Tuple[float, float]]) -> str:
+        """
+        Transcribe a recording.
+
+        Args:
+            info: Header from audio_info()
+            segments: Speech segments (start, end) in seconds
+
+        Returns:
+            Transcript text
+        """
+
+
+class SidecarTranscriber(Transcriber):
+    """Reads a transcript stored next to the recording (lecture.wav -> lecture.txt)."""
+
+    name = 'sidecar'
+
+    def __init__(self, suffix: str = '.txt'):
+        self.suffix = suffix
+
+    def transcribe(self, info: Dict[str, Any], segments: List[Tuple[float, float]]) -> str:
+        path = Path(info['path']).with_suffix(self.suffix)
+        if not path.is_file():
+            raise FileNotFoundError(f"No transcript found at {path}")
+        return path.read_text(encoding='utf-8').strip()
+
+
+class VoskTranscriber(Transcriber):
+    """Streams 16-bit PCM WAV audio through a local Vosk model."""
+
+    name = 'vosk'
+
+    def __init__(self, model_path: str):
+        """
+        Args:
+            model_path: Directory of a downloaded Vosk model
+        """
+        if not VOSK_AVAILABLE:
+            raise ImportError("vosk is required for offline transcription (pip install vosk)")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+
+    def transcribe(self, info: Dict[str, Any], segments: List[Tuple[float, float]]) -> str:
+        recognizer = vosk.KaldiRecognizer(self.model, info['sample_rate'])
+        texts = []
+        # Feed one second at a time; only speech segments are decoded
+        for start, end in segments:
+            for chunk in self._segment_chunks(info, start, end):
+                if recognizer.AcceptWaveform(chunk):
+                    texts.append(json.loads(recognizer.Result()).get('text', ''))
+        texts.append(json.loads(recognizer.FinalResult()).get('text', ''))
+        return ' '.join(t for t in texts if t)
+
+    @staticmethod
+    def _segment_chunks(info: Dict[str, Any], start: float, end: float) -> Iterator[bytes]:
+        rate = info['sample_rate']
+        first, last = int(start * rate), min(info['num_frames'], int(end * rate))
+        if info['format'] == 'wav' and info['encoding'] == 'pcm' and info['bits_per_sample'] == 16:
+            samples = np.memmap(info['path'], dtype=np.int16, mode='r', offset=info['data_offset'],
+                                shape=(info['num_frames'], info['channels']))
+            for position in range(first, last, rate):
+                block = np.asarray(samples[position:min(last, position + rate)])
+                if info['channels'] > 1:
+                    block = block.mean(axis=1).astype(np.int16)
+                yield np.ascontiguousarray(block).tobytes()
+        else:
+            # Other encodings: decode through soundfile, then convert to 16-bit PCM
+            if not SOUNDFILE_AVAILABLE:
+                raise ImportError("soundfile is required to transcribe this format (pip install soundfile)")
+            for block in soundfile.blocks(info['path'], blocksize=rate, start=first, stop=last,
+                                          dtype='int16', always_2d=True):
+                yield block.mean(axis=1).astype(np.int16).tobytes()
+
+
+class AudioIngestor:
+    """Turns a recording into the inputs of StudentEvaluator.evaluate()."""
+
+    def __init__(
+        self,
+        transcriber: Optional[Transcriber] = None,
+        chunk_seconds: float = AUDIO_CHUNK_SECONDS,
+        frame_ms: float = VAD_FRAME_MS,
+        threshold_db: float = VAD_ENERGY_THRESHOLD_DB,
+        min_silence_ms: float = VAD_MIN_SILENCE_MS
+    ):
+        """
+        Args:
+            transcriber: Speech-to-text backend (default: SidecarTranscriber)
+            chunk_seconds: Audio processed per step by the VAD
+            frame_ms: VAD frame length
+            threshold_db: VAD speech level in dBFS
+            min_silence_ms: Shortest gap the VAD counts as a pause
+        """
+        self.transcriber = transcriber or SidecarTranscriber()
+        self.chunk_seconds = chunk_seconds
+        self.frame_ms = frame_ms
+        self.threshold_db = threshold_db
+        self.min_silence_ms = min_silence_ms
+
+    def ingest(self, path: str, transcript: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Measure and transcribe a recording.
+
+        Args:
+            path: WAV or FLAC file
+            transcript: Known transcript (skips the transcriber)
+
+        Returns:
+            Dictionary with transcript, duration_seconds and audio (header
+            fields plus speech_seconds, silence_seconds, pause_count, segments)
+        """
+        info = audio_info(path)
+        duration = info['duration_seconds']
+        try:
+            vad = detect_speech(
+                iter_chunks(info, self.chunk_seconds), info['sample_rate'],
+                self.frame_ms, self.threshold_db, self.min_silence_ms
+            )
+        except ImportError as e:
+            # FLAC without soundfile: the header still gives the duration
+            if duration is None:
+                raise
+            print(f"⚠️ Speech detection unavailable: {e}")
+            vad = {
+                'speech_seconds': None,
+                'silence_seconds': None,
+                'pause_count': None,
+                'segments': [(0.0, round(duration, 3))]
+            }
+
+        if duration is None:
+            # FLAC without a total sample count: the VAD walked every sample
+            duration = vad['speech_seconds'] + vad['silence_seconds']
+
+        transcriber = None
+        if transcript is None:
+            transcript = self.transcriber.transcribe(info, vad['segments'])
+            transcriber = self.transcriber.name
+
+        audio = {key: value for key, value in info.items() if key != 'data_offset'}
+        audio['duration_seconds'] = round(duration, 3)
+        audio.update(vad)
+        audio['transcriber'] = transcriber
+
+        return {
+            'transcript': transcript,
+            'duration_seconds': round(duration, 3),
+            'audio': audio
+        }
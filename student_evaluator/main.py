@@ -5,8 +5,10 @@ This tool evaluates student introduction transcripts based on a comprehensive ru
 """
 
 import json
+import uuid
 import argparse
-from typing import Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Union
 from pathlib import Path
 
 from .analyzers import (
@@ -16,31 +18,104 @@ from .analyzers import (
     ClarityAnalyzer,
     EngagementAnalyzer
 )
-# Semantic analyzer is optional - requires sentence-transformers
+# Semantic analyzer is optional - requires sentence-transformers or onnxruntime
 try:
     from .analyzers.semantic_analyzer import SemanticAnalyzer
+    from .analyzers.category_index import CategoryIndex
     SEMANTIC_AVAILABLE = True
 except ImportError:
     SEMANTIC_AVAILABLE = False
     
+from .pipeline import Pipeline, PipelineStage, Deadline, DEGRADED_KEY, PRIORITY_KEY
+from .ingestion import AudioIngestor, Transcriber
+from .rubric import RubricIndex, ReloadableRubric, RubricRegistry, default_rubric
 from .utils.keywords import count_sentences, tokenize_words
+from .utils.duplicates import DuplicateIndex
+from .utils.batcher import MicroBatcher
+from .utils.scheduler import PriorityScheduler
+from .utils import lifecycle
+from .utils.profiling import RequestProfiler
+from .utils.pace import parse_word_timestamps, load_word_timestamps
+from .utils.safety import normalize_transcript
+from .config import (
+    MICRO_BATCH_MAX_SIZE,
+    MICRO_BATCH_MAX_WAIT_MS,
+    ASYNC_IO_WORKERS,
+    ENGAGEMENT_MODES,
+    PROFILE_MODES,
+    SCHEDULER_CAPACITY,
+    SCHEDULER_CLASSES
+)
 
 
-class StudentEvaluator:
-    """Main evaluator that orchestrates all analysis modules."""
+class StudentEvaluator(lifecycle.Closeable):
+    """
+    Main evaluator that orchestrates all analysis modules.
+    
+    Call close() (or use it as a context manager) to stop the LanguageTool
+    server and worker threads; otherwise they are cleaned up at exit.
+    """
     
-    def __init__(self, use_semantic: bool = True):
+    def __init__(
+        self,
+        use_semantic: bool = True,
+        duplicate_index: Optional[DuplicateIndex] = None,
+        semantic_backend: str = 'torch',
+        semantic_model_path: Optional[str] = None,
+        micro_batching: bool = False,
+        batch_size: int = MICRO_BATCH_MAX_SIZE,
+        batch_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS,
+        rubric: Optional[Union[RubricIndex, ReloadableRubric]] = None,
+        rubric_registry: Optional[RubricRegistry] = None,
+        transcriber: Optional[Transcriber] = None,
+        engagement_mode: str = 'document',
+        profiler: Optional[RequestProfiler] = None,
+        semantic_categories: bool = False,
+        priority_scheduling: bool = False,
+        scheduler_capacity: Optional[Dict[str, int]] = None
+    ):
         """
         Initialize evaluator with all analyzer modules.
         
         Args:
-            use_semantic: Whether to use semantic analysis (requires sentence-transformers)
+            use_semantic: Whether to use semantic analysis (requires sentence-transformers
+                or, with semantic_backend='onnx', onnxruntime and tokenizers)
+            duplicate_index: Optional near-duplicate index; when given, every
+                evaluated transcript is checked against and added to it
+            semantic_backend: 'torch' or 'onnx' inference backend for SemanticAnalyzer
+            semantic_model_path: Exported model directory for the 'onnx' backend
+            micro_batching: Coalesce concurrent grammar/semantic calls into batches
+                (useful when one evaluator serves many threads)
+            batch_size: Maximum items per micro-batch
+            batch_wait_ms: Maximum time an item waits for its batch to fill
+            rubric: Compiled rubric, or a ReloadableRubric that is re-read when
+                its file changes (defaults to the rubric in config.py)
+            rubric_registry: Per-tenant rubrics that evaluate() can select by name
+            transcriber: Offline speech-to-text backend for evaluate_audio()
+                (default: read <recording>.txt next to the audio file)
+            engagement_mode: 'document' (one sentiment score for the transcript) or
+                'sentence' (cached per-sentence scores plus an engagement curve)
+            profiler: Stores profiles of requests evaluated with profile=True and
+                of every N-th request if it samples automatically
+            semantic_categories: Also detect rubric keyword categories from sentence
+                embeddings (CategoryIndex), crediting paraphrases the patterns miss;
+                requires semantic analysis
+            priority_scheduling: Queue grammar and semantic calls by the request's
+                priority class (see utils/scheduler.py), so batch work sharing
+                this evaluator cannot delay interactive requests
+            scheduler_capacity: Concurrent calls per backend ('grammar',
+                'semantic'); defaults to SCHEDULER_CAPACITY
         """
+        self.rubric = rubric or default_rubric()
+        self.rubric_registry = rubric_registry
         self.content_analyzer = ContentAnalyzer()
         self.speech_rate_analyzer = SpeechRateAnalyzer()
         self.grammar_analyzer = GrammarAnalyzer()
         self.clarity_analyzer = ClarityAnalyzer()
-        self.engagement_analyzer = EngagementAnalyzer()
+        self.engagement_analyzer = EngagementAnalyzer(mode=engagement_mode)
+        self.duplicate_index = duplicate_index
+        self.profiler = profiler
+        self.ingestor = AudioIngestor(transcriber)
         
         # Initialize semantic analyzer if available and requested
         self.use_semantic = use_semantic and SEMANTIC_AVAILABLE
@@ -48,68 +123,211 @@ class StudentEvaluator:
         
         if self.use_semantic:
             try:
-                self.semantic_analyzer = SemanticAnalyzer()
+                self.semantic_analyzer = SemanticAnalyzer(
+                    backend=semantic_backend,
+                    model_path=semantic_model_path
+                )
                 print("✅ Semantic analysis enabled (NLP-based)")
             except Exception as e:
                 print(f"⚠️ Semantic analysis unavailable: {e}")
                 print("📝 Falling back to rule-based only")
                 self.use_semantic = False
+        
+        self.category_index = None
+        if semantic_categories and self.semantic_analyzer is not None:
+            self.category_index = CategoryIndex(self.semantic_analyzer)
+        
+        self.batchers = {}
+        if micro_batching:
+            self.batchers['grammar'] = MicroBatcher(
+                self.grammar_analyzer.check_batch, batch_size, batch_wait_ms, name='grammar'
+            )
+            self.grammar_analyzer.batcher = self.batchers['grammar']
+            if self.semantic_analyzer is not None:
+                self.batchers['semantic'] = MicroBatcher(
+                    self.semantic_analyzer.encode_batch, batch_size, batch_wait_ms, name='semantic'
+                )
+                self.semantic_analyzer.batcher = self.batchers['semantic']
+        
+        self.schedulers = {}
+        if priority_scheduling:
+            capacity = {**SCHEDULER_CAPACITY, **(scheduler_capacity or {})}
+            self.schedulers['grammar'] = PriorityScheduler(capacity['grammar'], name='grammar')
+            self.grammar_analyzer.scheduler = self.schedulers['grammar']
+            if self.semantic_analyzer is not None:
+                self.schedulers['semantic'] = PriorityScheduler(capacity['semantic'], name='semantic')
+        
+        self.pipeline = self._build_pipeline()
+        # Thread pool for I/O-bound stages in evaluate_async (created on first use)
+        self._io_executor = None
+        self._closed = False
+        lifecycle.register(self)
+        
+        # Stage name -> (key in results['scores'], section builder)
+        self._sections = {
+            'content': ('content_and_structure', self._content_section),
+            'speech_rate': ('speech_rate', self._speech_rate_section),
+            'grammar': ('language_and_grammar', self._grammar_section),
+            'clarity': ('clarity', self._clarity_section),
+            'engagement': ('engagement', self._engagement_section)
+        }
+    
+    def close(self):
+        """Stop batchers, thread pools and analyzer resources (idempotent)."""
+        if self._closed:
+            return
+        self._closed = True
+        # Batchers flush queued work into the analyzers, so they go first
+        for batcher in self.batchers.values():
+            batcher.close()
+        if self._io_executor is not None:
+            self._io_executor.shutdown(wait=True)
+            self._io_executor = None
+        self.grammar_analyzer.close()
+        self.engagement_analyzer.close()
+        if self.semantic_analyzer is not None:
+            self.semantic_analyzer.close()
+        if self.duplicate_index is not None:
+            self.duplicate_index.close()
+        lifecycle.unregister(self)
+    
+    def metrics(self) -> Dict[str, Any]:
+        """Return runtime counters (micro-batching histograms, caches, scheduler queues)."""
+        metrics = {
+            'micro_batching': {
+                name: batcher.stats() for name, batcher in self.batchers.items()
+            }
+        }
+        if self.engagement_analyzer.mode == 'sentence':
+            metrics['engagement_sentence_cache'] = self.engagement_analyzer.cache_stats()
+        if self.semantic_analyzer is not None:
+            metrics['semantic_sentence_cache'] = self.semantic_analyzer.cache_stats()
+        if self.rubric_registry is not None:
+            metrics['rubrics'] = self.rubric_registry.stats()
+        if self.schedulers:
+            metrics['scheduling'] = {
+                name: scheduler.stats() for name, scheduler in self.schedulers.items()
+            }
+        return metrics
+    
+    def _build_pipeline(self) -> Pipeline:
+        """Register the built-in analyzers as pipeline stages."""
+        pipeline = Pipeline()
+        
+        # Content and engagement blend in semantic similarity when it is enabled,
+        # so they declare the semantic stage as an input only in that case
+        blend_inputs = ('transcript',)
+        if self.use_semantic and self.semantic_analyzer:
+            pipeline.register(PipelineStage(
+                'semantic', self.semantic_analyzer.analyze_content_semantics,
+                label="Analyzing semantic similarity...",
+                fallback=self._skip_stage,
+                scheduler=self.schedulers.get('semantic')
+            ))
+            blend_inputs = ('transcript', 'semantic')
+        
+        content_inputs = blend_inputs
+        if self.category_index is not None:
+            pipeline.register(PipelineStage(
+                'categories', self.category_index.detect,
+                label="Detecting rubric categories...",
+                fallback=self._skip_stage,
+                scheduler=self.schedulers.get('semantic')
+            ))
+            content_inputs = blend_inputs + ('categories',)
+        
+        pipeline.register(PipelineStage(
+            'content', self._run_content, inputs=content_inputs,
+            optional_inputs=('rubric',),
+            label="Analyzing content and structure..."
+        ))
+        pipeline.register(PipelineStage(
+            'speech_rate', self.speech_rate_analyzer.analyze,
+            inputs=('transcript', 'duration_seconds'),
+            optional_inputs=('rubric', 'word_timestamps'),
+            label="Analyzing speech rate..."
+        ))
+        pipeline.register(PipelineStage(
+            'grammar', self.grammar_analyzer.analyze,
+            optional_inputs=('rubric', PRIORITY_KEY),
+            label="Analyzing grammar and vocabulary...",
+            io_bound=True,
+            fallback=self.grammar_analyzer.analyze_quick,
+            scheduler=self.schedulers.get('grammar')
+        ))
+        pipeline.register(PipelineStage(
+            'clarity', self.clarity_analyzer.analyze,
+            optional_inputs=('rubric',),
+            label="Analyzing clarity..."
+        ))
+        pipeline.register(PipelineStage(
+            'engagement', self._run_engagement, inputs=blend_inputs,
+            optional_inputs=('rubric',),
+            label="Analyzing engagement..."
+        ))
+        return pipeline
+    
+    @staticmethod
+    def _skip_stage(*args, **kwargs) -> None:
+        """Fallback for the semantic stages under a time budget: blend nothing in."""
+        return None
     
-    def evaluate(self, transcript: str, duration_seconds: int) -> Dict[str, Any]:
+    def register_stage(self, stage: PipelineStage, replace: bool = False):
         """
-        Evaluate a student introduction transcript.
+        Add a custom analysis stage to the pipeline.
+        
+        A stage whose output is a dict with 'score' and 'max_score' counts
+        towards the total; any other output is returned under 'analysis'.
         
         Args:
-            transcript: The transcript text
-            duration_seconds: Duration of the speech in seconds
-            
-        Returns:
-            Complete evaluation results with all scores
+            stage: Stage to register (runs after all existing stages)
+            replace: Allow replacing a built-in stage of the same name
         """
-        # Metadata
-        words = tokenize_words(transcript)
-        word_count = len(words)
-        sentence_count = count_sentences(transcript)
-        
-        # Run all analyzers
-        print("Analyzing content and structure...")
-        content_results = self.content_analyzer.analyze(transcript)
+        self.pipeline.register(stage, replace=replace)
+    
+    def _run_content(
+        self,
+        transcript: str,
+        semantic: Optional[Dict[str, Any]] = None,
+        categories: Optional[Dict[str, Any]] = None,
+        rubric: Optional[RubricIndex] = None
+    ) -> Dict[str, Any]:
+        """Content stage: rule-based analysis, blended with semantic similarity if available."""
+        content_results = self.content_analyzer.analyze(transcript, rubric=rubric, categories=categories)
         
-        # Enhance with semantic analysis if available
-        if self.use_semantic and self.semantic_analyzer:
+        if semantic is not None:
             print("Applying semantic analysis to content...")
             semantic_enhancement = self.semantic_analyzer.enhance_content_score(
                 content_results['total_score'],
                 transcript,
-                content_results['max_score']
+                content_results['max_score'],
+                semantic_results=semantic
             )
             content_results['semantic_enhancement'] = semantic_enhancement
             # Use enhanced score
-            original_content_score = content_results['total_score']
             content_results['total_score'] = semantic_enhancement['enhanced_score']
             content_results['scoring_method'] = semantic_enhancement['method']
         else:
             content_results['scoring_method'] = 'Rule-based only'
         
-        print("Analyzing speech rate...")
-        speech_rate_results = self.speech_rate_analyzer.analyze(transcript, duration_seconds)
-        
-        print("Analyzing grammar and vocabulary...")
-        grammar_results = self.grammar_analyzer.analyze(transcript)
-        
-        print("Analyzing clarity...")
-        clarity_results = self.clarity_analyzer.analyze(transcript)
-        
-        print("Analyzing engagement...")
-        engagement_results = self.engagement_analyzer.analyze(transcript)
+        return content_results
+    
+    def _run_engagement(
+        self,
+        transcript: str,
+        semantic: Optional[Dict[str, Any]] = None,
+        rubric: Optional[RubricIndex] = None
+    ) -> Dict[str, Any]:
+        """Engagement stage: sentiment analysis, blended with semantic similarity if available."""
+        engagement_results = self.engagement_analyzer.analyze(transcript, rubric=rubric)
         
-        # Enhance engagement with semantic analysis if available
-        if self.use_semantic and self.semantic_analyzer:
+        if semantic is not None:
             print("Applying semantic analysis to engagement...")
             engagement_enhancement = self.semantic_analyzer.enhance_engagement_score(
                 engagement_results['score'],
                 transcript,
-                engagement_results['max_score']
+                engagement_results['max_score'],
+                semantic_results=semantic
             )
             engagement_results['semantic_enhancement'] = engagement_enhancement
             engagement_results['score'] = engagement_enhancement['enhanced_score']
@@ -117,17 +335,291 @@ class StudentEvaluator:
         else:
             engagement_results['scoring_method'] = 'Sentiment-based only'
         
-        # Calculate total score
-        total_score = (
-            content_results['total_score'] +
-            speech_rate_results['score'] +
-            grammar_results['total_score'] +
-            clarity_results['score'] +
-            engagement_results['score']
+        return engagement_results
+    
+    def evaluate(
+        self,
+        transcript: str,
+        duration_seconds: int = 0,
+        submission_id: Optional[str] = None,
+        stages: Optional[Iterable[str]] = None,
+        rubric: Optional[Union[str, RubricIndex]] = None,
+        word_timestamps: Any = None,
+        profile: bool = False,
+        time_budget: Optional[float] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate a student introduction transcript.
+        
+        Args:
+            transcript: The transcript text
+            duration_seconds: Duration of the speech in seconds
+            submission_id: Identifier stored in the duplicate index (random if omitted)
+            stages: Stage names to run (e.g. {'speech_rate', 'clarity'} for practice
+                mode); None runs every stage. Dependencies are added automatically.
+            rubric: Rubric for this request, or a tenant name looked up in the
+                rubric registry; defaults to the evaluator's rubric
+            word_timestamps: Word-level (start, end) times, e.g. ASR JSON; adds a
+                pace timeline and pause statistics to the speech rate section
+                (duration defaults to the last word's end time)
+            profile: Capture a profile of this evaluation (see utils/profiling.py);
+                its file path and hottest functions are returned under 'profile'
+            time_budget: Seconds the evaluation may take. Stages that would not
+                finish in time are degraded (rule-based grammar check instead of
+                LanguageTool, no semantic blend); 'time_budget' in the result
+                lists them
+            priority: Priority class ('interactive' or 'batch') used to queue
+                for the shared backends when priority scheduling is enabled
+            
+        Returns:
+            Evaluation results; scores and totals cover only the stages that ran
+            
+        Raises:
+            InputTooLarge: If the transcript exceeds the per-request input limits
+        """
+        profiler = self._profiler_for(profile)
+        if profiler is None:
+            return self._evaluate(transcript, duration_seconds, submission_id, stages,
+                                  rubric, word_timestamps, time_budget, priority)
+        
+        with profiler.capture(submission_id or 'request') as report:
+            results = self._evaluate(transcript, duration_seconds, submission_id, stages,
+                                     rubric, word_timestamps, time_budget, priority)
+        results['profile'] = report
+        return results
+    
+    def _evaluate(self, transcript, duration_seconds, submission_id, stages,
+                  rubric, word_timestamps, time_budget=None, priority=None) -> Dict[str, Any]:
+        """Run the pipeline and compile results (evaluate() without profiling)."""
+        deadline = Deadline(time_budget) if time_budget is not None else None
+        context = self._new_context(transcript, duration_seconds, rubric, word_timestamps, priority)
+        self.pipeline.run(context, stages, deadline=deadline,
+                          executor=self._get_io_executor() if deadline is not None else None)
+        executed = [name for name in self.pipeline.names() if name in context]
+        
+        return self._with_budget(self._compile_results(context, executed, submission_id),
+                                 context, deadline)
+    
+    def _get_io_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for I/O-bound and deadline-bounded stages (created on first use)."""
+        if self._io_executor is None:
+            self._io_executor = ThreadPoolExecutor(
+                max_workers=ASYNC_IO_WORKERS, thread_name_prefix='evaluator-io'
+            )
+        return self._io_executor
+    
+    def _with_budget(self, results: Dict[str, Any], context: Dict[str, Any],
+                     deadline: Optional[Deadline]) -> Dict[str, Any]:
+        """Record the time budget, elapsed time and degraded stages in the results."""
+        if deadline is not None:
+            results['time_budget'] = {
+                'seconds': deadline.seconds,
+                'elapsed': round(deadline.elapsed(), 3),
+                'degraded': context.get(DEGRADED_KEY, {})
+            }
+        return results
+    
+    def _profiler_for(self, requested: bool) -> Optional[RequestProfiler]:
+        """Return the profiler if this request should be profiled, else None."""
+        if self.profiler is None:
+            if not requested:
+                return None
+            self.profiler = RequestProfiler()
+        if requested or self.profiler.sample_due():
+            return self.profiler
+        return None
+    
+    def evaluate_audio(
+        self,
+        audio_path: str,
+        transcript: Optional[str] = None,
+        submission_id: Optional[str] = None,
+        stages: Optional[Iterable[str]] = None,
+        rubric: Optional[Union[str, RubricIndex]] = None,
+        word_timestamps: Any = None,
+        profile: bool = False,
+        time_budget: Optional[float] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate a WAV/FLAC recording.
+        
+        The duration is read from the file header and speaking time is
+        measured with a streaming voice activity detector, so the caller
+        no longer supplies duration_seconds.
+        
+        Args:
+            audio_path: Path to a local WAV or FLAC file
+            transcript: Known transcript (otherwise the transcriber is used)
+            submission_id: Identifier stored in the duplicate index
+            stages: Stage names to run; None runs every stage
+            rubric: Rubric (or tenant name) for this request
+            word_timestamps: Word-level (start, end) times for pace analysis
+            profile: Capture a profile of the evaluation (after ingestion)
+            time_budget: Seconds the evaluation (after ingestion) may take
+            priority: Priority class for the shared backends (see evaluate())
+            
+        Returns:
+            Same structure as evaluate(), plus an 'audio' section with the
+            measured timing (speech/silence seconds, pauses, articulation rate)
+        """
+        print("Ingesting audio...")
+        ingested = self.ingestor.ingest(audio_path, transcript)
+        results = self.evaluate(
+            ingested['transcript'],
+            ingested['duration_seconds'],
+            submission_id=submission_id,
+            stages=stages,
+            rubric=rubric,
+            word_timestamps=word_timestamps,
+            profile=profile,
+            time_budget=time_budget,
+            priority=priority
         )
         
-        max_score = 100
-        percentage = round((total_score / max_score) * 100, 1)
+        audio = ingested['audio']
+        # Words per minute of actual speaking time (pauses excluded)
+        speech_seconds = audio['speech_seconds']
+        audio['articulation_wpm'] = (
+            round(results['metadata']['word_count'] / speech_seconds * 60, 1)
+            if speech_seconds else None
+        )
+        results['audio'] = audio
+        return results
+    
+    async def evaluate_async(
+        self,
+        transcript: str,
+        duration_seconds: int = 0,
+        submission_id: Optional[str] = None,
+        stages: Optional[Iterable[str]] = None,
+        rubric: Optional[Union[str, RubricIndex]] = None,
+        word_timestamps: Any = None,
+        profile: bool = False,
+        time_budget: Optional[float] = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Asynchronous version of evaluate() for asyncio servers.
+        
+        The LanguageTool call runs on a dedicated I/O thread pool and the CPU
+        stages on the loop's default executor, so the event loop stays free
+        and independent stages of one request overlap.
+        
+        Args:
+            transcript: The transcript text
+            duration_seconds: Duration of the speech in seconds
+            submission_id: Identifier stored in the duplicate index (random if omitted)
+            stages: Stage names to run; None runs every stage
+            rubric: Rubric (or tenant name) for this request
+            word_timestamps: Word-level (start, end) times for pace analysis
+            profile: Capture a sampling profile of this evaluation (stages run
+                on executor threads, so every thread is sampled)
+            time_budget: Seconds the evaluation may take (see evaluate())
+            priority: Priority class for the shared backends (see evaluate())
+            
+        Returns:
+            Same structure as evaluate()
+        """
+        profiler = self._profiler_for(profile)
+        if profiler is None:
+            return await self._evaluate_async(transcript, duration_seconds, submission_id,
+                                              stages, rubric, word_timestamps, time_budget, priority)
+        
+        with profiler.capture(submission_id or 'request', mode='sampling', all_threads=True) as report:
+            results = await self._evaluate_async(transcript, duration_seconds, submission_id,
+                                                 stages, rubric, word_timestamps, time_budget, priority)
+        results['profile'] = report
+        return results
+    
+    async def _evaluate_async(self, transcript, duration_seconds, submission_id, stages,
+                              rubric, word_timestamps, time_budget=None,
+                              priority=None) -> Dict[str, Any]:
+        """Asynchronous pipeline run (evaluate_async() without profiling)."""
+        deadline = Deadline(time_budget) if time_budget is not None else None
+        context = self._new_context(transcript, duration_seconds, rubric, word_timestamps, priority)
+        await self.pipeline.run_async(context, stages, io_executor=self._get_io_executor(),
+                                      deadline=deadline)
+        executed = [name for name in self.pipeline.names() if name in context]
+        
+        return self._with_budget(self._compile_results(context, executed, submission_id),
+                                 context, deadline)
+    
+    def _new_context(
+        self,
+        transcript: str,
+        duration_seconds: int,
+        rubric: Optional[Union[str, RubricIndex]] = None,
+        word_timestamps: Any = None,
+        priority: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Create the pipeline context, pinning the rubric version for this request.
+        
+        The transcript is normalized and checked against the input limits
+        here, so every entry point (CLI, web, library) is bounded.
+        
+        Raises:
+            InputTooLarge: If the transcript exceeds the input limits
+            ValueError: If the priority class is unknown
+        """
+        transcript = normalize_transcript(transcript)
+        if priority is not None and priority not in SCHEDULER_CLASSES:
+            raise ValueError(f"Unknown priority class: {priority}")
+        if isinstance(rubric, str):
+            if self.rubric_registry is None:
+                raise ValueError(f"No rubric registry configured to look up '{rubric}'")
+            rubric = self.rubric_registry.get(rubric)
+        elif rubric is None:
+            rubric = self.rubric
+        if isinstance(rubric, ReloadableRubric):
+            rubric = rubric.current()
+        context = {
+            'transcript': transcript,
+            'duration_seconds': duration_seconds,
+            'rubric': rubric
+        }
+        if priority is not None:
+            context[PRIORITY_KEY] = priority
+        if word_timestamps is not None:
+            starts, ends = parse_word_timestamps(word_timestamps)
+            context['word_timestamps'] = (starts, ends)
+            if duration_seconds <= 0 and len(ends):
+                context['duration_seconds'] = round(float(ends.max()), 2)
+        return context
+    
+    def _compile_results(
+        self,
+        context: Dict[str, Any],
+        executed: List[str],
+        submission_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Assemble the result dict from the outputs of the executed stages."""
+        transcript = context['transcript']
+        
+        scores = {}
+        analysis = {}
+        total_score = 0
+        max_score = 0
+        for name in executed:
+            output = context[name]
+            section = self._sections.get(name)
+            if section is not None:
+                key, build = section
+                scores[key], score, maximum = build(output)
+            elif isinstance(output, dict) and 'score' in output and 'max_score' in output:
+                scores[name] = output
+                score, maximum = output['score'], output['max_score']
+            else:
+                # A skipped stage (fallback returned None) is listed under time_budget.degraded instead
+                if output is not None:
+                    analysis[name] = output
+                continue
+            total_score += score
+            max_score += maximum
+        
+        percentage = round((total_score / max_score) * 100, 1) if max_score else 0.0
         
         # Determine grade
         grade = self._calculate_grade(percentage)
@@ -136,59 +628,90 @@ class StudentEvaluator:
         results = {
             'transcript': transcript,
             'metadata': {
-                'word_count': word_count,
-                'sentence_count': sentence_count,
-                'duration_seconds': duration_seconds,
-                'wpm': speech_rate_results['wpm']
-            },
-            'scores': {
-                'content_and_structure': {
-                    'salutation_score': content_results['salutation']['score'],
-                    'keywords_score': content_results['keywords']['score'],
-                    'flow_score': content_results['flow']['score'],
-                    'total': content_results['total_score'],
-                    'max': content_results['max_score'],
-                    'percentage': content_results['percentage'],
-                    'details': content_results
-                },
-                'speech_rate': {
-                    'wpm': speech_rate_results['wpm'],
-                    'label': speech_rate_results['label'],
-                    'score': speech_rate_results['score'],
-                    'max': speech_rate_results['max_score']
-                },
-                'language_and_grammar': {
-                    'grammar_score': grammar_results['grammar']['score'],
-                    'vocabulary_score': grammar_results['vocabulary']['score'],
-                    'total': grammar_results['total_score'],
-                    'max': grammar_results['max_score'],
-                    'percentage': grammar_results['percentage'],
-                    'details': grammar_results
-                },
-                'clarity': {
-                    'filler_count': clarity_results['filler_count'],
-                    'filler_rate': clarity_results['filler_rate'],
-                    'score': clarity_results['score'],
-                    'max': clarity_results['max_score'],
-                    'details': clarity_results
-                },
-                'engagement': {
-                    'sentiment_compound_normalized': engagement_results.get('compound_normalized', 0),
-                    'sentiment_positive': engagement_results['sentiment_positive'],
-                    'interpretation': engagement_results['interpretation'],
-                    'score': engagement_results['score'],
-                    'max': engagement_results['max_score'],
-                    'details': engagement_results
-                }
+                'word_count': len(tokenize_words(transcript)),
+                'sentence_count': count_sentences(transcript),
+                'duration_seconds': context['duration_seconds'],
+                'wpm': context['speech_rate']['wpm'] if 'speech_rate' in context else None
             },
+            'scores': scores,
             'final_score': total_score,
             'max_score': max_score,
             'percentage': percentage,
-            'grade': grade
+            'grade': grade,
+            'stages': executed,
+            'rubric': context['rubric'].name,
+            'rubric_version': context['rubric'].version
         }
+        if analysis:
+            results['analysis'] = analysis
+        
+        if self.duplicate_index is not None:
+            print("Checking for near-duplicate submissions...")
+            submission_id = submission_id or uuid.uuid4().hex
+            results['duplicates'] = {
+                'submission_id': submission_id,
+                'threshold': self.duplicate_index.threshold,
+                'matches': self.duplicate_index.query_and_add(submission_id, transcript)
+            }
         
         return results
     
+    def _content_section(self, content_results: Dict[str, Any]) -> tuple:
+        """Build the content and structure score section; returns (section, score, max)."""
+        return {
+            'salutation_score': content_results['salutation']['score'],
+            'keywords_score': content_results['keywords']['score'],
+            'flow_score': content_results['flow']['score'],
+            'total': content_results['total_score'],
+            'max': content_results['max_score'],
+            'percentage': content_results['percentage'],
+            'details': content_results
+        }, content_results['total_score'], content_results['max_score']
+    
+    def _speech_rate_section(self, speech_rate_results: Dict[str, Any]) -> tuple:
+        """Build the speech rate score section; returns (section, score, max)."""
+        section = {
+            'wpm': speech_rate_results['wpm'],
+            'label': speech_rate_results['label'],
+            'score': speech_rate_results['score'],
+            'max': speech_rate_results['max_score']
+        }
+        if 'pace' in speech_rate_results:
+            section['pace'] = speech_rate_results['pace']
+        return section, speech_rate_results['score'], speech_rate_results['max_score']
+    
+    def _grammar_section(self, grammar_results: Dict[str, Any]) -> tuple:
+        """Build the language and grammar score section; returns (section, score, max)."""
+        return {
+            'grammar_score': grammar_results['grammar']['score'],
+            'vocabulary_score': grammar_results['vocabulary']['score'],
+            'total': grammar_results['total_score'],
+            'max': grammar_results['max_score'],
+            'percentage': grammar_results['percentage'],
+            'details': grammar_results
+        }, grammar_results['total_score'], grammar_results['max_score']
+    
+    def _clarity_section(self, clarity_results: Dict[str, Any]) -> tuple:
+        """Build the clarity score section; returns (section, score, max)."""
+        return {
+            'filler_count': clarity_results['filler_count'],
+            'filler_rate': clarity_results['filler_rate'],
+            'score': clarity_results['score'],
+            'max': clarity_results['max_score'],
+            'details': clarity_results
+        }, clarity_results['score'], clarity_results['max_score']
+    
+    def _engagement_section(self, engagement_results: Dict[str, Any]) -> tuple:
+        """Build the engagement score section; returns (section, score, max)."""
+        return {
+            'sentiment_compound_normalized': engagement_results.get('compound_normalized', 0),
+            'sentiment_positive': engagement_results['sentiment_positive'],
+            'interpretation': engagement_results['interpretation'],
+            'score': engagement_results['score'],
+            'max': engagement_results['max_score'],
+            'details': engagement_results
+        }, engagement_results['score'], engagement_results['max_score']
+    
     def _calculate_grade(self, percentage: float) -> str:
         """Calculate letter grade from percentage."""
         if percentage >= 90:
@@ -218,36 +741,63 @@ class StudentEvaluator:
         print(f"  Word Count: {results['metadata']['word_count']}")
         print(f"  Sentence Count: {results['metadata']['sentence_count']}")
         print(f"  Duration: {results['metadata']['duration_seconds']} seconds")
-        print(f"  Speech Rate: {results['metadata']['wpm']} WPM")
-        
-        print(f"\n📝 CONTENT & STRUCTURE (40 points)")
-        cs = results['scores']['content_and_structure']
-        print(f"  Salutation: {cs['salutation_score']}/5")
-        print(f"  Keywords: {cs['keywords_score']}/30")
-        print(f"  Flow: {cs['flow_score']}/5")
-        print(f"  Total: {cs['total']}/{cs['max']} ({cs['percentage']}%)")
-        
-        print(f"\n⚡ SPEECH RATE (10 points)")
-        sr = results['scores']['speech_rate']
-        print(f"  WPM: {sr['wpm']} ({sr['label']})")
-        print(f"  Score: {sr['score']}/{sr['max']}")
-        
-        print(f"\n📖 LANGUAGE & GRAMMAR (20 points)")
-        lg = results['scores']['language_and_grammar']
-        print(f"  Grammar: {lg['grammar_score']}/10")
-        print(f"  Vocabulary: {lg['vocabulary_score']}/10")
-        print(f"  Total: {lg['total']}/{lg['max']} ({lg['percentage']}%)")
-        
-        print(f"\n✨ CLARITY (15 points)")
-        cl = results['scores']['clarity']
-        print(f"  Filler Words: {cl['filler_count']} ({cl['filler_rate']}%)")
-        print(f"  Score: {cl['score']}/{cl['max']}")
-        
-        print(f"\n💫 ENGAGEMENT (15 points)")
-        eg = results['scores']['engagement']
-        print(f"  Sentiment: {eg['interpretation']}")
-        print(f"  Sentiment Score: {eg.get('sentiment_compound_normalized', eg.get('sentiment_positive', 0))}")
-        print(f"  Score: {eg['score']}/{eg['max']}")
+        if results['metadata']['wpm'] is not None:
+            print(f"  Speech Rate: {results['metadata']['wpm']} WPM")
+        print(f"  Rubric: {results['rubric']} (version {results['rubric_version']})")
+        if 'audio' in results and results['audio']['speech_seconds'] is not None:
+            audio = results['audio']
+            print(f"  Speaking Time: {audio['speech_seconds']} seconds "
+                  f"({audio['pause_count']} pauses, {audio['articulation_wpm']} WPM while speaking)")
+        
+        scores = results['scores']
+        
+        if 'content_and_structure' in scores:
+            print(f"\n📝 CONTENT & STRUCTURE (40 points)")
+            cs = scores['content_and_structure']
+            print(f"  Salutation: {cs['salutation_score']}/5")
+            print(f"  Keywords: {cs['keywords_score']}/30")
+            print(f"  Flow: {cs['flow_score']}/5")
+            print(f"  Total: {cs['total']}/{cs['max']} ({cs['percentage']}%)")
+        
+        if 'speech_rate' in scores:
+            print(f"\n⚡ SPEECH RATE (10 points)")
+            sr = scores['speech_rate']
+            print(f"  WPM: {sr['wpm']} ({sr['label']})")
+            if 'pace' in sr:
+                pace = sr['pace']
+                print(f"  Pace: {pace['wpm_min']}-{pace['wpm_max']} WPM "
+                      f"(variation {pace['wpm_variation']})")
+                print(f"  Pauses: {pace['pauses']['count']} "
+                      f"(longest {pace['pauses']['longest_seconds']}s)")
+            print(f"  Score: {sr['score']}/{sr['max']}")
+        
+        if 'language_and_grammar' in scores:
+            print(f"\n📖 LANGUAGE & GRAMMAR (20 points)")
+            lg = scores['language_and_grammar']
+            print(f"  Grammar: {lg['grammar_score']}/10")
+            print(f"  Vocabulary: {lg['vocabulary_score']}/10")
+            print(f"  Total: {lg['total']}/{lg['max']} ({lg['percentage']}%)")
+        
+        if 'clarity' in scores:
+            print(f"\n✨ CLARITY (15 points)")
+            cl = scores['clarity']
+            print(f"  Filler Words: {cl['filler_count']} ({cl['filler_rate']}%)")
+            print(f"  Score: {cl['score']}/{cl['max']}")
+        
+        if 'engagement' in scores:
+            print(f"\n💫 ENGAGEMENT (15 points)")
+            eg = scores['engagement']
+            print(f"  Sentiment: {eg['interpretation']}")
+            print(f"  Sentiment Score: {eg.get('sentiment_compound_normalized', eg.get('sentiment_positive', 0))}")
+            lowest = eg['details'].get('lowest_sentence')
+            if lowest is not None:
+                print(f"  Lowest Sentence: #{lowest['index'] + 1} ({lowest['compound_normalized']})")
+            print(f"  Score: {eg['score']}/{eg['max']}")
+        
+        if results.get('duplicates', {}).get('matches'):
+            print(f"\n⚠️ POSSIBLE DUPLICATES")
+            for match in results['duplicates']['matches'][:5]:
+                print(f"  {match['submission_id']}: {match['similarity']:.0%} similar")
         
         print(f"\n{'='*60}")
         print(f"🎯 FINAL SCORE: {results['final_score']}/{results['max_score']} ({results['percentage']}%)")
@@ -268,33 +818,108 @@ def main():
     parser.add_argument(
         '--duration',
         type=int,
-        required=True,
-        help='Duration of speech in seconds'
+        help='Duration of speech in seconds (measured automatically with --audio)'
+    )
+    parser.add_argument(
+        '--audio',
+        type=str,
+        help='Path to a WAV/FLAC recording to evaluate instead of a duration'
+    )
+    parser.add_argument(
+        '--timestamps',
+        type=str,
+        help='ASR JSON file with word-level start/end times (adds a pace timeline)'
+    )
+    parser.add_argument(
+        '--vosk-model',
+        type=str,
+        help='Vosk model directory for transcribing --audio (default: read <audio>.txt)'
+    )
+    parser.add_argument(
+        '--stages',
+        type=str,
+        help='Comma-separated stages to run (e.g. speech_rate,clarity); default runs all'
+    )
+    parser.add_argument(
+        '--rubric',
+        type=str,
+        help='Path to a JSON/YAML rubric file (default: rubric in config.py)'
+    )
+    parser.add_argument(
+        '--engagement-mode',
+        choices=ENGAGEMENT_MODES,
+        default='document',
+        help="Score sentiment per 'document' or per 'sentence' (adds an engagement curve)"
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='cprofile',
+        choices=PROFILE_MODES,
+        help='Profile the evaluation (cprofile -> .pstats, sampling -> collapsed stacks)'
     )
     parser.add_argument(
         '--output',
         type=str,
         help='Output JSON file path (optional)'
     )
+    parser.add_argument(
+        '--store',
+        type=str,
+        help='SQLite evaluation store to record the result in (see store.py)'
+    )
+    parser.add_argument('--student-id', type=str, help='Student the result is recorded for (with --store)')
+    parser.add_argument('--school', type=str, help='School of the student (with --store)')
+    parser.add_argument('--class', dest='class_name', type=str, help='Class of the student (with --store)')
+    parser.add_argument('--term', type=str, help='Term or assessment period (with --store)')
     
     args = parser.parse_args()
+    if args.audio is None and (args.transcript is None or
+                               (args.duration is None and args.timestamps is None)):
+        parser.error('--transcript and --duration (or --timestamps) are required unless --audio is given')
     
     # Load transcript
-    transcript_path = Path(args.transcript)
-    if transcript_path.exists() and transcript_path.is_file():
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            transcript = f.read()
-        print(f"Loaded transcript from: {transcript_path}")
-    else:
-        transcript = args.transcript
-        print("Using provided transcript text")
+    transcript = None
+    if args.transcript is not None:
+        transcript_path = Path(args.transcript)
+        if transcript_path.exists() and transcript_path.is_file():
+            with open(transcript_path, 'r', encoding='utf-8') as f:
+                transcript = f.read()
+            print(f"Loaded transcript from: {transcript_path}")
+        else:
+            transcript = args.transcript
+            print("Using provided transcript text")
     
     # Create evaluator and run analysis
-    evaluator = StudentEvaluator()
-    results = evaluator.evaluate(transcript, args.duration)
+    rubric = RubricIndex.from_file(args.rubric) if args.rubric else None
+    transcriber = None
+    if args.vosk_model:
+        from .ingestion import VoskTranscriber
+        transcriber = VoskTranscriber(args.vosk_model)
+    stages = args.stages.split(',') if args.stages else None
+    word_timestamps = load_word_timestamps(args.timestamps) if args.timestamps else None
+    profiler = RequestProfiler(mode=args.profile) if args.profile else None
+    with StudentEvaluator(rubric=rubric, transcriber=transcriber,
+                          engagement_mode=args.engagement_mode, profiler=profiler) as evaluator:
+        if args.audio:
+            results = evaluator.evaluate_audio(args.audio, transcript, stages=stages,
+                                               word_timestamps=word_timestamps,
+                                               profile=profiler is not None)
+        else:
+            results = evaluator.evaluate(transcript, args.duration or 0, stages=stages,
+                                         word_timestamps=word_timestamps,
+                                         profile=profiler is not None)
+        
+        # Print summary
+        evaluator.print_summary(results)
     
-    # Print summary
-    evaluator.print_summary(results)
+    if 'profile' in results:
+        profile = results['profile']
+        print(f"\n⏱️ Profile ({profile['mode']}, {profile['seconds']}s) saved to: {profile['path']}")
+        for row in profile['top'][:10]:
+            detail = (f"{row['self_seconds']}s self" if 'self_seconds' in row
+                      else f"{row['share']:.0%} of samples")
+            print(f"  {detail:>18}  {row['function']}")
     
     # Save to file if requested
     if args.output:
@@ -303,6 +928,13 @@ def main():
             json.dump(results, f, indent=2, ensure_ascii=False)
         print(f"✅ Results saved to: {output_path}")
     
+    if args.store:
+        from .store import EvaluationStore
+        with EvaluationStore(args.store, batch_size=1) as store:
+            store.add(results, student_id=args.student_id, school=args.school,
+                      class_name=args.class_name, term=args.term)
+        print(f"💾 Recorded in evaluation store: {args.store}")
+    
     return results
 
 
@@ -0,0 +1,345 @@
+"""
+Analyzer pipeline with registered stages.
+
+Each stage is a named step that declares which context values it reads
+(`inputs`) and stores its result in the context under its own name. Callers
+can run a subset of stages; stages that a requested stage depends on are
+pulled in automatically and everything else is skipped entirely.
+
+A run can be given a `Deadline`. Stages with a `fallback` (a cheaper
+approximation with the same inputs) are then degraded instead of overrunning
+it: the fallback runs when the stage's typical duration no longer fits the
+remaining budget, or when the stage has not finished by the time the budget
+runs out. Degraded stages are recorded in the context under DEGRADED_KEY.
+
+Stages that call a shared backend can be given a `scheduler`; they then
+wait for a slot of the request's priority class (PRIORITY_KEY in the
+context) before running. Under a deadline they wait at most until it
+expires, and a stage abandoned on timeout never takes a slot afterwards.
+"""
+
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from .utils.scheduler import SchedulerTimeout
+
+
+# Values supplied by the caller rather than produced by a stage
+BASE_INPUTS = ('transcript', 'duration_seconds')
+
+# Context key listing the stages that ran their fallback, with the reason
+DEGRADED_KEY = 'degraded'
+
+# Context key naming the request's priority class for stage schedulers
+PRIORITY_KEY = 'priority'
+
+# Weight of the newest duration in each stage's moving average
+COST_SMOOTHING = 0.2
+# Shrink factor applied to a stage's estimate each time it is skipped, so a
+# stage that was slow once is retried rather than degraded forever
+COST_DECAY = 0.9
+
+
+class Deadline:
+    """A time budget measured from creation."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = time.perf_counter()
+        self.expires = self.started + seconds
+
+    def remaining(self) -> float:
+        """Seconds left (negative once expired)."""
+        return self.expires - time.perf_counter()
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+
+class PipelineStage:
+    """A named analysis step with declared inputs and a single output."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Any],
+        inputs: Iterable[str] = ('transcript',),
+        optional_inputs: Iterable[str] = (),
+        label: Optional[str] = None,
+        io_bound: bool = False,
+        fallback: Optional[Callable[..., Any]] = None,
+        scheduler: Any = None
+    ):
+        """
+        Args:
+            name: Stage name; its result is stored in the context under this key
+            func: Callable receiving the declared inputs positionally, in order
+            inputs: Context keys that must be available (other stages' names
+                are resolved as dependencies)
+            optional_inputs: Context keys passed as keyword arguments only
+                when present (never pulled in as dependencies)
+            label: Progress message printed when the stage runs
+            io_bound: Stage mostly waits on an external service (run on the
+                I/O executor by run_async)
+            fallback: Cheaper approximation called with the same arguments
+                when a deadline leaves too little time for `func`
+            scheduler: PriorityScheduler guarding the backend `func` uses
+                (the fallback runs without a slot)
+        """
+        self.name = name
+        self.func = func
+        self.inputs = tuple(inputs)
+        self.optional_inputs = tuple(optional_inputs)
+        self.label = label
+        self.io_bound = io_bound
+        self.fallback = fallback
+        self.scheduler = scheduler
+
+    def run(self, context: Dict[str, Any], degraded: bool = False,
+            deadline: Optional['Deadline'] = None) -> Any:
+        """
+        Run the stage (or its fallback) against a context and return its output.
+
+        Raises:
+            SchedulerTimeout: If `deadline` expires before the stage gets a
+                scheduler slot
+        """
+        args = [context[key] for key in self.inputs]
+        kwargs = {key: context[key] for key in self.optional_inputs if key in context}
+        if degraded:
+            return self.fallback(*args, **kwargs)
+        if self.scheduler is None:
+            return self.func(*args, **kwargs)
+        timeout = None
+        if deadline is not None:
+            timeout = deadline.remaining()
+            if timeout <= 0:
+                raise SchedulerTimeout(f"Deadline passed before '{self.name}' was scheduled")
+        with self.scheduler.slot(context.get(PRIORITY_KEY), timeout=timeout):
+            return self.func(*args, **kwargs)
+
+    def __repr__(self) -> str:
+        return f"PipelineStage({self.name!r}, inputs={self.inputs})"
+
+
+class Pipeline:
+    """Ordered registry of stages; registration order is execution order."""
+
+    def __init__(self):
+        self._stages = OrderedDict()
+        # Stage name -> moving average of its duration in seconds; concurrent
+        # runs (threads, run_async, abandoned stages) all update it
+        self._costs = {}
+        self._costs_lock = threading.Lock()
+
+    def register(self, stage: PipelineStage, replace: bool = False):
+        """
+        Add a stage to the end of the pipeline.
+
+        Args:
+            stage: Stage to register
+            replace: Allow replacing an existing stage with the same name
+                (it keeps its original position)
+
+        Raises:
+            ValueError: On duplicate names or inputs no earlier stage produces
+        """
+        if stage.name in self._stages and not replace:
+            raise ValueError(f"Stage '{stage.name}' is already registered")
+        available = set(BASE_INPUTS) | (set(self._stages) - {stage.name})
+        missing = [key for key in stage.inputs if key not in available]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown inputs: {missing}")
+        self._stages[stage.name] = stage
+
+    def names(self) -> List[str]:
+        """Return registered stage names in execution order."""
+        return list(self._stages)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._stages
+
+    def resolve(self, requested: Optional[Iterable[str]] = None) -> List[PipelineStage]:
+        """
+        Work out which stages to run for a request.
+
+        Args:
+            requested: Stage names to run, or None for every stage
+
+        Returns:
+            Requested stages plus their dependencies, in execution order
+
+        Raises:
+            ValueError: If an unknown stage is requested
+        """
+        if requested is None:
+            return list(self._stages.values())
+
+        requested = set(requested)
+        unknown = requested - set(self._stages)
+        if unknown:
+            raise ValueError(
+                f"Unknown stages: {sorted(unknown)}. Available: {self.names()}"
+            )
+
+        selected = set()
+        pending = list(requested)
+        while pending:
+            name = pending.pop()
+            if name in selected:
+                continue
+            selected.add(name)
+            pending.extend(key for key in self._stages[name].inputs if key in self._stages)
+
+        return [stage for name, stage in self._stages.items() if name in selected]
+
+    def costs(self) -> Dict[str, float]:
+        """Moving-average duration of each stage, in seconds."""
+        with self._costs_lock:
+            return {name: round(cost, 4) for name, cost in self._costs.items()}
+
+    def _timed_run(self, stage: PipelineStage, context: Dict[str, Any],
+                   deadline: Optional[Deadline] = None) -> Any:
+        """Run a stage and fold its duration into the stage's moving average."""
+        started = time.perf_counter()
+        output = stage.run(context, deadline=deadline)
+        duration = time.perf_counter() - started
+        with self._costs_lock:
+            previous = self._costs.get(stage.name)
+            self._costs[stage.name] = duration if previous is None else (
+                previous + COST_SMOOTHING * (duration - previous)
+            )
+        return output
+
+    def _degrade(self, stage: PipelineStage, context: Dict[str, Any], reason: str) -> Any:
+        context.setdefault(DEGRADED_KEY, {})[stage.name] = reason
+        return stage.run(context, degraded=True)
+
+    def _predicts_overrun(self, stage: PipelineStage, available: float) -> bool:
+        """True if the stage typically takes longer than `available` (its estimate then decays)."""
+        with self._costs_lock:
+            cost = self._costs.get(stage.name)
+            if cost is None or cost <= available:
+                return False
+            self._costs[stage.name] = cost * COST_DECAY
+            return True
+
+    def _reserve(self, stages: List[PipelineStage]) -> float:
+        """Estimated time of the stages that cannot be degraded."""
+        with self._costs_lock:
+            return sum(self._costs.get(stage.name, 0.0) for stage in stages if stage.fallback is None)
+
+    def run(self, context: Dict[str, Any],
+            requested: Optional[Iterable[str]] = None,
+            deadline: Optional[Deadline] = None,
+            executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """
+        Run the resolved stages, adding each output to the context.
+
+        Args:
+            context: Initial values (at least the BASE_INPUTS)
+            requested: Stage names to run, or None for every stage
+            deadline: Time budget; stages with a fallback are degraded to
+                stay within it
+            executor: Runs stages with a fallback under a deadline, so they
+                can be abandoned when the budget runs out (without one, a
+                started stage always completes)
+
+        Returns:
+            The same context, updated with one entry per executed stage
+        """
+        stages = self.resolve(requested)
+        for position, stage in enumerate(stages):
+            if stage.label:
+                print(stage.label)
+            if deadline is None or stage.fallback is None:
+                context[stage.name] = self._timed_run(stage, context)
+                continue
+            # Keep time for the later stages that cannot be degraded
+            available = deadline.remaining() - self._reserve(stages[position + 1:])
+            if self._predicts_overrun(stage, available):
+                context[stage.name] = self._degrade(stage, context, 'predicted')
+                continue
+            try:
+                if executor is None:
+                    context[stage.name] = self._timed_run(stage, context, deadline)
+                else:
+                    future = executor.submit(self._timed_run, stage, context, deadline)
+                    context[stage.name] = future.result(timeout=max(available, 0.0))
+            except SchedulerTimeout:
+                context[stage.name] = self._degrade(stage, context, 'queue')
+            except FutureTimeoutError:
+                # An abandoned call that already holds its slot finishes in the
+                # background and still updates the cost estimate; one still
+                # queued gives up at the deadline without taking a slot
+                context[stage.name] = self._degrade(stage, context, 'timeout')
+        return context
+
+    async def run_async(
+        self,
+        context: Dict[str, Any],
+        requested: Optional[Iterable[str]] = None,
+        io_executor: Optional[Executor] = None,
+        cpu_executor: Optional[Executor] = None,
+        deadline: Optional[Deadline] = None
+    ) -> Dict[str, Any]:
+        """
+        Run the resolved stages concurrently on executors.
+
+        Each stage starts as soon as the stages it reads have finished, so
+        independent stages (e.g. the grammar server call and sentiment
+        analysis) overlap instead of running back to back.
+
+        Args:
+            context: Initial values (at least the BASE_INPUTS)
+            requested: Stage names to run, or None for every stage
+            io_executor: Executor for io_bound stages (loop default if None)
+            cpu_executor: Executor for all other stages (loop default if None)
+            deadline: Time budget; a stage with a fallback that is predicted
+                to overrun it, or is still running when it expires, is
+                replaced by its fallback
+
+        Returns:
+            The same context, updated with one entry per executed stage
+        """
+        loop = asyncio.get_running_loop()
+        tasks = {}
+
+        async def run_stage(stage: PipelineStage):
+            dependencies = [
+                tasks[key] for key in stage.inputs + stage.optional_inputs if key in tasks
+            ]
+            if dependencies:
+                await asyncio.gather(*dependencies)
+            if stage.label:
+                print(stage.label)
+            executor = io_executor if stage.io_bound else cpu_executor
+            if deadline is None or stage.fallback is None:
+                context[stage.name] = await loop.run_in_executor(executor, self._timed_run, stage, context)
+                return
+            # Stages overlap here, so each may use whatever budget remains
+            available = deadline.remaining()
+            if self._predicts_overrun(stage, available):
+                context[stage.name] = self._degrade(stage, context, 'predicted')
+                return
+            future = loop.run_in_executor(executor, self._timed_run, stage, context, deadline)
+            try:
+                context[stage.name] = await asyncio.wait_for(asyncio.shield(future), max(available, 0.0))
+            except SchedulerTimeout:
+                context[stage.name] = self._degrade(stage, context, 'queue')
+            except asyncio.TimeoutError:
+                # Retrieve the abandoned call's outcome so a late
+                # SchedulerTimeout is not reported as never retrieved
+                future.add_done_callback(lambda done: done.cancelled() or done.exception())
+                context[stage.name] = self._degrade(stage, context, 'timeout')
+
+        # Registration order is topological, so dependencies get their task first
+        for stage in self.resolve(requested):
+            tasks[stage.name] = asyncio.ensure_future(run_stage(stage))
+        if tasks:
+            await asyncio.gather(*tasks.values())
+        return context
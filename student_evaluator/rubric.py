@@ -0,0 +1,472 @@
+"""
+Precompiled rubric.
+
+`RubricIndex` compiles the raw rubric data (by default the constants in
+config.py) once: keyword and closing regexes are compiled, salutation
+phrases go into a trie, filler patterns are built, and score tables are
+frozen. Analyzers read everything from the index instead of re-interpreting
+strings on every call.
+
+Rubrics can also be loaded from JSON or YAML files; `ReloadableRubric`
+watches such a file and swaps in a new index when it changes, without
+restarting workers. Every index carries a version string derived from its
+content, which is recorded in evaluation results so cached results can be
+invalidated when the rubric changes.
+
+Every regex is validated as it is compiled (see utils/safety.py): patterns
+that could backtrack catastrophically on adversarial transcripts are
+rejected with UnsafePattern instead of being served.
+
+`RubricRegistry` serves many rubrics from one process (one per school or
+tenant), keeping an LRU of compiled indexes keyed by (tenant, version).
+"""
+
+import copy
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Union
+
+from . import config
+from .utils.safety import compile_pattern, UnsafePattern
+
+
+SALUTATION_LEVELS = ('excellent', 'good', 'normal')
+
+# Top-level keys of a rubric document
+RUBRIC_KEYS = (
+    'salutations',
+    'salutation_scores',
+    'must_have_keywords',
+    'good_to_have_keywords',
+    'closing_phrases',
+    'filler_words',
+    'speech_rate_ranges',
+    'vocabulary',
+    'max_scores'
+)
+
+# Sections merged key by key over the defaults (the others replace them whole)
+MERGED_KEYS = ('salutations', 'salutation_scores', 'vocabulary', 'max_scores')
+
+
+def default_rubric_data() -> Dict[str, Any]:
+    """Return the rubric defined by the constants in config.py."""
+    return {
+        'version': 'default',
+        'salutations': {
+            'excellent': list(config.SALUTATION_EXCELLENT),
+            'good': list(config.SALUTATION_GOOD),
+            'normal': list(config.SALUTATION_NORMAL)
+        },
+        'salutation_scores': dict(config.SALUTATION_SCORES),
+        'must_have_keywords': copy.deepcopy(config.MUST_HAVE_KEYWORDS),
+        'good_to_have_keywords': copy.deepcopy(config.GOOD_TO_HAVE_KEYWORDS),
+        'closing_phrases': list(config.CLOSING_PHRASES),
+        'filler_words': list(config.FILLER_WORDS),
+        'speech_rate_ranges': copy.deepcopy(config.SPEECH_RATE_RANGES),
+        'vocabulary': dict(config.VOCABULARY),
+        'max_scores': dict(config.MAX_SCORES)
+    }
+
+
+class PhraseTrie:
+    """Character trie that finds every listed phrase occurring in a text."""
+
+    _END = ''
+
+    def __init__(self, phrases: List[str]):
+        self.root = {}
+        for phrase in phrases:
+            node = self.root
+            for char in phrase:
+                node = node.setdefault(char, {})
+            node[self._END] = phrase
+
+    def find_all(self, text: str) -> set:
+        """
+        Return the phrases that occur anywhere in `text` (substring semantics).
+
+        Args:
+            text: Text to scan (already lower-cased)
+
+        Returns:
+            Set of matched phrases
+        """
+        found = set()
+        root = self.root
+        for start in range(len(text)):
+            node = root.get(text[start])
+            position = start + 1
+            while node is not None:
+                if self._END in node:
+                    found.add(node[self._END])
+                if position >= len(text):
+                    break
+                node = node.get(text[position])
+                position += 1
+        return found
+
+
+def _freeze(value: Any) -> Any:
+    """Recursively convert dicts/lists into read-only mappings/tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({k: _freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class RubricIndex:
+    """Immutable, compiled form of a rubric."""
+
+    def __init__(self, data: Optional[Dict[str, Any]] = None):
+        """
+        Compile a rubric.
+
+        Args:
+            data: Rubric document; missing sections fall back to config.py
+                and score tables may override individual entries
+
+        Raises:
+            ValueError: If the document has unknown sections
+            UnsafePattern: If a pattern is invalid, too long or unsafe
+        """
+        merged = default_rubric_data()
+        if data:
+            unknown = set(data) - set(RUBRIC_KEYS) - {'version', 'name'}
+            if unknown:
+                raise ValueError(f"Unknown rubric sections: {sorted(unknown)}")
+            for key, value in copy.deepcopy(data).items():
+                if key in MERGED_KEYS and isinstance(value, dict):
+                    merged[key].update(value)
+                else:
+                    merged[key] = value
+        data = _normalize(merged)
+
+        canonical = json.dumps(_jsonable(data), sort_keys=True).encode('utf-8')
+        digest = hashlib.sha256(canonical).hexdigest()[:12]
+        declared = data.get('version')
+        version = f"{declared}-{digest}" if declared and declared != 'default' else digest
+
+        salutations = data['salutations']
+        phrases = [p for level in SALUTATION_LEVELS for p in salutations.get(level, [])]
+        _check_phrases(phrases + list(data['filler_words']))
+
+        set_ = object.__setattr__
+        set_(self, 'name', data.get('name', 'default'))
+        set_(self, 'version', version)
+        set_(self, 'data', _freeze(data))
+        set_(self, 'salutations', _freeze({
+            level: salutations.get(level, []) for level in SALUTATION_LEVELS
+        }))
+        set_(self, 'salutation_trie', PhraseTrie(phrases))
+        set_(self, 'salutation_scores', _freeze(data['salutation_scores']))
+        set_(self, 'must_have_keywords', _compile_keywords(data['must_have_keywords']))
+        set_(self, 'good_to_have_keywords', _compile_keywords(data['good_to_have_keywords']))
+        set_(self, 'closing_patterns', tuple(compile_pattern(p) for p in data['closing_phrases']))
+        set_(self, 'filler_patterns', tuple(
+            # Multi-word fillers are counted as plain substrings, single words
+            # with word boundaries
+            (filler, None if ' ' in filler else re.compile(r'\b' + re.escape(filler) + r'\b'))
+            for filler in data['filler_words']
+        ))
+        set_(self, 'speech_rate_ranges', _freeze(data['speech_rate_ranges']))
+        set_(self, 'vocabulary', _freeze(data['vocabulary']))
+        set_(self, 'max_scores', _freeze(data['max_scores']))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RubricIndex is immutable")
+
+    def __repr__(self) -> str:
+        return f"RubricIndex(name={self.name!r}, version={self.version!r})"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the rubric as a plain JSON-serializable document."""
+        return _jsonable(self.data)
+
+    def save(self, path: str):
+        """Write the normalized rubric to a JSON file (loadable with from_file)."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2, ensure_ascii=False)
+
+    @classmethod
+    def from_file(cls, path: str) -> 'RubricIndex':
+        """
+        Load and compile a rubric from a JSON or YAML file.
+
+        Args:
+            path: Path ending in .json, .yaml or .yml
+
+        Returns:
+            Compiled rubric
+        """
+        return cls(load_rubric_file(path))
+
+
+def load_rubric_file(path: str) -> Dict[str, Any]:
+    """Parse a JSON or YAML rubric document."""
+    path = Path(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.suffix.lower() in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("PyYAML is required to load YAML rubrics (pip install pyyaml)")
+            data = yaml.safe_load(f)
+        else:
+            data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError(f"Rubric file {path} must contain a mapping")
+    return data
+
+
+def _compile_keywords(keywords: Dict[str, Any]) -> tuple:
+    """Compile keyword groups into (name, patterns, score) tuples."""
+    return tuple(
+        (name, tuple(compile_pattern(p) for p in group['patterns']), group['score'])
+        for name, group in keywords.items()
+    )
+
+
+def _check_phrases(phrases: List[str]):
+    """Reject non-string or overlong literal phrases (salutations, fillers)."""
+    for phrase in phrases:
+        if not isinstance(phrase, str) or not phrase:
+            raise UnsafePattern(f"Phrases must be non-empty strings, got {phrase!r}")
+        if len(phrase) > config.RUBRIC_MAX_PATTERN_LENGTH:
+            raise UnsafePattern(
+                f"Phrase is longer than {config.RUBRIC_MAX_PATTERN_LENGTH} characters: {phrase[:40]!r}..."
+            )
+
+
+def _normalize(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Fill in open-ended speech rate ranges (null max in JSON/YAML means no
+    limit) and check the vocabulary metric.
+    """
+    for band in data['speech_rate_ranges']:
+        if band.get('max') is None:
+            band['max'] = float('inf')
+    metric = data['vocabulary'].get('metric')
+    if metric not in config.VOCABULARY_METRICS:
+        raise ValueError(f"Unknown vocabulary metric '{metric}'. Choose from {config.VOCABULARY_METRICS}")
+    return data
+
+
+def _jsonable(value: Any) -> Any:
+    """Convert frozen structures (and infinity) back to plain JSON types."""
+    if isinstance(value, (dict, MappingProxyType)):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, float) and value == float('inf'):
+        return None
+    return value
+
+
+_default_rubric = None
+
+
+def default_rubric() -> RubricIndex:
+    """Return the shared compiled rubric built from config.py."""
+    global _default_rubric
+    if _default_rubric is None:
+        _default_rubric = RubricIndex()
+    return _default_rubric
+
+
+class ReloadableRubric:
+    """
+    Rubric file that is recompiled when it changes on disk.
+
+    The file's modification time is checked at most every `check_interval`
+    seconds. A file that fails to load keeps the previous index in service.
+    """
+
+    def __init__(self, path: str, check_interval: float = config.RUBRIC_RELOAD_INTERVAL_SECONDS):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = self.path.stat().st_mtime
+        self._index = RubricIndex.from_file(str(self.path))
+        self._checked = time.monotonic()
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def current(self) -> RubricIndex:
+        """Return the current index, reloading the file first if it changed."""
+        now = time.monotonic()
+        if now - self._checked < self.check_interval:
+            return self._index
+
+        with self._lock:
+            if now - self._checked < self.check_interval:
+                return self._index
+            self._checked = now
+            try:
+                mtime = self.path.stat().st_mtime
+                if mtime != self._mtime:
+                    self._index = RubricIndex.from_file(str(self.path))
+                    self._mtime = mtime
+                    print(f"🔄 Reloaded rubric {self.path} (version {self._index.version})")
+            except Exception as e:
+                print(f"⚠️ Could not reload rubric {self.path}: {e}")
+        return self._index
+
+
+RUBRIC_FILE_SUFFIXES = ('.json', '.yaml', '.yml')
+
+# Tenant names double as file names, so keep them to a safe character set
+_TENANT_RE = re.compile(r'^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,63}$')
+
+
+class UnknownRubric(LookupError):
+    """Raised when no rubric is registered or stored for a tenant."""
+
+
+class RubricRegistry:
+    """
+    Compiled rubrics for many tenants, shared by every request in a process.
+
+    Rubrics come from `register()` or from files named `<tenant>.json`
+    (or .yaml/.yml) in `rubric_dir`. File-backed rubrics are compiled on
+    first use and cached under (tenant, version); when a file changes, the
+    new version is compiled once and the old entry ages out of the LRU.
+    """
+
+    def __init__(
+        self,
+        rubric_dir: Optional[str] = None,
+        max_size: int = config.RUBRIC_CACHE_SIZE,
+        check_interval: float = config.RUBRIC_RELOAD_INTERVAL_SECONDS
+    ):
+        """
+        Args:
+            rubric_dir: Directory of per-tenant rubric files (optional)
+            max_size: Compiled file-backed rubrics kept in memory
+            check_interval: Seconds between checks of a tenant file for changes
+        """
+        self.rubric_dir = Path(rubric_dir) if rubric_dir else None
+        self.max_size = max_size
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._registered = {}
+        self._cache = OrderedDict()
+        # tenant -> (path, mtime, version, last checked)
+        self._sources = {}
+        self._hits = 0
+        self._compiles = 0
+
+    def register(self, tenant: str, rubric: Union[RubricIndex, Dict[str, Any]]) -> RubricIndex:
+        """
+        Register an in-memory rubric for a tenant (never evicted).
+
+        Args:
+            tenant: Tenant name
+            rubric: Compiled rubric or rubric document
+
+        Returns:
+            The compiled rubric
+        """
+        self._check_name(tenant)
+        if not isinstance(rubric, RubricIndex):
+            rubric = RubricIndex({'name': tenant, **rubric})
+        with self._lock:
+            self._registered[tenant] = rubric
+        return rubric
+
+    def get(self, tenant: str) -> RubricIndex:
+        """
+        Return the current compiled rubric for a tenant.
+
+        Args:
+            tenant: Tenant name
+
+        Returns:
+            Compiled rubric
+
+        Raises:
+            UnknownRubric: If the tenant has no registered rubric or file
+        """
+        self._check_name(tenant)
+        with self._lock:
+            if tenant in self._registered:
+                return self._registered[tenant]
+
+            now = time.monotonic()
+            source = self._sources.get(tenant)
+            if source is not None:
+                path, mtime, version, checked = source
+                if now - checked >= self.check_interval:
+                    try:
+                        current_mtime = path.stat().st_mtime
+                    except OSError:
+                        current_mtime = None
+                    if current_mtime != mtime:
+                        source = None
+                    else:
+                        self._sources[tenant] = (path, mtime, version, now)
+                if source is not None:
+                    index = self._cache.get((tenant, version))
+                    if index is not None:
+                        self._cache.move_to_end((tenant, version))
+                        self._hits += 1
+                        return index
+
+            path = self._find_file(tenant)
+            mtime = path.stat().st_mtime
+            data = load_rubric_file(str(path))
+            data.setdefault('name', tenant)
+            index = RubricIndex(data)
+            self._compiles += 1
+            self._sources[tenant] = (path, mtime, index.version, now)
+            self._cache[(tenant, index.version)] = index
+            self._cache.move_to_end((tenant, index.version))
+            while len(self._cache) > self.max_size:
+                evicted_tenant, evicted_version = self._cache.popitem(last=False)[0]
+                source = self._sources.get(evicted_tenant)
+                if source is not None and source[2] == evicted_version:
+                    del self._sources[evicted_tenant]
+            return index
+
+    def tenants(self) -> List[str]:
+        """Return tenants with a registered rubric or a rubric file."""
+        names = set(self._registered)
+        if self.rubric_dir is not None and self.rubric_dir.is_dir():
+            names.update(
+                p.stem for p in self.rubric_dir.iterdir()
+                if p.suffix.lower() in RUBRIC_FILE_SUFFIXES and _TENANT_RE.match(p.stem)
+            )
+        return sorted(names)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        with self._lock:
+            return {
+                'registered': len(self._registered),
+                'cached': len(self._cache),
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'compiles': self._compiles
+            }
+
+    def _find_file(self, tenant: str) -> Path:
+        if self.rubric_dir is not None:
+            for suffix in RUBRIC_FILE_SUFFIXES:
+                path = self.rubric_dir / f"{tenant}{suffix}"
+                if path.is_file():
+                    return path
+        raise UnknownRubric(f"No rubric found for '{tenant}'")
+
+    @staticmethod
+    def _check_name(tenant: str):
+        if not isinstance(tenant, str) or not _TENANT_RE.match(tenant):
+            raise UnknownRubric(f"Invalid rubric name: {tenant!r}")
@@ -0,0 +1,443 @@
+"""
+Shared request handling for the web servers.
+
+Both the Flask app (web_app.py) and the ASGI app (asgi_app.py) build their
+evaluator and validate /evaluate requests through these helpers, so the two
+entry points behave identically.
+"""
+
+import hmac
+import json
+import os
+import re
+from typing import Dict, Any, Optional
+
+from .main import StudentEvaluator
+from .analytics import CohortAnalytics, UnknownCohort
+from .store import EvaluationStore
+from .config import (
+    PROFILE_DIR,
+    MAX_TIME_BUDGET_SECONDS,
+    SCHEDULER_CLASSES,
+    SCHEDULER_DEFAULT_PRIORITY,
+    ADMISSION_TRUSTED_PROXIES
+)
+from .rubric import ReloadableRubric, RubricRegistry, UnknownRubric
+from .utils.pace import parse_word_timestamps
+from .utils.safety import normalize_transcript, InputTooLarge
+from .utils.memory import MemorySampler
+from .utils.profiling import RequestProfiler
+from .utils.duplicates import DuplicateIndex
+
+
+SAMPLE_TRANSCRIPT = """Hello everyone, myself Muskan, studying in class 8th B section from Christ Public School. 
+I am 13 years old. I live with my family. There are 3 people in my family, me, my mother and my father.
+One special thing about my family is that they are very kind hearted to everyone and soft spoken. One thing I really enjoy is play, playing cricket and taking wickets.
+A fun fact about me is that I see in mirror and talk by myself. One thing people don't know about me is that I once stole a toy from one of my cousin.
+My favorite subject is science because it is very interesting. Through science I can explore the whole world and make the discoveries and improve the lives of others. 
+Thank you for listening."""
+
+SAMPLE_DURATION = 52
+
+SUBMISSION_ID_PATTERN = re.compile(r'[A-Za-z0-9._:-]{1,64}')
+
+
+class InvalidRequest(Exception):
+    """Raised for malformed /evaluate requests (HTTP 400)."""
+
+    status = 400
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class Forbidden(InvalidRequest):
+    """Raised when a request asks for something its caller may not use (HTTP 403)."""
+
+    status = 403
+
+
+class Conflict(InvalidRequest):
+    """Raised when a request reuses an identifier that is already taken (HTTP 409)."""
+
+    status = 409
+
+
+def create_evaluator() -> StudentEvaluator:
+    """
+    Build the server's evaluator from environment variables.
+
+    The PyTorch semantic backend is disabled for deployment (build time 10min
+    vs 2min, memory 1.5GB vs 300MB). SEMANTIC_BACKEND=onnx (with an exported
+    model in SEMANTIC_MODEL_PATH) enables semantic scoring through the
+    lightweight onnxruntime backend instead.
+
+    Other switches:
+        DUPLICATE_DETECTION=1  flag near-duplicate (copied template) submissions
+        DUPLICATE_INDEX_PATH=<file>  load the duplicate index from this file
+                               and save it back when the server stops
+        MICRO_BATCHING=1       coalesce concurrent grammar/semantic calls
+                               (use with a threaded or async server)
+        RUBRIC_PATH=<file>     score against a JSON/YAML rubric, reloaded
+                               automatically when the file changes
+        RUBRIC_DIR=<dir>       per-school rubrics (<dir>/<name>.json or .yaml)
+                               selected with the request's "rubric" field
+        ENGAGEMENT_MODE=sentence  cached per-sentence sentiment with an
+                               engagement curve
+        SEMANTIC_CATEGORIES=1  credit rubric keywords detected from sentence
+                               embeddings (needs SEMANTIC_BACKEND)
+        TIME_BUDGET_SECONDS=<s>  default time budget for requests without a
+                               "time_budget" field (see parse_time_budget)
+        PRIORITY_SCHEDULING=1  queue grammar/semantic calls by the request's
+                               "priority" class, so batch clients sharing the
+                               server cannot delay interactive requests
+        BATCH_TOKEN=<secret>   admit "priority": "batch" requests that send it
+                               in X-Batch-Token (see authorize_priority)
+        PROFILE_SAMPLE_EVERY=<n>  profile every n-th request automatically
+        PROFILE_MODE, PROFILE_DIR  capture mode (cprofile/sampling) and output
+                               directory for profiles (see profiling_enabled
+                               for on-demand profiling)
+    """
+    semantic_backend = os.environ.get('SEMANTIC_BACKEND')
+    duplicate_index = None
+    if os.environ.get('DUPLICATE_DETECTION') == '1':
+        index_path = os.environ.get('DUPLICATE_INDEX_PATH')
+        duplicate_index = DuplicateIndex.open(index_path) if index_path else DuplicateIndex()
+    rubric_path = os.environ.get('RUBRIC_PATH')
+    rubric_dir = os.environ.get('RUBRIC_DIR')
+    return StudentEvaluator(
+        use_semantic=semantic_backend is not None,
+        duplicate_index=duplicate_index,
+        semantic_backend=semantic_backend or 'torch',
+        semantic_model_path=os.environ.get('SEMANTIC_MODEL_PATH'),
+        micro_batching=os.environ.get('MICRO_BATCHING') == '1',
+        rubric=ReloadableRubric(rubric_path) if rubric_path else None,
+        rubric_registry=RubricRegistry(rubric_dir) if rubric_dir else None,
+        engagement_mode=os.environ.get('ENGAGEMENT_MODE', 'document'),
+        profiler=_create_profiler(),
+        semantic_categories=os.environ.get('SEMANTIC_CATEGORIES') == '1',
+        priority_scheduling=os.environ.get('PRIORITY_SCHEDULING') == '1'
+    )
+
+
+def _create_profiler() -> Optional[RequestProfiler]:
+    """Profiler for automatic (1-in-N) or on-demand profiling, if either is enabled."""
+    sample_every = int(os.environ.get('PROFILE_SAMPLE_EVERY', '0'))
+    if not sample_every and not profiling_enabled():
+        return None
+    return RequestProfiler(
+        output_dir=os.environ.get('PROFILE_DIR', PROFILE_DIR),
+        mode=os.environ.get('PROFILE_MODE', 'cprofile'),
+        sample_every=sample_every
+    )
+
+
+def profiling_enabled() -> bool:
+    """On-demand profiling via the X-Profile header is allowed (PROFILE_REQUESTS=1)."""
+    return os.environ.get('PROFILE_REQUESTS') == '1'
+
+
+def wants_profile(header_value: Optional[str]) -> bool:
+    """Whether a request's X-Profile header asks for (allowed) profiling."""
+    return header_value == '1' and profiling_enabled()
+
+
+def create_memory_sampler() -> Optional[MemorySampler]:
+    """
+    Build the optional memory sampler from environment variables.
+
+        MEMORY_SAMPLE_EVERY=<n>   sample RSS (and child JVM RSS) every n requests,
+                                  served at /debug/memory and logged
+        MEMORY_TRACEMALLOC=<n>    also track Python allocations with n frames
+    """
+    every = os.environ.get('MEMORY_SAMPLE_EVERY')
+    if not every:
+        return None
+    return MemorySampler(
+        every=int(every),
+        tracemalloc_frames=int(os.environ.get('MEMORY_TRACEMALLOC', '0')),
+        log=True
+    )
+
+
+def create_cohort_analytics() -> Optional[CohortAnalytics]:
+    """
+    Build the per-process cohort analytics from environment variables.
+
+        ANALYTICS=0                 disable percentiles and /analytics
+        ANALYTICS_SNAPSHOT=<file>   start from a snapshot (e.g. batch results
+                                    merged with analytics.merge_snapshots)
+        ANALYTICS_COHORTS=<file>    JSON list of the real cohorts,
+                                    {"schools": {"CPS": ["8A", "8B"]}, "terms": [...]};
+                                    /evaluate refuses any other cohort name
+    """
+    if os.environ.get('ANALYTICS') == '0':
+        return None
+    cohorts = None
+    cohorts_path = os.environ.get('ANALYTICS_COHORTS')
+    if cohorts_path:
+        with open(cohorts_path, 'r', encoding='utf-8') as f:
+            cohorts = json.load(f)
+    snapshot = os.environ.get('ANALYTICS_SNAPSHOT')
+    if snapshot:
+        return CohortAnalytics.load(snapshot, cohorts=cohorts)
+    return CohortAnalytics(cohorts=cohorts)
+
+
+def create_evaluation_store() -> Optional[EvaluationStore]:
+    """
+    Open the evaluation store named by EVALUATION_STORE (a SQLite file), if set.
+
+    Each web evaluation is committed immediately (batch size 1); WAL mode
+    keeps those commits cheap and lets history queries run alongside them.
+    """
+    path = os.environ.get('EVALUATION_STORE')
+    return EvaluationStore(path, batch_size=1) if path else None
+
+
+def history_query(store: EvaluationStore, args: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Answer a /history query from the evaluation store.
+
+    ?student_id=<id>[&criterion=<name>][&limit=<n>] returns the student's
+    evaluations and score trend; ?school=<s>&class=<c> returns each
+    student's latest evaluation in that class.
+
+    Raises:
+        InvalidRequest: If the query names neither a student nor a class
+    """
+    student_id = args.get('student_id')
+    if student_id:
+        try:
+            limit = int(args['limit']) if args.get('limit') else None
+        except ValueError:
+            raise InvalidRequest('limit must be an integer.')
+        return {
+            'student_id': student_id,
+            'trend': store.student_trend(student_id, args.get('criterion', 'overall'), limit=limit),
+            'evaluations': store.student_history(student_id, limit=limit)
+        }
+    if args.get('class'):
+        return {
+            'school': args.get('school'),
+            'class': args['class'],
+            'latest': store.class_latest(args.get('school'), args['class'])
+        }
+    raise InvalidRequest('Please provide student_id, or school and class.')
+
+
+def parse_cohort(data: Any, analytics: Optional[CohortAnalytics] = None) -> Dict[str, Optional[str]]:
+    """
+    Validate a cohort description ({"school": ..., "class": ..., "term": ...}).
+
+    Args:
+        data: Cohort object from the request (or None)
+        analytics: Aggregates whose cohort list the names must be in (if any)
+
+    Returns:
+        Keyword arguments for CohortAnalytics (school, class_name, term)
+
+    Raises:
+        InvalidRequest: If the cohort is not an object of short strings, or
+            names a cohort the analytics do not accept
+    """
+    if data is None:
+        return {'school': None, 'class_name': None, 'term': None}
+    if not isinstance(data, dict) or set(data) - {'school', 'class', 'term'}:
+        raise InvalidRequest('cohort must be an object with school, class and/or term.')
+    for key, value in data.items():
+        if value is not None and (not isinstance(value, str) or not value or len(value) > 64):
+            raise InvalidRequest(f'cohort {key} must be a string of 1-64 characters.')
+    cohort = {'school': data.get('school'), 'class_name': data.get('class'), 'term': data.get('term')}
+    if analytics is not None:
+        try:
+            analytics.check_cohort(**cohort)
+        except UnknownCohort as e:
+            raise InvalidRequest(f'{e.args[0]}.')
+    return cohort
+
+
+def parse_evaluate_request(data: Any, evaluator: StudentEvaluator,
+                           analytics: Optional[CohortAnalytics] = None,
+                           batch_token: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Validate an /evaluate JSON body.
+
+    Args:
+        data: Decoded JSON body
+        evaluator: Evaluator whose pipeline defines the valid stage names
+            and whose registry resolves the rubric name
+        analytics: Cohort analytics whose cohort list the cohort must be in
+        batch_token: X-Batch-Token header (see authorize_priority)
+
+    Returns:
+        Dictionary with transcript, duration, stages, submission_id, rubric
+        (compiled, or None for the evaluator's default) and word_timestamps
+        (parsed (starts, ends) arrays, or None), cohort (see parse_cohort),
+        student_id (or None), time_budget (seconds, or None) and priority
+        (a SCHEDULER_CLASSES name, or None for the default)
+
+    Raises:
+        InvalidRequest: If the body is missing or invalid
+        Forbidden: If the priority needs a batch token the caller lacks
+    """
+    if not isinstance(data, dict):
+        raise InvalidRequest('Please send a JSON object.')
+
+    transcript = data.get('transcript', '').strip()
+    duration = data.get('duration', 0)
+    stages = data.get('stages')
+
+    if not transcript:
+        raise InvalidRequest('Please provide a transcript text.')
+    try:
+        transcript = normalize_transcript(transcript)
+    except InputTooLarge as e:
+        raise InvalidRequest(f'{e.args[0]}.')
+
+    if stages is not None:
+        unknown = set(stages) - set(evaluator.pipeline.names())
+        if unknown:
+            raise InvalidRequest(f"Unknown stages: {', '.join(sorted(unknown))}.")
+
+    word_timestamps = data.get('word_timestamps')
+    if word_timestamps is not None:
+        try:
+            word_timestamps = parse_word_timestamps(word_timestamps)
+        except (ValueError, TypeError) as e:
+            raise InvalidRequest(f'Invalid word_timestamps: {e}.')
+
+    needs_duration = (stages is None or 'speech_rate' in stages) and word_timestamps is None
+    if needs_duration and duration <= 0:
+        raise InvalidRequest('Please provide a valid duration (in seconds).')
+
+    rubric = data.get('rubric')
+    if rubric is not None:
+        if evaluator.rubric_registry is None:
+            raise InvalidRequest('Rubric selection is not enabled on this server.')
+        try:
+            rubric = evaluator.rubric_registry.get(rubric)
+        except UnknownRubric as e:
+            raise InvalidRequest(f'{e.args[0]}.')
+
+    return {
+        'transcript': transcript,
+        'duration': int(duration),
+        'stages': stages,
+        'submission_id': parse_submission_id(data.get('submission_id'), evaluator),
+        'rubric': rubric,
+        'word_timestamps': word_timestamps,
+        'cohort': parse_cohort(data.get('cohort'), analytics),
+        'student_id': parse_student_id(data.get('student_id')),
+        'time_budget': parse_time_budget(data.get('time_budget', os.environ.get('TIME_BUDGET_SECONDS'))),
+        'priority': authorize_priority(data.get('priority'), batch_token)
+    }
+
+
+def parse_priority(value: Any) -> Optional[str]:
+    """Validate an optional priority class ('interactive' or 'batch')."""
+    if value is not None and value not in SCHEDULER_CLASSES:
+        raise InvalidRequest(f"priority must be one of: {', '.join(SCHEDULER_CLASSES)}.")
+    return value
+
+
+def authorize_priority(value: Any, token: Optional[str]) -> Optional[str]:
+    """
+    Validate the requested priority class and check the caller may use it.
+
+    Anonymous requests are always interactive: asking for any other class
+    (i.e. 'batch', which bypasses the interactive slot budget and waits
+    longer for a slot) needs the secret from the BATCH_TOKEN environment
+    variable, sent in the X-Batch-Token header.
+
+    Args:
+        value: 'priority' field of the request body
+        token: X-Batch-Token header of the request (None if absent)
+
+    Returns:
+        The priority class, or None for the default
+
+    Raises:
+        InvalidRequest: If the class is unknown
+        Forbidden: If the class needs the batch token and it is missing or wrong
+    """
+    priority = parse_priority(value)
+    if priority is None or priority == SCHEDULER_DEFAULT_PRIORITY:
+        return priority
+    expected = os.environ.get('BATCH_TOKEN')
+    if not expected or not token or not hmac.compare_digest(token.encode('utf-8'), expected.encode('utf-8')):
+        raise Forbidden(f"priority '{priority}' requires a valid X-Batch-Token header.")
+    return priority
+
+
+def parse_time_budget(value: Any) -> Optional[float]:
+    """
+    Validate an optional time budget in seconds.
+
+    Stages that would not finish within the budget are degraded (see
+    StudentEvaluator.evaluate), so the response arrives in time.
+    """
+    if value is None or value == '':
+        return None
+    try:
+        seconds = float(value)
+    except (TypeError, ValueError):
+        seconds = 0.0
+    if isinstance(value, bool) or not 0 < seconds <= MAX_TIME_BUDGET_SECONDS:
+        raise InvalidRequest(f'time_budget must be a number of seconds between 0 and {MAX_TIME_BUDGET_SECONDS}.')
+    return seconds
+
+
+def parse_submission_id(value: Any, evaluator: StudentEvaluator) -> Optional[str]:
+    """
+    Validate an optional submission id for the duplicate index.
+
+    Without an id the evaluator generates a random one. A client-chosen id
+    that is already in the index is refused: the index keeps the first text
+    stored under an id, so a reused id would hide the match against it and
+    leave the new text unindexed.
+
+    Raises:
+        InvalidRequest: If the id is not a string of 1-64 letters, digits, '.', '_', ':' or '-'
+        Conflict: If the duplicate index already holds the id
+    """
+    if value is None:
+        return None
+    if not isinstance(value, str) or not SUBMISSION_ID_PATTERN.fullmatch(value):
+        raise InvalidRequest("submission_id must be 1-64 letters, digits, '.', '_', ':' or '-'.")
+    if evaluator.duplicate_index is not None and value in evaluator.duplicate_index:
+        raise Conflict(f"submission_id '{value}' has already been used.")
+    return value
+
+
+def parse_student_id(value: Any) -> Optional[str]:
+    """Validate an optional student id (a string of 1-64 characters)."""
+    if value is not None and (not isinstance(value, str) or not value or len(value) > 64):
+        raise InvalidRequest('student_id must be a string of 1-64 characters.')
+    return value
+
+
+def client_id(forwarded_for: Optional[str], remote_addr: Optional[str],
+              trusted_proxies: Optional[int] = None) -> str:
+    """
+    Identify the caller for rate limiting.
+
+    Each trusted proxy appends the address it received the request from to
+    X-Forwarded-For, so the client is the right-most address that a trusted
+    proxy did not add. Everything to its left is client-controlled and
+    ignored.
+
+    Args:
+        forwarded_for: X-Forwarded-For header value
+        remote_addr: Address of the direct peer
+        trusted_proxies: Proxies in front of the app (default: TRUSTED_PROXIES
+            environment variable, else ADMISSION_TRUSTED_PROXIES)
+    """
+    if trusted_proxies is None:
+        trusted_proxies = int(os.environ.get('TRUSTED_PROXIES', ADMISSION_TRUSTED_PROXIES))
+    if trusted_proxies > 0 and forwarded_for:
+        chain = [hop.strip() for hop in forwarded_for.split(',') if hop.strip()]
+        chain.append(remote_addr or 'unknown')
+        return chain[max(0, len(chain) - 1 - trusted_proxies)]
+    return remote_addr or 'unknown'
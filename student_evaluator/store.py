@@ -0,0 +1,313 @@
+"""
+Persistent evaluation store (embedded SQLite).
+
+Every evaluation is recorded with its per-criterion scores, the raw
+features behind them (word count, WPM, filler rate, sentiment, ...) and
+the rubric version, keyed by student, school/class and time. The database
+runs in WAL mode so the web server can keep writing while reports read.
+
+Two indexes serve the progress-tracking queries without table scans:
+    evaluations(student_id, evaluated_at)   a student's history / trend
+    latest(school, class_name, student_id)  each student's most recent
+                                            evaluation, per class
+
+Rows are buffered and written in batches (one transaction and one
+executemany per batch), so bulk scoring runs are not limited by commits.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .analytics import criterion_scores, OVERALL
+from .config import STORE_BATCH_SIZE
+from .utils.lifecycle import Closeable, register, unregister
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS evaluations (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT,
+    school TEXT NOT NULL DEFAULT '',
+    class_name TEXT NOT NULL DEFAULT '',
+    term TEXT,
+    evaluated_at REAL NOT NULL,
+    submission_id TEXT,
+    rubric TEXT,
+    rubric_version TEXT,
+    final_score REAL,
+    max_score REAL,
+    percentage REAL,
+    grade TEXT,
+    scores TEXT NOT NULL,
+    features TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_evaluations_student_time
+    ON evaluations (student_id, evaluated_at);
+
+CREATE TABLE IF NOT EXISTS latest (
+    school TEXT NOT NULL,
+    class_name TEXT NOT NULL,
+    student_id TEXT NOT NULL,
+    evaluation_id INTEGER NOT NULL,
+    evaluated_at REAL NOT NULL,
+    PRIMARY KEY (school, class_name, student_id)
+) WITHOUT ROWID;
+"""
+
+_COLUMNS = (
+    'student_id', 'school', 'class_name', 'term', 'evaluated_at', 'submission_id',
+    'rubric', 'rubric_version', 'final_score', 'max_score', 'percentage', 'grade',
+    'scores', 'features'
+)
+
+_INSERT = f"INSERT INTO evaluations ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})"
+
+# Keep only the newest evaluation per (school, class, student)
+_UPSERT_LATEST = """
+INSERT INTO latest (school, class_name, student_id, evaluation_id, evaluated_at)
+SELECT school, class_name, student_id, id, evaluated_at
+FROM evaluations WHERE id > ? AND student_id IS NOT NULL ORDER BY id
+ON CONFLICT (school, class_name, student_id) DO UPDATE SET
+    evaluation_id = excluded.evaluation_id,
+    evaluated_at = excluded.evaluated_at
+WHERE excluded.evaluated_at >= latest.evaluated_at
+"""
+
+
+def extract_features(results: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Collect the raw measurements behind the scores.
+
+    Args:
+        results: Result dict from StudentEvaluator.evaluate()
+
+    Returns:
+        The metadata plus every scalar field of each score section (e.g.
+        speech_rate.wpm, clarity.filler_rate), without nested details
+    """
+    features = {'metadata': dict(results.get('metadata', {}))}
+    for name, section in results.get('scores', {}).items():
+        features[name] = {
+            key: value for key, value in section.items()
+            if isinstance(value, (int, float, str, bool)) or value is None
+        }
+    if 'audio' in results:
+        features['audio'] = {
+            key: value for key, value in results['audio'].items()
+            if isinstance(value, (int, float, str, bool)) or value is None
+        }
+    return features
+
+
+class EvaluationStore(Closeable):
+    """
+    SQLite store of evaluation results with batched writes.
+
+    Thread-safe; one instance per process. Buffered rows are written when
+    `batch_size` rows are pending, on flush(), and on close() (which also
+    runs at interpreter exit).
+    """
+
+    def __init__(self, path: str, batch_size: int = STORE_BATCH_SIZE):
+        """
+        Args:
+            path: SQLite database file (created if missing)
+            batch_size: Rows buffered before a write; 1 commits every evaluation
+        """
+        self.path = path
+        self.batch_size = max(1, batch_size)
+        self._pending: List[Tuple] = []
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # With WAL, NORMAL only risks the last transactions on power loss, not corruption
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        register(self)
+
+    def add(
+        self,
+        results: Dict[str, Any],
+        student_id: Optional[str] = None,
+        school: Optional[str] = None,
+        class_name: Optional[str] = None,
+        term: Optional[str] = None,
+        evaluated_at: Optional[float] = None
+    ):
+        """
+        Record one evaluation (written with the next batch).
+
+        Args:
+            results: Result dict from StudentEvaluator.evaluate()
+            student_id: Student the evaluation belongs to
+            school: School of the student
+            class_name: Class within the school
+            term: Term or assessment period
+            evaluated_at: Unix timestamp (defaults to now)
+        """
+        row = (
+            student_id,
+            school or '',
+            class_name or '',
+            term,
+            evaluated_at if evaluated_at is not None else time.time(),
+            (results.get('duplicates') or {}).get('submission_id'),
+            results.get('rubric'),
+            results.get('rubric_version'),
+            results.get('final_score'),
+            results.get('max_score'),
+            results.get('percentage'),
+            results.get('grade'),
+            json.dumps(criterion_scores(results), separators=(',', ':')),
+            json.dumps(extract_features(results), separators=(',', ':'))
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self._flush()
+
+    def add_many(self, records: Iterable[Dict[str, Any]]):
+        """
+        Record many evaluations.
+
+        Args:
+            records: Dicts with 'results' and optionally student_id, school,
+                class_name, term and evaluated_at (the arguments of add())
+        """
+        for record in records:
+            self.add(**record)
+
+    def flush(self):
+        """Write all buffered rows."""
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if not self._pending:
+            return
+        rows, self._pending = self._pending, []
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM evaluations').fetchone()[0]
+            conn.executemany(_INSERT, rows)
+            conn.execute(_UPSERT_LATEST, (last_id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def student_history(self, student_id: str, since: Optional[float] = None,
+                        until: Optional[float] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        A student's evaluations, oldest first (index range scan).
+
+        Args:
+            student_id: Student to look up
+            since: Only evaluations at or after this Unix time
+            until: Only evaluations before this Unix time
+            limit: Return at most this many (the most recent ones)
+
+        Returns:
+            List of evaluation dicts (see _row_to_dict)
+        """
+        query = 'SELECT * FROM evaluations WHERE student_id = ? AND evaluated_at >= ? AND evaluated_at < ?'
+        params = [student_id, since if since is not None else float('-inf'),
+                  until if until is not None else float('inf')]
+        if limit is not None:
+            query = f"SELECT * FROM ({query} ORDER BY evaluated_at DESC LIMIT ?) ORDER BY evaluated_at"
+            params.append(limit)
+        else:
+            query += ' ORDER BY evaluated_at'
+        return self._query(query, params)
+
+    def student_trend(self, student_id: str, criterion: str = OVERALL,
+                      limit: Optional[int] = None) -> Dict[str, Any]:
+        """
+        A student's score over time for one criterion.
+
+        Args:
+            student_id: Student to look up
+            criterion: 'overall' or a score section name (percent of its maximum)
+            limit: Use only the most recent evaluations
+
+        Returns:
+            Dictionary with points ([{evaluated_at, value}]), change (last
+            minus first) and slope (least-squares change per evaluation)
+        """
+        points = [
+            {'evaluated_at': row['evaluated_at'], 'value': row['scores'].get(criterion)}
+            for row in self.student_history(student_id, limit=limit)
+        ]
+        points = [p for p in points if p['value'] is not None]
+        values = [p['value'] for p in points]
+        slope = None
+        if len(values) >= 2:
+            n = len(values)
+            mean_x = (n - 1) / 2
+            mean_y = sum(values) / n
+            slope = round(
+                sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values))
+                / sum((i - mean_x) ** 2 for i in range(n)), 2
+            )
+        return {
+            'student_id': student_id,
+            'criterion': criterion,
+            'points': points,
+            'change': round(values[-1] - values[0], 2) if len(values) >= 2 else None,
+            'slope': slope
+        }
+
+    def class_latest(self, school: Optional[str], class_name: Optional[str]) -> List[Dict[str, Any]]:
+        """
+        Each student's most recent evaluation in a class (primary-key range scan).
+
+        Args:
+            school: School of the class
+            class_name: Class within the school
+
+        Returns:
+            List of evaluation dicts, one per student, ordered by student id
+        """
+        return self._query(
+            'SELECT e.* FROM latest l JOIN evaluations e ON e.id = l.evaluation_id '
+            'WHERE l.school = ? AND l.class_name = ? ORDER BY l.student_id',
+            (school or '', class_name or '')
+        )
+
+    def count(self) -> int:
+        """Number of stored evaluations (buffered rows included)."""
+        with self._lock:
+            stored = self._conn.execute('SELECT COUNT(*) FROM evaluations').fetchone()[0]
+            return stored + len(self._pending)
+
+    def _query(self, query: str, params) -> List[Dict[str, Any]]:
+        with self._lock:
+            self._flush()
+            rows = self._conn.execute(query, params).fetchall()
+        return [_row_to_dict(row) for row in rows]
+
+    def close(self):
+        """Write buffered rows and close the database."""
+        with self._lock:
+            if self._conn is None:
+                return
+            try:
+                self._flush()
+            finally:
+                self._conn.close()
+                self._conn = None
+        unregister(self)
+
+
+def _row_to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    """Convert a row to a dict, decoding JSON columns and empty keys."""
+    record = dict(row)
+    record['scores'] = json.loads(record['scores'])
+    record['features'] = json.loads(record['features'])
+    record['school'] = record['school'] or None
+    record['class_name'] = record['class_name'] or None
+    return record
@@ -5,7 +5,9 @@ from .keywords import (
     extract_name,
     count_sentences,
     tokenize_words,
-    calculate_ttr
+    calculate_ttr,
+    calculate_mattr,
+    calculate_mtld
 )
 
 from .scorer import (
@@ -22,6 +24,8 @@ __all__ = [
     'count_sentences',
     'tokenize_words',
     'calculate_ttr',
+    'calculate_mattr',
+    'calculate_mtld',
     'score_from_range',
     'score_grammar',
     'score_vocabulary',
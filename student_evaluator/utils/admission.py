@@ -0,0 +1,352 @@
+"""
+Admission control for the web service.
+
+Rejects oversized transcripts (413) and over-eager clients (429) before any
+analysis runs, and bounds how many evaluations execute at once so a burst
+cannot starve LanguageTool for everyone else.
+
+Every evaluation holds one of ADMISSION_MAX_CONCURRENT slots. Priority
+classes (see ADMISSION_CLASSES) can be capped below that and given their own
+queue timeout: batch work holds at most 2 of the 4 slots, so a regrade
+cannot push a teacher's request into a 429, and it waits longer for a slot
+instead of being rejected. Each client has one rate bucket shared by all
+classes. The priority itself is never taken from an anonymous request: the
+servers accept 'batch' only from callers presenting the batch token (see
+service.authorize_priority).
+"""
+
+import asyncio
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from typing import Dict, Any, Optional
+
+from ..config import (
+    ADMISSION_MAX_TRANSCRIPT_BYTES,
+    ADMISSION_MAX_TRANSCRIPT_WORDS,
+    ADMISSION_RATE_PER_SECOND,
+    ADMISSION_BURST,
+    ADMISSION_MAX_CONCURRENT,
+    ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    ADMISSION_MAX_TRACKED_CLIENTS,
+    ADMISSION_CLASSES,
+    SCHEDULER_DEFAULT_PRIORITY
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is refused; carries the HTTP status to return."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_consume(self, now: float) -> float:
+        """
+        Take one token if available.
+
+        Args:
+            now: Current monotonic time
+
+        Returns:
+            0 if a token was taken, otherwise seconds until one is available
+        """
+        # `now` may predate a bucket created after it was read
+        elapsed = max(0.0, now - self.updated)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated = max(self.updated, now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class _AdmissionClass:
+    """Slot cap and queue timeout of one priority class."""
+
+    def __init__(self, name: str, max_concurrent: Optional[int], queue_timeout: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.counters = Counter()
+
+
+class AdmissionController:
+    """Size limits, per-client rate limits and a global concurrency cap with per-class sub-caps."""
+
+    def __init__(
+        self,
+        max_bytes: int = ADMISSION_MAX_TRANSCRIPT_BYTES,
+        max_words: int = ADMISSION_MAX_TRANSCRIPT_WORDS,
+        rate_per_second: float = ADMISSION_RATE_PER_SECOND,
+        burst: int = ADMISSION_BURST,
+        max_concurrent: int = ADMISSION_MAX_CONCURRENT,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        max_clients: int = ADMISSION_MAX_TRACKED_CLIENTS,
+        classes: Optional[Dict[str, Dict[str, Any]]] = None,
+        default_priority: str = SCHEDULER_DEFAULT_PRIORITY
+    ):
+        """
+        Args:
+            max_bytes: Largest accepted transcript, in UTF-8 bytes
+            max_words: Largest accepted transcript, in whitespace-separated words
+            rate_per_second: Sustained requests per second allowed per client
+            burst: Requests a client may make back-to-back before being limited
+            max_concurrent: Evaluations allowed to run at the same time (all classes)
+            queue_timeout: Seconds to wait for a free slot before rejecting
+            max_clients: Client buckets kept in memory (least recent are evicted)
+            classes: Priority class name -> settings: 'max_concurrent' (slots
+                the class may hold, None for no cap below max_concurrent) and
+                'queue_timeout' (ADMISSION_CLASSES if None)
+            default_priority: Class of requests that name none
+        """
+        self.max_bytes = max_bytes
+        self.max_words = max_words
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+
+        classes = ADMISSION_CLASSES if classes is None else classes
+        self._classes = {
+            name: _AdmissionClass(
+                name,
+                settings.get('max_concurrent'),
+                settings.get('queue_timeout', queue_timeout)
+            )
+            for name, settings in classes.items()
+        }
+        if default_priority not in self._classes:
+            raise ValueError(f"Unknown default priority class: {default_priority}")
+        self.default_priority = default_priority
+
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        # Signalled whenever a slot is released
+        self._released = threading.Condition(self._lock)
+        # (loop, future) of coroutines waiting in slot_async(), woken on release
+        self._async_waiters = []
+        self._in_flight = 0
+        self._counters = Counter()
+
+    def _class(self, priority: Optional[str]) -> _AdmissionClass:
+        if priority is None:
+            return self._classes[self.default_priority]
+        try:
+            return self._classes[priority]
+        except KeyError:
+            raise ValueError(f"Unknown priority class: {priority}")
+
+    def check_size(self, transcript: str):
+        """Raise AdmissionRejected(413) if the transcript exceeds the size limits."""
+        if len(transcript.encode('utf-8')) > self.max_bytes:
+            self._count('rejected_too_large')
+            raise AdmissionRejected(
+                413, f'Transcript is too large (limit {self.max_bytes} bytes).'
+            )
+        if len(transcript.split()) > self.max_words:
+            self._count('rejected_too_large')
+            raise AdmissionRejected(
+                413, f'Transcript is too long (limit {self.max_words} words).'
+            )
+
+    def check_rate(self, client_id: str):
+        """Raise AdmissionRejected(429) if the client has no tokens left."""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.pop(client_id, None)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_per_second, self.burst)
+            self._buckets[client_id] = bucket
+            while len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            wait = bucket.try_consume(now)
+
+        if wait > 0:
+            self._count('rejected_rate_limited')
+            raise AdmissionRejected(
+                429, 'Too many requests, please slow down.', retry_after=wait
+            )
+
+    def precheck(self, client_id: str, transcript: Any, priority: Optional[str] = None):
+        """
+        Apply the size and rate limits before a request is parsed.
+
+        Args:
+            client_id: Identifier used for rate limiting (e.g. client IP)
+            transcript: Raw transcript from the request body (size is only
+                checked when it is a string; parsing rejects anything else)
+            priority: Authorized priority class (default_priority if None)
+
+        Raises:
+            AdmissionRejected: With status 413 or 429
+            ValueError: If the priority class is unknown
+        """
+        self._class(priority)
+        if isinstance(transcript, str):
+            self.check_size(transcript)
+        self.check_rate(client_id)
+
+    @contextmanager
+    def admit(self, client_id: str, transcript: str, priority: Optional[str] = None):
+        """
+        Admit one evaluation, holding a concurrency slot for its duration.
+
+        Args:
+            client_id: Identifier used for rate limiting (e.g. client IP)
+            transcript: Transcript to be evaluated
+            priority: Authorized priority class (default_priority if None)
+
+        Raises:
+            AdmissionRejected: With status 413 or 429
+        """
+        self.precheck(client_id, transcript, priority)
+        with self.slot(priority):
+            yield
+
+    def _try_enter(self, admission_class: _AdmissionClass) -> bool:
+        """Take a slot if both the global cap and the class cap allow it (lock held)."""
+        if self._in_flight >= self.max_concurrent:
+            return False
+        if admission_class.max_concurrent is not None and \
+                admission_class.in_flight >= admission_class.max_concurrent:
+            return False
+        self._in_flight += 1
+        admission_class.in_flight += 1
+        admission_class.counters['admitted'] += 1
+        self._counters['admitted'] += 1
+        return True
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None):
+        """
+        Hold a concurrency slot (after precheck()).
+
+        Raises:
+            AdmissionRejected: With status 429 if no slot frees up in time
+        """
+        admission_class = self._class(priority)
+        with self._released:
+            entered = self._released.wait_for(
+                lambda: self._try_enter(admission_class), admission_class.queue_timeout
+            )
+        if not entered:
+            self._reject_busy(admission_class)
+        try:
+            yield
+        finally:
+            self._exit(admission_class)
+
+    @asynccontextmanager
+    async def admit_async(self, client_id: str, transcript: str, priority: Optional[str] = None):
+        """
+        Asyncio version of admit(); waits for a slot without blocking the event loop.
+
+        Raises:
+            AdmissionRejected: With status 413 or 429
+        """
+        self.precheck(client_id, transcript, priority)
+        async with self.slot_async(priority):
+            yield
+
+    @asynccontextmanager
+    async def slot_async(self, priority: Optional[str] = None):
+        """Asyncio version of slot(); waits on a future woken by the next release."""
+        admission_class = self._class(priority)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + admission_class.queue_timeout
+        while True:
+            waiter = loop.create_future()
+            with self._lock:
+                # Registering under the lock means no release is missed
+                if self._try_enter(admission_class):
+                    break
+                self._async_waiters.append((loop, waiter))
+            try:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self._reject_busy(admission_class)
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except asyncio.TimeoutError:
+                    self._reject_busy(admission_class)
+            finally:
+                with self._lock:
+                    if (loop, waiter) in self._async_waiters:
+                        self._async_waiters.remove((loop, waiter))
+
+        try:
+            yield
+        finally:
+            self._exit(admission_class)
+
+    def _reject_busy(self, admission_class: _AdmissionClass):
+        with self._lock:
+            self._counters['rejected_busy'] += 1
+            admission_class.counters['rejected_busy'] += 1
+        raise AdmissionRejected(
+            429, 'Server is busy, please retry shortly.', retry_after=admission_class.queue_timeout
+        )
+
+    def _exit(self, admission_class: _AdmissionClass):
+        with self._released:
+            self._in_flight -= 1
+            admission_class.in_flight -= 1
+            waiters, self._async_waiters = self._async_waiters, []
+            self._released.notify_all()
+        # Waiters race for the freed slot; the others register again
+        for loop, waiter in waiters:
+            loop.call_soon_threadsafe(_wake, waiter)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return admission counters and limits."""
+        with self._lock:
+            return {
+                'admitted': self._counters['admitted'],
+                'rejected_too_large': self._counters['rejected_too_large'],
+                'rejected_rate_limited': self._counters['rejected_rate_limited'],
+                'rejected_busy': self._counters['rejected_busy'],
+                'in_flight': self._in_flight,
+                'tracked_clients': len(self._buckets),
+                'limits': {
+                    'max_bytes': self.max_bytes,
+                    'max_words': self.max_words,
+                    'rate_per_second': self.rate_per_second,
+                    'burst': self.burst,
+                    'max_concurrent': self.max_concurrent
+                },
+                'classes': {
+                    name: {
+                        'admitted': c.counters['admitted'],
+                        'rejected_busy': c.counters['rejected_busy'],
+                        'in_flight': c.in_flight,
+                        'max_concurrent': c.max_concurrent,
+                        'queue_timeout': c.queue_timeout
+                    }
+                    for name, c in self._classes.items()
+                }
+            }
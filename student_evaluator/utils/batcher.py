@@ -0,0 +1,138 @@
+"""
+Micro-batching request coalescer.
+
+Concurrent callers submit single items and get a Future back. A background
+thread gathers queued items and flushes them through one batched call when
+the batch is full or the oldest item has waited `max_wait_ms`.
+"""
+
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+from ..config import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS
+
+
+_STOP = object()
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item calls into batched calls."""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+        max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS,
+        name: str = 'batcher'
+    ):
+        """
+        Start the background flush thread.
+
+        Args:
+            batch_fn: Function mapping a list of items to a list of results
+                of the same length and order
+            max_batch_size: Flush as soon as this many items are queued
+            max_wait_ms: Flush after the first queued item waited this long
+            name: Name used for the worker thread and in stats
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.name = name
+
+        self._queue = queue.Queue()
+        self._histogram = Counter()
+        self._items = 0
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'{name}-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Queue one item for the next batch.
+
+        Args:
+            item: Input for batch_fn
+
+        Returns:
+            Future resolving to this item's result
+        """
+        if self._closed:
+            raise RuntimeError(f"{self.name} batcher is closed")
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is _STOP:
+                    stop = True
+                    break
+                batch.append(entry)
+
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch: List[tuple]):
+        items = [item for item, _ in batch]
+        futures = [future for _, future in batch]
+
+        with self._stats_lock:
+            self._histogram[len(batch)] += 1
+            self._items += len(batch)
+
+        try:
+            results = self.batch_fn(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"{self.name} batch returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            future.set_result(result)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return batch-size histogram and counters."""
+        with self._stats_lock:
+            batches = sum(self._histogram.values())
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': batches,
+                'items': self._items,
+                'mean_batch_size': round(self._items / batches, 2) if batches else 0,
+                'queued': self._queue.qsize(),
+                'histogram': {str(size): count for size, count in sorted(self._histogram.items())}
+            }
+
+    def close(self):
+        """Flush pending items and stop the worker thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+            self._thread.join()
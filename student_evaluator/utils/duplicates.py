@@ -0,0 +1,301 @@
+"""
+Near-duplicate detection across submissions using MinHash + LSH.
+
+Each transcript is reduced to a fixed-size MinHash signature over word
+shingles. Signatures are split into bands and hashed into buckets, so a
+query only compares against submissions that share at least one band
+instead of against every stored transcript.
+"""
+
+import os
+import random
+import threading
+import zlib
+from array import array
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+
+from ..config import DUPLICATE_NUM_PERM, DUPLICATE_SHINGLE_SIZE, DUPLICATE_THRESHOLD
+from .keywords import tokenize_words
+from .lifecycle import Closeable
+
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+def shingle_hashes(text: str, size: int = DUPLICATE_SHINGLE_SIZE) -> set:
+    """
+    Hash the word shingles of a text.
+
+    Args:
+        text: Input text
+        size: Number of words per shingle
+
+    Returns:
+        Set of 32-bit shingle hashes
+    """
+    words = tokenize_words(text)
+    if len(words) < size:
+        return {zlib.crc32(' '.join(words).encode('utf-8'))} if words else set()
+    return {
+        zlib.crc32(' '.join(words[i:i + size]).encode('utf-8'))
+        for i in range(len(words) - size + 1)
+    }
+
+
+def _choose_bands(num_perm: int, threshold: float) -> tuple:
+    """
+    Pick (bands, rows) whose LSH S-curve threshold is closest to the target.
+
+    The collision probability for Jaccard similarity s is 1 - (1 - s^r)^b,
+    whose steepest point is roughly (1/b)^(1/r).
+    """
+    best = (num_perm, 1)
+    best_error = float('inf')
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        # Bias slightly below the target so true matches are not missed
+        error = abs((1 / bands) ** (1 / rows) - (threshold - 0.05))
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+class DuplicateIndex(Closeable):
+    """Incremental MinHash LSH index over submitted transcripts."""
+
+    def __init__(
+        self,
+        num_perm: int = DUPLICATE_NUM_PERM,
+        threshold: float = DUPLICATE_THRESHOLD,
+        shingle_size: int = DUPLICATE_SHINGLE_SIZE,
+        seed: int = 1,
+        path: Optional[str] = None
+    ):
+        """
+        Initialize an empty index.
+
+        Args:
+            num_perm: Number of MinHash permutations (signature length)
+            threshold: Default estimated Jaccard similarity for a match
+            shingle_size: Number of words per shingle
+            seed: Seed for the permutation coefficients
+            path: File close() saves the index to (not saved if None)
+        """
+        self.path = path
+        self.num_perm = num_perm
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.bands, self.rows = _choose_bands(num_perm, threshold)
+
+        rng = random.Random(seed)
+        self._coefficients = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(num_perm)
+        ]
+        self._reset()
+
+    def _reset(self):
+        """Empty the signature storage and buckets."""
+        # Signatures live in one flat array; doc number i owns
+        # slots [i * num_perm, (i + 1) * num_perm)
+        self._signatures = array('I')
+        self._ids: List[str] = []
+        self._doc_numbers: Dict[str, int] = {}
+        # One dict per band: band hash -> doc number or array of doc numbers
+        self._buckets: List[Dict[int, Any]] = [dict() for _ in range(self.bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        with self._lock:
+            return item_id in self._doc_numbers
+
+    def signature(self, text: str) -> array:
+        """
+        Compute the MinHash signature of a text.
+
+        Args:
+            text: Input text
+
+        Returns:
+            array('I') of length num_perm
+        """
+        hashes = shingle_hashes(text, self.shingle_size)
+        if not hashes:
+            return array('I', [_MAX_HASH] * self.num_perm)
+        return array('I', (
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._coefficients
+        ))
+
+    def _band_keys(self, signature: array) -> List[int]:
+        return [
+            hash(tuple(signature[band * self.rows:(band + 1) * self.rows]))
+            for band in range(self.bands)
+        ]
+
+    def _candidates(self, band_keys: List[int]) -> set:
+        candidates = set()
+        for band, key in enumerate(band_keys):
+            entry = self._buckets[band].get(key)
+            if entry is None:
+                continue
+            if isinstance(entry, int):
+                candidates.add(entry)
+            else:
+                candidates.update(entry)
+        return candidates
+
+    def _similarity(self, signature: array, doc_number: int) -> float:
+        start = doc_number * self.num_perm
+        stored = self._signatures[start:start + self.num_perm]
+        matches = sum(1 for x, y in zip(signature, stored) if x == y)
+        return matches / self.num_perm
+
+    def _insert(self, item_id: str, signature: array, band_keys: List[int]):
+        if item_id in self._doc_numbers:
+            return
+        doc_number = len(self._ids)
+        self._ids.append(item_id)
+        self._doc_numbers[item_id] = doc_number
+        self._signatures.extend(signature)
+
+        for band, key in enumerate(band_keys):
+            bucket = self._buckets[band]
+            entry = bucket.get(key)
+            if entry is None:
+                bucket[key] = doc_number
+            elif isinstance(entry, int):
+                bucket[key] = array('I', [entry, doc_number])
+            else:
+                entry.append(doc_number)
+
+    def _query(self, signature: array, band_keys: List[int], threshold: float) -> List[Dict[str, Any]]:
+        matches = []
+        for doc_number in self._candidates(band_keys):
+            similarity = self._similarity(signature, doc_number)
+            if similarity >= threshold:
+                matches.append({
+                    'submission_id': self._ids[doc_number],
+                    'similarity': round(similarity, 3)
+                })
+        return sorted(matches, key=lambda x: x['similarity'], reverse=True)
+
+    def add(self, item_id: str, text: str):
+        """
+        Add a submission to the index (ids already present are ignored).
+
+        Args:
+            item_id: Unique submission identifier
+            text: Transcript text
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            self._insert(item_id, signature, band_keys)
+
+    def query(self, text: str, threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Find stored submissions at least `threshold` similar to a text.
+
+        Args:
+            text: Transcript text
+            threshold: Minimum estimated Jaccard similarity (defaults to index threshold)
+
+        Returns:
+            List of matches sorted by similarity, highest first
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            return self._query(signature, band_keys, self._threshold(threshold))
+
+    def query_and_add(self, item_id: str, text: str,
+                      threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Query for prior near-duplicates, then add the submission.
+
+        The signature is computed once and shared by both steps.
+
+        Args:
+            item_id: Unique submission identifier
+            text: Transcript text
+            threshold: Minimum estimated Jaccard similarity
+
+        Returns:
+            Matches among submissions added before this one
+        """
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            matches = self._query(signature, band_keys, self._threshold(threshold))
+            self._insert(item_id, signature, band_keys)
+        return [m for m in matches if m['submission_id'] != item_id]
+
+    def _threshold(self, threshold: Optional[float]) -> float:
+        return self.threshold if threshold is None else threshold
+
+    def save(self, path: str):
+        """
+        Persist the index to a NumPy .npz file (plain arrays, no pickled objects).
+
+        Buckets are not stored; load() rebuilds them from the signatures.
+        """
+        with self._lock:
+            arrays = {
+                'settings': np.array([self.num_perm, self.shingle_size, self.bands, self.rows],
+                                     dtype=np.int64),
+                'threshold': np.float64(self.threshold),
+                'coefficients': np.array(self._coefficients, dtype=np.uint64).reshape(-1, 2),
+                'signatures': np.frombuffer(self._signatures, dtype=np.uint32),
+                'ids': np.array(self._ids, dtype=str)
+            }
+            # Write a temporary file first so a crash never leaves a torn index
+            temporary = f'{path}.tmp'
+            with open(temporary, 'wb') as f:
+                np.savez(f, **arrays)
+            os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'DuplicateIndex':
+        """Load an index previously written with save()."""
+        with np.load(path, allow_pickle=False) as data:
+            num_perm, shingle_size, bands, rows = (int(x) for x in data['settings'])
+            index = cls.__new__(cls)
+            index.path = None
+            index.num_perm = num_perm
+            index.shingle_size = shingle_size
+            index.bands, index.rows = bands, rows
+            index.threshold = float(data['threshold'])
+            index._coefficients = [(int(a), int(b)) for a, b in data['coefficients']]
+            signatures = data['signatures'].astype(np.uint32)
+            ids = data['ids'].tolist()
+        index._reset()
+        for doc_number, item_id in enumerate(ids):
+            signature = array('I', signatures[doc_number * num_perm:(doc_number + 1) * num_perm].tolist())
+            index._insert(item_id, signature, index._band_keys(signature))
+        return index
+
+    @classmethod
+    def open(cls, path: str) -> 'DuplicateIndex':
+        """
+        Load the index saved at `path`, or start an empty one if there is none.
+
+        close() saves the index back to `path`, so submissions seen by one
+        server process are still flagged after a restart.
+        """
+        index = cls.load(path) if os.path.exists(path) else cls()
+        index.path = path
+        return index
+
+    def close(self):
+        """Save the index to its path, if it has one."""
+        if self.path is not None:
+            self.save(self.path)
@@ -0,0 +1,316 @@
+"""
+Persistent, memory-mapped embedding store.
+
+Transcript embeddings are written once as float16 or int8 rows into a
+NumPy ``.npy`` file and read back with ``mmap_mode='r'``, so any number of
+worker processes can share them without copying or re-encoding.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+
+SUPPORTED_DTYPES = ('float16', 'int8')
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of a matrix.
+
+    Args:
+        matrix: 2-D array of embeddings
+
+    Returns:
+        float32 array with unit-length rows (zero rows are left as zeros)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple:
+    """
+    Symmetric per-row int8 quantization.
+
+    Args:
+        matrix: 2-D float array
+
+    Returns:
+        Tuple of (int8 matrix, float32 per-row scales)
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    quantized = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales.astype(np.float32)
+
+
+class EmbeddingStore:
+    """
+    Append-only embedding matrix on disk with an id index.
+
+    Files written for a store at ``<path>``:
+        <path>.npy         embedding rows (float16 or int8), memory-mapped
+        <path>.scales.npy  per-row scales (int8 stores only)
+        <path>.index.json  dtype and dimension
+        <path>.ids.jsonl   ids in row order, one JSON string per line; new
+                           ids are appended, so adding stays O(rows added)
+
+    A read-only store sees rows added by the writer after it was opened
+    only once refresh() is called.
+    """
+
+    def __init__(self, path: str, dim: Optional[int] = None,
+                 dtype: str = 'float16', readonly: bool = False):
+        """
+        Open an existing store or create a new one.
+
+        Args:
+            path: Base path of the store (without extension)
+            dim: Embedding dimension (required when creating a store)
+            dtype: Storage type, 'float16' or 'int8'
+            readonly: Open the matrix read-only (for worker processes)
+        """
+        self.path = Path(path)
+        self.readonly = readonly
+        self._data_path = self.path.with_name(self.path.name + '.npy')
+        self._scales_path = self.path.with_name(self.path.name + '.scales.npy')
+        self._index_path = self.path.with_name(self.path.name + '.index.json')
+        self._ids_path = self.path.with_name(self.path.name + '.ids.jsonl')
+        # Bytes of the ids sidecar read so far (refresh() continues from here)
+        self._ids_offset = 0
+
+        if self._index_path.exists():
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.dim = index['dim']
+            self.dtype = index['dtype']
+            self.ids = self._read_ids(index)
+        else:
+            if readonly:
+                raise FileNotFoundError(f"No embedding store at {self.path}")
+            if dim is None:
+                raise ValueError("dim is required when creating an embedding store")
+            if dtype not in SUPPORTED_DTYPES:
+                raise ValueError(f"dtype must be one of {SUPPORTED_DTYPES}")
+            self.dim = dim
+            self.dtype = dtype
+            self.ids = []
+            self._write_index()
+
+        self._positions = {item_id: i for i, item_id in enumerate(self.ids)}
+        self._data = None
+        self._scales = None
+        self._data_stat = None
+        self._open_arrays()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _read_ids(self, index: Dict[str, Any]) -> list:
+        """Read the ids sidecar (stores written before it kept ids in the index)."""
+        if 'ids' in index:
+            ids = index['ids']
+            if not self.readonly:
+                # Move the ids out of the index once, so later adds only append
+                with open(self._ids_path, 'w', encoding='utf-8') as f:
+                    f.writelines(json.dumps(item_id) + '\n' for item_id in ids)
+                self._ids_offset = self._ids_path.stat().st_size
+                self._write_index()
+            return ids
+        return self._read_new_ids()
+
+    def _read_new_ids(self) -> list:
+        """Read the ids appended to the sidecar since the last read."""
+        if not self._ids_path.exists():
+            return []
+        ids = []
+        with open(self._ids_path, 'rb') as f:
+            f.seek(self._ids_offset)
+            for line in f:
+                # A torn last line (crash or append in progress) has no row data yet either
+                if not line.endswith(b'\n'):
+                    break
+                ids.append(json.loads(line))
+                self._ids_offset += len(line)
+        return ids
+
+    def refresh(self) -> int:
+        """
+        Pick up rows the writer added since this store was opened or refreshed.
+
+        Reads the new lines of the ids sidecar and re-maps the matrix when
+        the writer has reallocated it (grown stores are written to a new
+        file, which an existing memory map does not see).
+
+        Returns:
+            Number of new ids
+        """
+        new_ids = [item_id for item_id in self._read_new_ids() if item_id not in self._positions]
+        for item_id in new_ids:
+            self._positions[item_id] = len(self.ids)
+            self.ids.append(item_id)
+        if len(self.ids) > self._capacity() or self._stat_data() != self._data_stat:
+            self._open_arrays()
+        return len(new_ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._positions
+
+    def _stat_data(self) -> Optional[tuple]:
+        """Identity of the matrix file, which changes when the writer reallocates it."""
+        try:
+            stat = self._data_path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_size
+
+    def _open_arrays(self):
+        """Memory-map the on-disk arrays if they exist."""
+        mode = 'r' if self.readonly else 'r+'
+        self._data_stat = self._stat_data()
+        if self._data_path.exists():
+            self._data = np.load(self._data_path, mmap_mode=mode)
+        if self.dtype == 'int8' and self._scales_path.exists():
+            self._scales = np.load(self._scales_path, mmap_mode=mode)
+
+    def _capacity(self) -> int:
+        return 0 if self._data is None else self._data.shape[0]
+
+    def _grow(self, needed: int):
+        """Reallocate the backing files with (at least) doubled capacity."""
+        capacity = max(needed, 2 * self._capacity(), 1024)
+        # New ids are already listed, but only the old rows have data
+        filled = min(len(self.ids), self._capacity())
+        tmp_data = self._data_path.with_suffix('.tmp.npy')
+        data = np.lib.format.open_memmap(
+            tmp_data, mode='w+', dtype=self.dtype, shape=(capacity, self.dim)
+        )
+        if self._data is not None:
+            data[:filled] = self._data[:filled]
+        data.flush()
+        del data
+        self._data = None
+        os.replace(tmp_data, self._data_path)
+
+        if self.dtype == 'int8':
+            tmp_scales = self._scales_path.with_suffix('.tmp.npy')
+            scales = np.lib.format.open_memmap(
+                tmp_scales, mode='w+', dtype=np.float32, shape=(capacity,)
+            )
+            if self._scales is not None:
+                scales[:filled] = self._scales[:filled]
+            scales.flush()
+            del scales
+            self._scales = None
+            os.replace(tmp_scales, self._scales_path)
+
+        self._open_arrays()
+
+    def add(self, ids: Sequence[str], embeddings: np.ndarray):
+        """
+        Append embeddings for new ids (existing ids are overwritten in place).
+
+        Args:
+            ids: Identifiers, one per row
+            embeddings: 2-D array of shape (len(ids), dim)
+        """
+        if self.readonly:
+            raise PermissionError("Embedding store is open read-only")
+        embeddings = normalize_rows(embeddings)
+        if embeddings.shape != (len(ids), self.dim):
+            raise ValueError(
+                f"Expected embeddings of shape ({len(ids)}, {self.dim}), got {embeddings.shape}"
+            )
+
+        rows = []
+        new_ids = []
+        for item_id in ids:
+            if item_id not in self._positions:
+                self._positions[item_id] = len(self.ids)
+                self.ids.append(item_id)
+                new_ids.append(item_id)
+            rows.append(self._positions[item_id])
+
+        if len(self.ids) > self._capacity():
+            self._grow(len(self.ids))
+
+        rows = np.asarray(rows)
+        if self.dtype == 'int8':
+            quantized, scales = quantize_int8(embeddings)
+            self._data[rows] = quantized
+            self._scales[rows] = scales
+            self._scales.flush()
+        else:
+            self._data[rows] = embeddings.astype(np.float16)
+        self._data.flush()
+        # Rows are on disk before their ids, so every listed id has its row
+        if new_ids:
+            lines = ''.join(json.dumps(item_id) + '\n' for item_id in new_ids).encode('utf-8')
+            with open(self._ids_path, 'ab') as f:
+                f.write(lines)
+            self._ids_offset += len(lines)
+
+    def _write_index(self):
+        """Atomically write the store header (dtype and dimension)."""
+        tmp_index = self._index_path.with_suffix('.tmp')
+        with open(tmp_index, 'w', encoding='utf-8') as f:
+            json.dump({'dim': self.dim, 'dtype': self.dtype}, f)
+        os.replace(tmp_index, self._index_path)
+
+    def get(self, item_id: str) -> np.ndarray:
+        """
+        Return the (dequantized) embedding for an id.
+
+        Args:
+            item_id: Identifier of a stored transcript
+
+        Returns:
+            float32 vector of length dim
+        """
+        row = self._positions[item_id]
+        vector = self._data[row].astype(np.float32)
+        if self.dtype == 'int8':
+            vector *= self._scales[row]
+        return vector
+
+    def similarities(self, queries: np.ndarray, batch_size: int = 8192):
+        """
+        Cosine similarity of every stored row against a set of query vectors.
+
+        Rows are processed in batches straight from the memory map, so the
+        full matrix is never materialized as float32.
+
+        Args:
+            queries: 2-D array of shape (q, dim)
+            batch_size: Number of stored rows per matrix multiply
+
+        Returns:
+            float32 array of shape (len(self), q)
+        """
+        queries = normalize_rows(queries)
+        count = len(self.ids)
+        out = np.empty((count, queries.shape[0]), dtype=np.float32)
+        for start in range(0, count, batch_size):
+            stop = min(start + batch_size, count)
+            block = self._data[start:stop].astype(np.float32)
+            sims = block @ queries.T
+            if self.dtype == 'int8':
+                sims *= self._scales[start:stop, None]
+            out[start:stop] = sims
+        return out
+
+    def info(self) -> Dict[str, Any]:
+        """Return a summary of the store."""
+        return {
+            'path': str(self.path),
+            'count': len(self.ids),
+            'dim': self.dim,
+            'dtype': self.dtype,
+            'capacity': self._capacity()
+        }
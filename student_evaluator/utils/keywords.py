@@ -47,6 +47,22 @@ def extract_name(text: str) -> str:
     return ""
 
 
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into sentences, keeping each sentence's end punctuation.
+    
+    Uses the same . ! ? boundaries as count_sentences.
+    
+    Args:
+        text: Input text
+        
+    Returns:
+        List of sentences
+    """
+    pieces = re.findall(r'[^.!?]+[.!?]*', text)
+    return [p.strip() for p in pieces if p.strip(' \t\r\n.!?')]
+
+
 def count_sentences(text: str) -> int:
     """
     Count number of sentences in text.
@@ -96,3 +112,91 @@ def calculate_ttr(text: str) -> float:
     unique_words = set(words)
     ttr = len(unique_words) / len(words)
     return round(ttr, 3)
+
+
+def calculate_mattr(words: List[str], window: int = 50) -> float:
+    """
+    Calculate Moving-Average Type-Token Ratio.
+    
+    The TTR of every window of `window` consecutive words, averaged. A
+    running count of each word in the window is updated as it slides, so
+    the whole text takes one pass instead of a set per window.
+    
+    Args:
+        words: Tokens (see tokenize_words)
+        window: Window length in words
+        
+    Returns:
+        MATTR value (0 to 1); plain TTR for texts shorter than a window
+    """
+    total_words = len(words)
+    if total_words == 0:
+        return 0.0
+    if total_words <= window:
+        return round(len(set(words)) / total_words, 3)
+    
+    counts = {}
+    for word in words[:window]:
+        counts[word] = counts.get(word, 0) + 1
+    distinct = len(counts)
+    distinct_sum = distinct
+    for position in range(window, total_words):
+        leaving = words[position - window]
+        remaining = counts[leaving] - 1
+        if remaining:
+            counts[leaving] = remaining
+        else:
+            del counts[leaving]
+            distinct -= 1
+        entering = words[position]
+        seen = counts.get(entering, 0)
+        if not seen:
+            distinct += 1
+        counts[entering] = seen + 1
+        distinct_sum += distinct
+    
+    windows = total_words - window + 1
+    return round(distinct_sum / (windows * window), 3)
+
+
+def calculate_mtld(words: List[str], threshold: float = 0.72) -> float:
+    """
+    Calculate the Measure of Textual Lexical Diversity.
+    
+    Walks the text keeping the TTR of the current run of words; each time
+    it falls to `threshold` a factor is complete and a new run starts. MTLD
+    is words per factor (a trailing partial run counts fractionally),
+    averaged over a forward and a backward pass. Independent of text length.
+    
+    Args:
+        words: Tokens (see tokenize_words)
+        threshold: TTR at which a factor is complete (0.72 is standard)
+        
+    Returns:
+        MTLD value in words (higher means a richer vocabulary)
+    """
+    if not words:
+        return 0.0
+    forward = _mtld_pass(words, threshold)
+    backward = _mtld_pass(words[::-1], threshold)
+    return round((forward + backward) / 2, 2)
+
+
+def _mtld_pass(words: List[str], threshold: float) -> float:
+    """Words per factor in one direction (see calculate_mtld)."""
+    factors = 0.0
+    types = set()
+    run_length = 0
+    ttr = 1.0
+    for word in words:
+        run_length += 1
+        types.add(word)
+        ttr = len(types) / run_length
+        if ttr <= threshold:
+            factors += 1
+            types = set()
+            run_length = 0
+            ttr = 1.0
+    if run_length:
+        factors += (1 - ttr) / (1 - threshold)
+    return len(words) / factors if factors else float(len(words))
@@ -0,0 +1,192 @@
+"""
+Process lifecycle: explicit cleanup of analyzers and their child processes.
+
+LanguageTool runs as a separate JVM. Relying on `__del__` to stop it leaves
+orphaned Java processes when a worker is recycled, because finalizers are
+not guaranteed to run at interpreter exit. Objects holding such resources
+register here; `close_all()` closes them and then reaps any LanguageTool
+child process that is still running. It runs at exit and, when
+`install_signal_handlers()` is called, on SIGTERM/SIGINT.
+"""
+
+import abc
+import atexit
+import os
+import signal
+import threading
+import time
+import weakref
+from typing import Any, Dict, Iterable, List
+
+
+_registry = weakref.WeakSet()
+_lock = threading.Lock()
+
+# Command-line fragment identifying LanguageTool server processes
+LANGUAGETOOL_MARKER = 'languagetool'
+
+
+class Closeable(abc.ABC):
+    """Base class adding context-manager support to classes with a close() method."""
+
+    @abc.abstractmethod
+    def close(self):
+        """Release the object's resources."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def register(obj: Any):
+    """Close `obj` (anything with close()) at exit; held weakly."""
+    with _lock:
+        _registry.add(obj)
+
+
+def unregister(obj: Any):
+    """Remove an object that has already been closed."""
+    with _lock:
+        _registry.discard(obj)
+
+
+def close_all(reap: bool = True):
+    """
+    Close every registered object, then reap leftover LanguageTool JVMs.
+
+    Args:
+        reap: Also terminate LanguageTool child processes that survived
+    """
+    with _lock:
+        objects = list(_registry)
+        _registry.clear()
+    for obj in objects:
+        try:
+            obj.close()
+        except Exception as e:
+            print(f"⚠️ Error closing {type(obj).__name__}: {e}")
+    if reap:
+        reap_children(LANGUAGETOOL_MARKER)
+
+
+def child_processes() -> List[Dict[str, Any]]:
+    """
+    List direct child processes of this process (Linux /proc; empty elsewhere).
+
+    Returns:
+        List of dicts with pid, command line and rss_bytes
+    """
+    parent = os.getpid()
+    page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+    children = []
+    try:
+        entries = os.listdir('/proc')
+    except OSError:
+        return children
+
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'rb') as f:
+                stat = f.read().decode('utf-8', 'replace')
+            # The command name may contain spaces; fields resume after ')'
+            fields = stat[stat.rindex(')') + 2:].split()
+            if int(fields[1]) != parent:
+                continue
+            with open(f'/proc/{entry}/cmdline', 'rb') as f:
+                cmdline = f.read().replace(b'\0', b' ').decode('utf-8', 'replace').strip()
+            with open(f'/proc/{entry}/statm') as f:
+                rss_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.append({
+            'pid': int(entry),
+            'cmdline': cmdline,
+            'rss_bytes': rss_pages * page_size
+        })
+    return children
+
+
+def reap_children(marker: str, timeout: float = 5.0) -> List[int]:
+    """
+    Terminate child processes whose command line contains `marker`.
+
+    Sends SIGTERM, waits up to `timeout` seconds, then SIGKILLs survivors.
+
+    Args:
+        marker: Case-insensitive command-line fragment (e.g. 'languagetool')
+        timeout: Grace period before SIGKILL
+
+    Returns:
+        PIDs that were signalled
+    """
+    marker = marker.lower()
+    pids = [c['pid'] for c in child_processes() if marker in c['cmdline'].lower()]
+    for pid in pids:
+        _signal(pid, signal.SIGTERM)
+
+    deadline = time.monotonic() + timeout
+    remaining = list(pids)
+    while remaining and time.monotonic() < deadline:
+        remaining = [pid for pid in remaining if not _reaped(pid)]
+        if remaining:
+            time.sleep(0.05)
+    for pid in remaining:
+        _signal(pid, signal.SIGKILL)
+        _reaped(pid)
+
+    if pids:
+        print(f"🧹 Reaped {len(pids)} LanguageTool process(es): {pids}")
+    return pids
+
+
+def install_signal_handlers(signals: Iterable[int] = (signal.SIGTERM, signal.SIGINT)):
+    """
+    Run close_all() when the process is asked to stop, then defer to the
+    previously installed handler (or the default action).
+
+    Must be called from the main thread. Servers that manage worker
+    shutdown themselves (gunicorn, uvicorn) should call close_all() from
+    their own shutdown hook instead.
+    """
+    for signum in signals:
+        previous = signal.getsignal(signum)
+
+        def handler(received, frame, previous=previous):
+            close_all()
+            if callable(previous):
+                previous(received, frame)
+            elif previous != signal.SIG_IGN:
+                signal.signal(received, signal.SIG_DFL)
+                os.kill(os.getpid(), received)
+
+        signal.signal(signum, handler)
+
+
+def _signal(pid: int, signum: int):
+    try:
+        os.kill(pid, signum)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _reaped(pid: int) -> bool:
+    """Collect an exited child; True once it is gone."""
+    try:
+        finished, _ = os.waitpid(pid, os.WNOHANG)
+        return finished == pid
+    except ChildProcessError:
+        # Not our child any more (already collected elsewhere)
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            return False
+        return False
+
+
+atexit.register(close_all)
@@ -0,0 +1,165 @@
+"""
+Memory sampling for long-running workers.
+
+`MemorySampler.record()` is called once per request; every N requests it
+samples the process RSS, the RSS of child processes (the LanguageTool JVM)
+and, when tracemalloc is enabled, the Python allocation sites that grew
+since the previous sample. Samples are kept in a bounded history for a
+debug endpoint and optionally logged.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+from .lifecycle import child_processes
+from ..config import MEMORY_SAMPLE_EVERY, MEMORY_SAMPLE_HISTORY, MEMORY_TOP_ALLOCATIONS
+
+
+def current_rss() -> Optional[int]:
+    """Return this process's resident set size in bytes (None if unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Peak RSS is the closest portable figure (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if os.uname().sysname == 'Darwin' else peak * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+class MemorySampler:
+    """Records process, child and Python heap memory every N requests."""
+
+    def __init__(
+        self,
+        every: int = MEMORY_SAMPLE_EVERY,
+        tracemalloc_frames: int = 0,
+        history: int = MEMORY_SAMPLE_HISTORY,
+        top: int = MEMORY_TOP_ALLOCATIONS,
+        log: bool = False
+    ):
+        """
+        Args:
+            every: Take a sample every `every` requests
+            tracemalloc_frames: Stack depth recorded by tracemalloc (0 disables
+                allocation tracking, which costs CPU and memory)
+            history: Samples kept in memory
+            top: Allocation sites reported per sample
+            log: Print a one-line summary for each sample
+        """
+        self.every = max(1, every)
+        self.top = top
+        self.log = log
+        self.samples = deque(maxlen=history)
+        self._requests = 0
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._baseline_rss = current_rss()
+        self._snapshot = None
+
+        self.tracemalloc_frames = tracemalloc_frames
+        if tracemalloc_frames > 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(tracemalloc_frames)
+            self._snapshot = self._take_snapshot()
+
+    def record(self) -> Optional[Dict[str, Any]]:
+        """
+        Count one request, sampling memory if this is the N-th.
+
+        Returns:
+            The new sample, or None if no sample was taken
+        """
+        with self._lock:
+            self._requests += 1
+            if self._requests % self.every:
+                return None
+            return self._sample()
+
+    def sample(self) -> Dict[str, Any]:
+        """Take a sample now, regardless of the request count."""
+        with self._lock:
+            return self._sample()
+
+    def _sample(self) -> Dict[str, Any]:
+        rss = current_rss()
+        children = child_processes()
+        sample = {
+            'time': round(time.time(), 3),
+            'requests': self._requests,
+            'rss_bytes': rss,
+            'rss_growth_bytes': rss - self._baseline_rss if rss and self._baseline_rss else None,
+            'children': [
+                {'pid': c['pid'], 'command': c['cmdline'][:80], 'rss_bytes': c['rss_bytes']}
+                for c in children
+            ],
+            'children_rss_bytes': sum(c['rss_bytes'] for c in children)
+        }
+
+        if self._snapshot is not None:
+            snapshot = self._take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            sample['python_traced_bytes'] = current
+            sample['python_peak_bytes'] = peak
+            sample['top_growth'] = self._top_growth(snapshot)
+            self._snapshot = snapshot
+
+        self.samples.append(sample)
+        if self.log:
+            print(f"🧠 Memory after {self._requests} requests: "
+                  f"RSS {_mb(rss)} MB, children {_mb(sample['children_rss_bytes'])} MB"
+                  + (f", Python {_mb(sample['python_traced_bytes'])} MB"
+                     if 'python_traced_bytes' in sample else ''))
+        return sample
+
+    def _take_snapshot(self) -> tracemalloc.Snapshot:
+        # Leave out the tracer's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>')
+        ))
+
+    def _top_growth(self, snapshot: tracemalloc.Snapshot) -> List[Dict[str, Any]]:
+        """Allocation sites that grew the most since the previous sample."""
+        growth = []
+        for stat in snapshot.compare_to(self._snapshot, 'lineno')[:self.top]:
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            growth.append({
+                'location': f"{frame.filename}:{frame.lineno}",
+                'size_bytes': stat.size,
+                'growth_bytes': stat.size_diff,
+                'count': stat.count
+            })
+        return growth
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the configuration, the request count and the sample history."""
+        with self._lock:
+            return {
+                'every': self.every,
+                'tracemalloc': self._snapshot is not None,
+                'requests': self._requests,
+                'uptime_seconds': round(time.time() - self._started, 1),
+                'baseline_rss_bytes': self._baseline_rss,
+                'samples': list(self.samples)
+            }
+
+    def close(self):
+        """Stop tracemalloc if this sampler started it."""
+        if self._snapshot is not None and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._snapshot = None
+
+
+def _mb(value: Optional[int]) -> str:
+    return f"{value / 1048576:.1f}" if value is not None else '?'
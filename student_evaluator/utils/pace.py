@@ -0,0 +1,166 @@
+"""
+Pace analysis over word-level timestamps.
+
+Everything here works on NumPy arrays of word start/end times, so a
+recording with tens of thousands of words is analyzed in milliseconds.
+"""
+
+import json
+from typing import Dict, Any, List, Tuple
+
+import numpy as np
+
+
+def parse_word_timestamps(data: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Extract word start/end times from common ASR output shapes.
+
+    Accepted forms:
+        - [{'start': 0.1, 'end': 0.4, ...}, ...]   (Vosk 'result', Whisper 'words')
+        - [[0.1, 0.4], ...] or an (n, 2) array
+        - a (starts, ends) tuple of arrays, as returned by this function
+        - {'result': [...]}, {'words': [...]} or Whisper-style
+          {'segments': [{'words': [...]}, ...]}
+
+    Args:
+        data: Decoded ASR JSON or an array of (start, end) pairs
+
+    Returns:
+        Tuple of (starts, ends) float64 arrays, sorted by start time
+
+    Raises:
+        ValueError: If the data has no usable timestamps
+    """
+    if (isinstance(data, tuple) and len(data) == 2
+            and all(isinstance(a, np.ndarray) and a.ndim == 1 for a in data)):
+        return data
+
+    if isinstance(data, dict):
+        if 'segments' in data:
+            data = [w for segment in data['segments'] for w in segment.get('words', [])]
+        elif 'result' in data:
+            data = data['result']
+        elif 'words' in data:
+            data = data['words']
+        else:
+            raise ValueError("Timestamp JSON needs a 'result', 'words' or 'segments' list")
+
+    if isinstance(data, np.ndarray):
+        pairs = data.astype(np.float64)
+    elif len(data) and isinstance(data[0], dict):
+        try:
+            pairs = np.array([(w['start'], w['end']) for w in data], dtype=np.float64)
+        except (KeyError, TypeError):
+            raise ValueError("Every word needs numeric 'start' and 'end' times")
+    else:
+        try:
+            pairs = np.asarray(data, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError("Timestamps must be (start, end) pairs")
+
+    if pairs.size == 0:
+        pairs = pairs.reshape(0, 2)
+    if pairs.ndim != 2 or pairs.shape[1] != 2:
+        raise ValueError("Timestamps must be (start, end) pairs")
+    if not np.isfinite(pairs).all() or (pairs < 0).any():
+        raise ValueError("Timestamps must be finite, non-negative seconds")
+
+    order = np.argsort(pairs[:, 0], kind='stable')
+    starts = pairs[order, 0]
+    ends = np.maximum(pairs[order, 1], starts)
+    return starts, ends
+
+
+def load_word_timestamps(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Read word timestamps from an ASR JSON file (see parse_word_timestamps)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_word_timestamps(json.load(f))
+
+
+def rolling_wpm(starts: np.ndarray, duration: float, window: float, step: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Words per minute in a sliding window, in one linear pass.
+
+    Word starts are counted into `step`-second bins; a cumulative sum turns
+    every window (window / step consecutive bins) into a single subtraction.
+
+    Args:
+        starts: Sorted word start times in seconds
+        duration: Recording length in seconds
+        window: Window length in seconds
+        step: Distance between window starts in seconds
+
+    Returns:
+        Tuple of (window start times, WPM per window)
+    """
+    num_bins = max(1, int(np.ceil(duration / step)))
+    bins = np.minimum((starts / step).astype(np.int64), num_bins - 1)
+    counts = np.bincount(bins, minlength=num_bins)
+    cumulative = np.concatenate(([0], np.cumsum(counts)))
+
+    width = max(1, int(round(window / step)))
+    if width >= num_bins:
+        # Recording shorter than one window: a single window over all of it
+        return np.zeros(1), np.array([len(starts) / duration * 60.0 if duration > 0 else 0.0])
+
+    window_counts = cumulative[width:] - cumulative[:-width]
+    times = np.arange(len(window_counts)) * step
+    return times, window_counts * (60.0 / (width * step))
+
+
+def detect_pauses(starts: np.ndarray, ends: np.ndarray, min_pause: float) -> Dict[str, Any]:
+    """
+    Find silent gaps between consecutive words.
+
+    Args:
+        starts: Sorted word start times
+        ends: Matching word end times
+        min_pause: Shortest gap (seconds) counted as a pause
+
+    Returns:
+        Dictionary with count, total_seconds, longest_seconds, longest_at,
+        mean_seconds and the gaps/positions arrays of every pause
+    """
+    if len(starts) < 2:
+        gaps = np.zeros(0)
+        positions = np.zeros(0)
+    else:
+        # A word may start before the previous one ends (overlapping ASR
+        # segments); the running max of end times keeps gaps non-negative
+        previous_end = np.maximum.accumulate(ends[:-1])
+        all_gaps = starts[1:] - previous_end
+        mask = all_gaps >= min_pause
+        gaps = all_gaps[mask]
+        positions = previous_end[mask]
+
+    longest = int(np.argmax(gaps)) if len(gaps) else None
+    return {
+        'count': int(len(gaps)),
+        'total_seconds': round(float(gaps.sum()), 2),
+        'longest_seconds': round(float(gaps[longest]), 2) if longest is not None else 0.0,
+        'longest_at': round(float(positions[longest]), 2) if longest is not None else None,
+        'mean_seconds': round(float(gaps.mean()), 2) if len(gaps) else 0.0,
+        'gaps': gaps,
+        'positions': positions
+    }
+
+
+def classify_bands(values: np.ndarray, ranges: List[Dict[str, Any]]) -> List[str]:
+    """
+    Label each value with its score band (first matching range, as in
+    score_from_range), vectorized over the bands.
+
+    Args:
+        values: Values to classify
+        ranges: Range dictionaries with 'min', 'max' and 'label' keys
+
+    Returns:
+        Band label per value ('Unknown' where no range matches)
+    """
+    labels = np.full(len(values), 'Unknown', dtype=object)
+    unassigned = np.ones(len(values), dtype=bool)
+    for band in ranges:
+        match = unassigned & (values >= band['min']) & (values <= band['max'])
+        labels[match] = band.get('label', '')
+        unassigned &= ~match
+    return labels.tolist()
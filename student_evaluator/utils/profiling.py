@@ -0,0 +1,210 @@
+"""
+On-demand profiling of single evaluations.
+
+A request can ask to be profiled (web header, CLI flag, `profile=True`),
+and 1-in-N requests can be profiled automatically. Two capture modes:
+
+    cprofile  deterministic cProfile of the evaluating thread, saved as
+              .pstats (open with `python -m pstats` or snakeviz)
+    sampling  a background thread samples stacks every few milliseconds,
+              saved as a collapsed-stack file (flamegraph.pl / speedscope);
+              can cover every thread, so it also sees async executors
+
+Requests that are not profiled pay only for a counter check.
+"""
+
+import cProfile
+import io
+import itertools
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+from ..config import (
+    PROFILE_DIR,
+    PROFILE_MODES,
+    PROFILE_SAMPLING_INTERVAL_MS,
+    PROFILE_MAX_FILES,
+    PROFILE_TOP_FUNCTIONS
+)
+
+
+class StackSampler(threading.Thread):
+    """Collects collapsed call stacks of other threads at a fixed interval."""
+
+    def __init__(self, interval: float, thread_ids: Optional[set] = None):
+        """
+        Args:
+            interval: Seconds between samples
+            thread_ids: Threads to sample (None samples every other thread)
+        """
+        super().__init__(name='profile-sampler', daemon=True)
+        self.interval = interval
+        self.thread_ids = thread_ids
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{Path(code.co_filename).stem}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class RequestProfiler:
+    """Decides which requests to profile and stores their profiles."""
+
+    def __init__(
+        self,
+        output_dir: str = PROFILE_DIR,
+        mode: str = 'cprofile',
+        sample_every: int = 0,
+        interval_ms: float = PROFILE_SAMPLING_INTERVAL_MS,
+        max_files: int = PROFILE_MAX_FILES
+    ):
+        """
+        Args:
+            output_dir: Directory for .pstats / .collapsed files
+            mode: 'cprofile' or 'sampling'
+            sample_every: Also profile every N-th request automatically (0 = only on demand)
+            interval_ms: Stack sampling interval for 'sampling' mode
+            max_files: Oldest profiles are deleted beyond this many
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}'. Choose from {PROFILE_MODES}")
+        self.output_dir = Path(output_dir)
+        self.mode = mode
+        self.sample_every = sample_every
+        self.interval = interval_ms / 1000
+        self.max_files = max_files
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        # Only one cProfile can be active per process; concurrent captures sample instead
+        self._cprofile_lock = threading.Lock()
+
+    def sample_due(self) -> bool:
+        """Count a request and return True if it is the N-th (automatic sampling)."""
+        return self.sample_every > 0 and next(self._counter) % self.sample_every == 0
+
+    @contextmanager
+    def capture(self, label: str = 'request', mode: Optional[str] = None,
+                all_threads: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Profile the enclosed block.
+
+        Args:
+            label: Included in the file name (e.g. a submission id)
+            mode: Override the profiler's mode for this capture
+            all_threads: Sample every thread ('sampling' mode), not just this one
+
+        Yields:
+            Dict that is filled in on exit with mode, path, seconds and top
+            (the functions with the most self time)
+        """
+        mode = mode or self.mode
+        if mode == 'cprofile' and not self._cprofile_lock.acquire(blocking=False):
+            mode = 'sampling'
+        report = {'mode': mode}
+        started = time.perf_counter()
+
+        if mode == 'cprofile':
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield report
+            finally:
+                profiler.disable()
+                self._cprofile_lock.release()
+                report['seconds'] = round(time.perf_counter() - started, 4)
+                path = self._path(label, '.pstats')
+                profiler.dump_stats(str(path))
+                report['path'] = str(path)
+                report['top'] = _top_pstats(profiler)
+                self._prune()
+        else:
+            thread_ids = None if all_threads else {threading.get_ident()}
+            sampler = StackSampler(self.interval, thread_ids)
+            sampler.start()
+            try:
+                yield report
+            finally:
+                sampler.stop()
+                report['seconds'] = round(time.perf_counter() - started, 4)
+                path = self._path(label, '.collapsed')
+                with open(path, 'w', encoding='utf-8') as f:
+                    for stack, count in sampler.stacks.most_common():
+                        f.write(f"{stack} {count}\n")
+                report['path'] = str(path)
+                report['samples'] = sampler.samples
+                report['top'] = _top_collapsed(sampler.stacks)
+                self._prune()
+
+    def _path(self, label: str, suffix: str) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        safe_label = re.sub(r'[^A-Za-z0-9_.-]', '_', label)[:40] or 'request'
+        stamp = time.strftime('%Y%m%d-%H%M%S')
+        return self.output_dir / f"{stamp}_{safe_label}_{uuid.uuid4().hex[:8]}{suffix}"
+
+    def _prune(self):
+        """Delete the oldest profiles beyond max_files."""
+        with self._lock:
+            files = sorted(
+                (p for p in self.output_dir.iterdir() if p.suffix in ('.pstats', '.collapsed')),
+                key=lambda p: p.stat().st_mtime
+            )
+            for old in files[:max(0, len(files) - self.max_files)]:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass
+
+
+def _top_pstats(profiler: cProfile.Profile, limit: int = PROFILE_TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """Functions with the most self time in a cProfile run."""
+    stats = pstats.Stats(profiler, stream=io.StringIO())
+    rows = []
+    for (filename, line, name), (_, calls, self_time, cumulative, _) in stats.stats.items():
+        location = name if filename == '~' else f"{os.path.basename(filename)}:{line}({name})"
+        rows.append({
+            'function': location,
+            'calls': calls,
+            'self_seconds': round(self_time, 4),
+            'cumulative_seconds': round(cumulative, 4)
+        })
+    rows.sort(key=lambda row: row['self_seconds'], reverse=True)
+    return rows[:limit]
+
+
+def _top_collapsed(stacks: Counter, limit: int = PROFILE_TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """Leaf frames with the most samples (where time is actually spent)."""
+    leaves = Counter()
+    for stack, count in stacks.items():
+        leaves[stack.rsplit(';', 1)[-1]] += count
+    total = sum(leaves.values())
+    return [
+        {'function': leaf, 'samples': count, 'share': round(count / total, 3)}
+        for leaf, count in leaves.most_common(limit)
+    ]
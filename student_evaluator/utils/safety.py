@@ -0,0 +1,281 @@
+"""
+Bounds on the cost of analyzing untrusted transcripts.
+
+Python's `re` is a backtracking engine: a pattern such as `(\\w+\\s*)+x`
+takes exponential time on a long line without an `x`. Rubric regexes come
+from tenant files, so `compile_pattern()` validates every pattern at
+rubric-compile time and rejects the constructs that backtrack
+catastrophically: nested variable repeats, alternation under a repeat,
+backreferences, and unbounded repeats in sequence that can match the same
+characters (`.*.*.*=` is polynomial of degree four). This is a heuristic,
+not a proof of linearity: what passes can still be quadratic under
+`re.search` (e.g. `\w+x`), which is why patterns are length-limited and
+run only against size-limited transcripts.
+
+`normalize_transcript()` applies the per-request input limits: pathological
+whitespace runs are collapsed, and transcripts that are too long or contain
+absurdly long "words" are rejected before any analyzer runs.
+"""
+
+import re
+from typing import Any, Pattern
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+from ..config import (
+    MAX_TRANSCRIPT_CHARS,
+    MAX_TOKEN_CHARS,
+    MAX_WHITESPACE_RUN,
+    RUBRIC_MAX_PATTERN_LENGTH
+)
+
+
+class UnsafePattern(ValueError):
+    """Raised when a rubric regex is invalid or can backtrack catastrophically."""
+
+
+class InputTooLarge(ValueError):
+    """Raised when a transcript exceeds the per-request input limits."""
+
+
+_REPEATS = tuple(
+    getattr(sre_parse, name)
+    for name in ('MAX_REPEAT', 'MIN_REPEAT', 'POSSESSIVE_REPEAT')
+    if hasattr(sre_parse, name)
+)
+_BACKREFERENCES = (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS)
+_ZERO_WIDTH = (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+# Characters that stand in for the whole alphabet when comparing what two
+# repeats can match: ASCII plus a few non-ASCII letters, digits and spaces
+_SAMPLE = frozenset(map(chr, range(128))) | frozenset('\xa0\xe9\u0663\u2028\u4e2d')
+_CATEGORIES = {
+    name: frozenset(ch for ch in _SAMPLE if re.match(regex, ch))
+    for name, regex in (
+        ('DIGIT', r'\d'), ('NOT_DIGIT', r'\D'),
+        ('SPACE', r'\s'), ('NOT_SPACE', r'\S'),
+        ('WORD', r'\w'), ('NOT_WORD', r'\W'),
+        ('LINEBREAK', r'\n'), ('NOT_LINEBREAK', r'[^\n]')
+    )
+}
+
+_WHITESPACE_RUN = re.compile(r'\s{%d,}' % (MAX_WHITESPACE_RUN + 1))
+
+
+def compile_pattern(pattern: Any, max_length: int = RUBRIC_MAX_PATTERN_LENGTH) -> Pattern:
+    """
+    Compile a rubric regex after checking that it cannot backtrack catastrophically.
+
+    Args:
+        pattern: Regular expression source
+        max_length: Longest accepted pattern
+
+    Returns:
+        Compiled pattern
+
+    Raises:
+        UnsafePattern: If the pattern is not a string, too long, invalid, or
+            contains a construct with super-linear worst-case matching time
+    """
+    if not isinstance(pattern, str):
+        raise UnsafePattern(f"Pattern must be a string, got {type(pattern).__name__}")
+    if len(pattern) > max_length:
+        raise UnsafePattern(f"Pattern is longer than {max_length} characters: {pattern[:40]!r}...")
+    try:
+        parsed = sre_parse.parse(pattern)
+    except re.error as e:
+        raise UnsafePattern(f"Invalid pattern {pattern!r}: {e}")
+
+    problem = _find_problem(parsed, inside_repeat=False) or _find_overlapping_repeats(parsed)
+    if problem:
+        raise UnsafePattern(f"Pattern {pattern!r} {problem}")
+    return re.compile(pattern)
+
+
+def _find_problem(subpattern, inside_repeat: bool) -> str:
+    """
+    Walk a parsed pattern looking for catastrophic-backtracking constructs.
+
+    `inside_repeat` is True within the body of a repeat that can match a
+    variable number of times; there, a second variable repeat or an
+    alternation gives the engine exponentially many ways to split the input.
+
+    Returns:
+        Description of the first problem found, or '' if the pattern is safe
+    """
+    for op, av in subpattern:
+        if op in _BACKREFERENCES:
+            return "uses a backreference"
+        if op in _REPEATS:
+            low, high, body = av
+            variable = low != high
+            if inside_repeat and variable:
+                return "nests a repeat inside another repeat (e.g. (a+)+)"
+            problem = _find_problem(body, inside_repeat or (variable and high > 1))
+        elif op == sre_parse.BRANCH:
+            if inside_repeat:
+                return "repeats an alternation (e.g. (a|ab)+)"
+            problem = ''
+            for branch in av[1]:
+                problem = _find_problem(branch, inside_repeat)
+                if problem:
+                    break
+        elif op == sre_parse.SUBPATTERN:
+            problem = _find_problem(av[-1], inside_repeat)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            problem = _find_problem(av[1], inside_repeat)
+        elif op == getattr(sre_parse, 'ATOMIC_GROUP', None):
+            problem = _find_problem(av, inside_repeat)
+        else:
+            problem = ''
+        if problem:
+            return problem
+    return ''
+
+
+def _find_overlapping_repeats(subpattern) -> str:
+    """
+    Look for unbounded repeats in sequence that can match the same characters.
+
+    In `.*.*=` the engine tries every way of splitting a run between the two
+    repeats, so each extra repeat raises the degree of the polynomial.
+    Anything between two such repeats that the first one could also match
+    (or that can match nothing) does not separate them: `.*a.*=` is just as
+    slow. Character classes are compared on a sample alphabet with case
+    folded, which errs towards rejecting.
+
+    Returns:
+        Description of the first problem found, or '' if none
+    """
+    for op, av in subpattern:
+        if op in _REPEATS:
+            problem = _find_overlapping_repeats(av[2])
+        elif op == sre_parse.BRANCH:
+            problem = next(filter(None, map(_find_overlapping_repeats, av[1])), '')
+        elif op == sre_parse.SUBPATTERN:
+            problem = _find_overlapping_repeats(av[-1])
+        else:
+            problem = ''
+        if problem:
+            return problem
+
+    # Character sets of the unbounded repeats that can still reach this point
+    open_repeats = []
+    for op, av in _flatten(subpattern):
+        chars = _chars([(op, av)])
+        unbounded = op in _REPEATS and av[1] == sre_parse.MAXREPEAT
+        if unbounded and any(chars & earlier for earlier in open_repeats):
+            return "has unbounded repeats in sequence that can match the same text (e.g. .*.*)"
+        if not _matches_empty([(op, av)]):
+            open_repeats = [earlier for earlier in open_repeats if chars <= earlier]
+        if unbounded:
+            open_repeats.append(chars)
+    return ''
+
+
+def _flatten(subpattern):
+    """Yield the items of a sequence with plain groups expanded in place."""
+    for op, av in subpattern:
+        if op == sre_parse.SUBPATTERN:
+            yield from _flatten(av[-1])
+        else:
+            yield op, av
+
+
+def _chars(subpattern) -> frozenset:
+    """Sample characters a parsed pattern can consume (case-folded)."""
+    chars = set()
+    for op, av in subpattern:
+        if op == sre_parse.LITERAL:
+            chars.add(chr(av))
+        elif op == sre_parse.NOT_LITERAL:
+            chars.update(_SAMPLE - {chr(av)})
+        elif op == sre_parse.IN:
+            chars.update(_class_chars(av))
+        elif op in _REPEATS:
+            chars.update(_chars(av[2]))
+        elif op == sre_parse.BRANCH:
+            for branch in av[1]:
+                chars.update(_chars(branch))
+        elif op == sre_parse.SUBPATTERN:
+            chars.update(_chars(av[-1]))
+        elif op not in _ZERO_WIDTH:
+            # ANY and anything unrecognized: assume every character
+            chars.update(_SAMPLE)
+    return frozenset(chars | {ch.lower() for ch in chars} | {ch.upper() for ch in chars})
+
+
+def _class_chars(items) -> frozenset:
+    """Sample characters matched by a character class ([...], \\w, ...)."""
+    chars = set()
+    negate = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            chars.add(chr(av))
+        elif op == sre_parse.RANGE:
+            chars.update(ch for ch in _SAMPLE if av[0] <= ord(ch) <= av[1])
+        elif op == sre_parse.CATEGORY:
+            name = str(av).replace('CATEGORY_', '').replace('UNI_', '').replace('LOC_', '')
+            chars.update(_CATEGORIES.get(name, _SAMPLE))
+        else:
+            chars.update(_SAMPLE)
+    return _SAMPLE - chars if negate else frozenset(chars)
+
+
+def _matches_empty(subpattern) -> bool:
+    """Whether a parsed pattern can match the empty string."""
+    for op, av in subpattern:
+        if op in _ZERO_WIDTH:
+            continue
+        if op in _REPEATS:
+            if av[0] > 0 and not _matches_empty(av[2]):
+                return False
+        elif op == sre_parse.BRANCH:
+            if not any(_matches_empty(branch) for branch in av[1]):
+                return False
+        elif op == sre_parse.SUBPATTERN:
+            if not _matches_empty(av[-1]):
+                return False
+        else:
+            return False
+    return True
+
+
+def normalize_transcript(
+    text: str,
+    max_chars: int = MAX_TRANSCRIPT_CHARS,
+    max_token_chars: int = MAX_TOKEN_CHARS
+) -> str:
+    """
+    Collapse pathological whitespace and enforce the input limits.
+
+    Whitespace runs longer than MAX_WHITESPACE_RUN characters become a
+    paragraph break (if they contain a newline) or a single space; shorter
+    runs are left alone so ordinary spacing reaches the grammar checker
+    unchanged.
+
+    Args:
+        text: Transcript text
+        max_chars: Longest accepted transcript after normalization
+        max_token_chars: Longest accepted whitespace-separated token
+
+    Returns:
+        Normalized transcript
+
+    Raises:
+        InputTooLarge: If a limit is exceeded
+    """
+    text = _WHITESPACE_RUN.sub(lambda m: '\n\n' if '\n' in m.group() else ' ', text)
+    if len(text) > max_chars:
+        raise InputTooLarge(f"Transcript is too long ({len(text)} characters, limit {max_chars})")
+    longest = max(map(len, text.split()), default=0)
+    if longest > max_token_chars:
+        raise InputTooLarge(
+            f"Transcript contains a {longest}-character word (limit {max_token_chars})"
+        )
+    return text
@@ -0,0 +1,219 @@
+"""
+Priority scheduling in front of shared analysis backends.
+
+A `PriorityScheduler` hands out a fixed number of slots for one backend
+(LanguageTool, the semantic model) to callers from several priority
+classes. A waiting caller from a higher level (lower number) always goes
+first, so an interactive request skips every queued batch item. Classes on
+the same level share the free slots in proportion to their weights
+(start-time fair queuing), and each class can be capped below the total
+capacity so batch work never holds every slot.
+
+Wait times are recorded per class and reported by stats().
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+from ..config import SCHEDULER_CLASSES, SCHEDULER_DEFAULT_PRIORITY
+
+
+# Recent waits kept per class for the percentiles in stats()
+WAIT_WINDOW = 1000
+
+
+class SchedulerTimeout(Exception):
+    """Raised when no slot became free within the caller's timeout."""
+
+
+class _Waiter:
+    __slots__ = ('start_tag', 'enqueued', 'granted')
+
+    def __init__(self, start_tag: float):
+        self.start_tag = start_tag
+        self.enqueued = time.monotonic()
+        self.granted = False
+
+
+class _PriorityClass:
+    """Queue, limits and counters of one priority class."""
+
+    def __init__(self, name: str, level: int = 0, weight: float = 1.0,
+                 max_concurrent: Optional[int] = None):
+        if weight <= 0:
+            raise ValueError(f"Priority class {name!r} needs a positive weight")
+        self.name = name
+        self.level = level
+        self.weight = weight
+        self.max_concurrent = max_concurrent
+        self.queue = deque()
+        self.in_flight = 0
+        self.last_finish = 0.0
+        self.waits = deque(maxlen=WAIT_WINDOW)
+        self.counters = Counter()
+
+    def eligible(self) -> bool:
+        return bool(self.queue) and (self.max_concurrent is None or self.in_flight < self.max_concurrent)
+
+
+class PriorityScheduler:
+    """Weighted, prioritized admission to a backend with limited concurrency."""
+
+    def __init__(
+        self,
+        capacity: int,
+        classes: Optional[Dict[str, Dict[str, Any]]] = None,
+        default_priority: str = SCHEDULER_DEFAULT_PRIORITY,
+        name: str = 'scheduler'
+    ):
+        """
+        Args:
+            capacity: Calls allowed to use the backend at the same time
+            classes: Class name -> {'level', 'weight', 'max_concurrent'}
+                (defaults to SCHEDULER_CLASSES)
+            default_priority: Class used when a caller names none
+            name: Name used in stats
+        """
+        classes = classes if classes is not None else SCHEDULER_CLASSES
+        self.capacity = capacity
+        self.name = name
+        self._classes = {
+            class_name: _PriorityClass(class_name, **options) for class_name, options in classes.items()
+        }
+        if default_priority not in self._classes:
+            raise ValueError(f"Unknown default priority class: {default_priority}")
+        self.default_priority = default_priority
+        self._in_flight = 0
+        # Start tag of the most recently granted waiter
+        self._virtual_time = 0.0
+        self._condition = threading.Condition()
+
+    def priorities(self) -> list:
+        return list(self._classes)
+
+    def _class(self, priority: Optional[str]) -> _PriorityClass:
+        priority_class = self._classes.get(priority or self.default_priority)
+        if priority_class is None:
+            raise ValueError(f"Unknown priority class: {priority}")
+        return priority_class
+
+    def acquire(self, priority: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Wait for a slot.
+
+        Args:
+            priority: Priority class name (default_priority if None)
+            timeout: Give up after this many seconds
+
+        Raises:
+            ValueError: If the priority class is unknown
+            SchedulerTimeout: If no slot was granted in time
+        """
+        priority_class = self._class(priority)
+        with self._condition:
+            start = max(self._virtual_time, priority_class.last_finish)
+            priority_class.last_finish = start + 1.0 / priority_class.weight
+            waiter = _Waiter(start)
+            priority_class.queue.append(waiter)
+            self._dispatch()
+            expires = None if timeout is None else time.monotonic() + timeout
+            while not waiter.granted:
+                remaining = None if expires is None else expires - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    priority_class.queue.remove(waiter)
+                    priority_class.counters['timed_out'] += 1
+                    raise SchedulerTimeout(f"No {self.name} slot free within {timeout}s")
+                self._condition.wait(remaining)
+            priority_class.waits.append(time.monotonic() - waiter.enqueued)
+
+    def try_acquire(self, priority: Optional[str] = None) -> bool:
+        """
+        Take a slot only if one is free right now and nobody is waiting.
+
+        Used for optional extra concurrency (e.g. checking more chunks of a
+        long text in parallel): it never queues, and never takes a slot that
+        a waiting caller of the same or a better level should get.
+
+        Returns:
+            True if a slot was taken (give it back with release())
+        """
+        priority_class = self._class(priority)
+        with self._condition:
+            if self._in_flight >= self.capacity or not (
+                    priority_class.max_concurrent is None
+                    or priority_class.in_flight < priority_class.max_concurrent):
+                return False
+            if any(c.queue and c.level <= priority_class.level for c in self._classes.values()):
+                return False
+            priority_class.in_flight += 1
+            priority_class.counters['granted'] += 1
+            self._in_flight += 1
+            return True
+
+    def release(self, priority: Optional[str] = None):
+        """Return a slot taken by acquire() with the same priority."""
+        priority_class = self._class(priority)
+        with self._condition:
+            priority_class.in_flight -= 1
+            self._in_flight -= 1
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, priority: Optional[str] = None, timeout: Optional[float] = None):
+        """Hold a slot for the duration of a with block (see acquire())."""
+        self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def _dispatch(self):
+        """Grant free slots to waiters: best level first, then smallest start tag."""
+        granted = False
+        while self._in_flight < self.capacity:
+            candidates = [c for c in self._classes.values() if c.eligible()]
+            if not candidates:
+                break
+            chosen = min(candidates, key=lambda c: (c.level, c.queue[0].start_tag))
+            waiter = chosen.queue.popleft()
+            waiter.granted = True
+            chosen.in_flight += 1
+            chosen.counters['granted'] += 1
+            self._in_flight += 1
+            self._virtual_time = max(self._virtual_time, waiter.start_tag)
+            granted = True
+        if granted:
+            self._condition.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return slot usage and per-class queue lengths and wait times (ms)."""
+        with self._condition:
+            classes = {}
+            for priority_class in self._classes.values():
+                waits = sorted(priority_class.waits)
+                classes[priority_class.name] = {
+                    'level': priority_class.level,
+                    'weight': priority_class.weight,
+                    'max_concurrent': priority_class.max_concurrent,
+                    'in_flight': priority_class.in_flight,
+                    'queued': len(priority_class.queue),
+                    'granted': priority_class.counters['granted'],
+                    'timed_out': priority_class.counters['timed_out'],
+                    'wait_ms': _wait_summary(waits)
+                }
+            return {'capacity': self.capacity, 'in_flight': self._in_flight, 'classes': classes}
+
+
+def _wait_summary(waits: list) -> Dict[str, float]:
+    """Mean, p50, p95 and max of sorted wait times, in milliseconds."""
+    if not waits:
+        return {'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+    return {
+        'mean': round(1000 * sum(waits) / len(waits), 2),
+        'p50': round(1000 * waits[len(waits) // 2], 2),
+        'p95': round(1000 * waits[min(len(waits) - 1, int(len(waits) * 0.95))], 2),
+        'max': round(1000 * waits[-1], 2)
+    }
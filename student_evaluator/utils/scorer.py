@@ -1,6 +1,7 @@
 """Scorer utility for mapping values to score ranges."""
 
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from ..config import VOCABULARY_BANDS
 
 
 def score_from_range(value: float, ranges: list) -> Dict[str, Any]:
@@ -51,26 +52,24 @@ def score_grammar(errors_per_100: float) -> int:
         return 2
 
 
-def score_vocabulary(ttr: float) -> int:
+def score_vocabulary(value: float, metric: str = 'ttr',
+                     bands: Optional[List[Dict[str, Any]]] = None) -> int:
     """
-    Score vocabulary richness based on TTR.
+    Score vocabulary richness.
     
     Args:
-        ttr: Type-Token Ratio (0 to 1)
+        value: Metric value (TTR or MATTR 0 to 1, MTLD in words)
+        metric: 'ttr', 'mattr' or 'mtld' (selects the default bands)
+        bands: Bands overriding the defaults, as [{'min', 'score'}, ...]
+            from highest to lowest
         
     Returns:
         Vocabulary score (0-10)
     """
-    if ttr >= 0.9:
-        return 10
-    elif ttr >= 0.7:
-        return 8
-    elif ttr >= 0.5:
-        return 6
-    elif ttr >= 0.3:
-        return 4
-    else:
-        return 2
+    for band in bands or VOCABULARY_BANDS[metric]:
+        if value >= band['min']:
+            return band['score']
+    return 2
 
 
 def score_filler_rate(filler_rate: float) -> int:
@@ -0,0 +1,324 @@
+"""
+Integer token ids for corpus-level text statistics.
+
+A `Vocabulary` interns tokens (as produced by tokenize_words) and encodes
+each transcript as a uint32 NumPy array: 4 bytes per token instead of a
+list slot plus a str object. On id arrays, type-token ratio is one
+`np.unique`, filler and phrase counts are vectorized comparisons, and
+corpus frequencies are `np.bincount` sums.
+
+Vocabularies are saved as JSON so batch workers encode with the same ids;
+`EncodedCorpus` stores many encoded transcripts in one flat array.
+`distributed.text_stats()` (the `text-stats` command) uses both for
+manifest-wide statistics.
+
+A frozen vocabulary maps every token it has not seen to id 0, so all
+unknown words of a transcript count as one type: TTR on ids from a frozen
+vocabulary is lower than calculate_ttr whenever a transcript has more than
+one unknown word. Statistics that must match the analyzers exactly need a
+growing vocabulary (the default).
+"""
+
+import json
+from pathlib import Path
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from .keywords import tokenize_words
+
+UNKNOWN = '<unk>'
+ID_DTYPE = np.uint32
+
+
+class Vocabulary:
+    """Bidirectional token <-> id mapping; id 0 is reserved for unknown tokens."""
+
+    def __init__(self, tokens: Optional[Iterable[str]] = None, frozen: bool = False):
+        """
+        Args:
+            tokens: Initial tokens, assigned ids in order
+            frozen: Map unseen tokens to the unknown id instead of adding them
+        """
+        self._ids: Dict[str, int] = {UNKNOWN: 0}
+        self._tokens: List[str] = [UNKNOWN]
+        for token in tokens or ():
+            self.add(token)
+        self.frozen = frozen
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def __contains__(self, token: str) -> bool:
+        return token in self._ids
+
+    def add(self, token: str) -> int:
+        """Return the id of `token`, assigning a new one if needed."""
+        token_id = self._ids.get(token)
+        if token_id is None:
+            token_id = self._ids[token] = len(self._tokens)
+            self._tokens.append(token)
+        return token_id
+
+    def id_of(self, token: str) -> int:
+        """Return the id of `token` (0 if unknown), without adding it."""
+        return self._ids.get(token, 0)
+
+    def token(self, token_id: int) -> str:
+        return self._tokens[token_id]
+
+    def encode(self, text: Union[str, Sequence[str]]) -> np.ndarray:
+        """
+        Encode a text (or an already tokenized list) as token ids.
+
+        Args:
+            text: Transcript text, tokenized with tokenize_words, or tokens
+
+        Returns:
+            uint32 array of token ids (new tokens are added unless frozen)
+        """
+        tokens = tokenize_words(text) if isinstance(text, str) else text
+        if self.frozen:
+            ids = self._ids
+            return np.fromiter((ids.get(t, 0) for t in tokens), dtype=ID_DTYPE, count=len(tokens))
+        add = self.add
+        return np.fromiter((add(t) for t in tokens), dtype=ID_DTYPE, count=len(tokens))
+
+    def encode_phrase(self, phrase: str) -> np.ndarray:
+        """Encode a literal phrase without growing the vocabulary."""
+        return np.array([self.id_of(t) for t in tokenize_words(phrase)], dtype=ID_DTYPE)
+
+    def decode(self, ids: Iterable[int]) -> List[str]:
+        return [self._tokens[i] for i in ids]
+
+    def save(self, path: str):
+        """Write the vocabulary (tokens in id order) to a JSON file."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'tokens': self._tokens[1:]}, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str, frozen: bool = True) -> 'Vocabulary':
+        """
+        Read a vocabulary written by save().
+
+        Args:
+            path: JSON file
+            frozen: Keep ids fixed (the usual case for workers sharing a vocabulary)
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f)['tokens'], frozen=frozen)
+
+
+def type_token_ratio(ids: np.ndarray) -> float:
+    """
+    TTR of an encoded text.
+
+    Equals calculate_ttr on the text when it was encoded by a growing
+    vocabulary; with a frozen one, unknown tokens share id 0 and count as a
+    single type.
+    """
+    if len(ids) == 0:
+        return 0.0
+    return round(len(np.unique(ids)) / len(ids), 3)
+
+
+def count_phrase(ids: np.ndarray, phrase: np.ndarray) -> int:
+    """
+    Count token-aligned occurrences of an encoded phrase.
+
+    One vectorized comparison per phrase token; a phrase containing an
+    unknown token (id 0) never matches.
+    """
+    length = len(phrase)
+    if length == 0 or len(ids) < length or (phrase == 0).any():
+        return 0
+    matches = ids[:len(ids) - length + 1] == phrase[0]
+    for offset in range(1, length):
+        matches &= ids[offset:len(ids) - length + 1 + offset] == phrase[offset]
+    return int(matches.sum())
+
+
+def count_fillers(ids: np.ndarray, vocab: Vocabulary, fillers: Iterable[str]) -> Dict[str, int]:
+    """
+    Count filler words and phrases in an encoded text.
+
+    Single-word fillers are counted together with one bincount; multi-word
+    fillers ("you know") are matched as token sequences, so unlike a
+    substring count they never match inside longer words.
+
+    Args:
+        ids: Encoded text
+        vocab: Vocabulary used to encode it
+        fillers: Filler words/phrases (e.g. rubric.data['filler_words'])
+
+    Returns:
+        Mapping of filler to count (fillers that do not occur are omitted)
+    """
+    counts = {}
+    single = {}
+    for filler in fillers:
+        encoded = vocab.encode_phrase(filler)
+        if len(encoded) == 1:
+            if encoded[0]:
+                single[filler] = int(encoded[0])
+        else:
+            count = count_phrase(ids, encoded)
+            if count:
+                counts[filler] = count
+    if single and len(ids):
+        frequencies = np.bincount(ids, minlength=len(vocab))
+        for filler, token_id in single.items():
+            if token_id < len(frequencies) and frequencies[token_id]:
+                counts[filler] = int(frequencies[token_id])
+    return counts
+
+
+class CorpusStats:
+    """Term and document frequencies over many encoded transcripts."""
+
+    def __init__(self, vocab: Vocabulary):
+        self.vocab = vocab
+        self.documents = 0
+        self.tokens = 0
+        self.term_counts = np.zeros(len(vocab), dtype=np.int64)
+        self.document_counts = np.zeros(len(vocab), dtype=np.int64)
+
+    def _grow(self):
+        size = len(self.vocab)
+        if size > len(self.term_counts):
+            self.term_counts = np.pad(self.term_counts, (0, size - len(self.term_counts)))
+            self.document_counts = np.pad(self.document_counts, (0, size - len(self.document_counts)))
+
+    def add(self, ids: np.ndarray):
+        """Add one encoded transcript."""
+        self._grow()
+        size = len(self.term_counts)
+        self.term_counts += np.bincount(ids, minlength=size)[:size]
+        self.document_counts += np.bincount(np.unique(ids), minlength=size)[:size]
+        self.documents += 1
+        self.tokens += len(ids)
+
+    def merge(self, other: 'CorpusStats'):
+        """Add another worker's statistics (both must share the vocabulary)."""
+        self._grow()
+        other._grow()
+        size = len(other.term_counts)
+        self.term_counts[:size] += other.term_counts
+        self.document_counts[:size] += other.document_counts
+        self.documents += other.documents
+        self.tokens += other.tokens
+
+    def top_terms(self, n: int = 20, by: str = 'term') -> List[Dict[str, Any]]:
+        """
+        Most frequent tokens.
+
+        Args:
+            n: Number of tokens
+            by: 'term' (total occurrences) or 'document' (transcripts containing it)
+        """
+        counts = self.term_counts if by == 'term' else self.document_counts
+        counts = counts.copy()
+        counts[0] = 0
+        top = np.argsort(counts)[::-1][:n]
+        return [
+            {
+                'token': self.vocab.token(int(i)),
+                'count': int(self.term_counts[i]),
+                'documents': int(self.document_counts[i])
+            }
+            for i in top if counts[i] > 0
+        ]
+
+    def idf(self) -> np.ndarray:
+        """Smoothed inverse document frequency per token id."""
+        self._grow()
+        return np.log((1 + self.documents) / (1 + self.document_counts)) + 1
+
+
+class EncodedCorpus:
+    """
+    Many encoded transcripts in one flat uint32 array plus offsets.
+
+    Saved as two .npy files (memory-mapped on load) next to the vocabulary,
+    so a corpus costs 4 bytes per token on disk and in memory.
+    """
+
+    def __init__(self, vocab: Vocabulary):
+        self.vocab = vocab
+        self._chunks: List[np.ndarray] = []
+        self._ids = np.zeros(0, dtype=ID_DTYPE)
+        self._offsets = [0]
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def add(self, text: Union[str, Sequence[str]]) -> int:
+        """Encode and append a transcript; returns its index."""
+        ids = self.vocab.encode(text)
+        self._chunks.append(ids)
+        self._offsets.append(self._offsets[-1] + len(ids))
+        return len(self) - 1
+
+    def _flat(self) -> np.ndarray:
+        if self._chunks:
+            self._ids = np.concatenate([self._ids, *self._chunks])
+            self._chunks = []
+        return self._ids
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        return self._flat()[self._offsets[index]:self._offsets[index + 1]]
+
+    def __iter__(self):
+        flat = self._flat()
+        for start, end in zip(self._offsets, self._offsets[1:]):
+            yield flat[start:end]
+
+    @property
+    def nbytes(self) -> int:
+        return self._flat().nbytes + 8 * len(self._offsets)
+
+    def lengths(self) -> np.ndarray:
+        """Token count of every transcript."""
+        return np.diff(np.asarray(self._offsets, dtype=np.int64))
+
+    def type_token_ratios(self) -> np.ndarray:
+        """
+        TTR of every transcript in one pass.
+
+        Each token becomes a (transcript, id) key; unique keys per
+        transcript are the distinct token counts. As with
+        type_token_ratio(), values equal calculate_ttr only if no token was
+        collapsed to the unknown id by a frozen vocabulary.
+        """
+        lengths = self.lengths()
+        if not len(lengths):
+            return np.zeros(0)
+        documents = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        keys = np.unique(documents * len(self.vocab) + self._flat())
+        distinct = np.bincount(keys // len(self.vocab), minlength=len(lengths))
+        ratios = np.divide(distinct, lengths, out=np.zeros(len(lengths)), where=lengths > 0)
+        # Python's round (not np.round) so values match calculate_ttr's rounding
+        return np.array([round(ratio, 3) for ratio in ratios.tolist()])
+
+    def stats(self) -> CorpusStats:
+        """Corpus frequency statistics over every transcript."""
+        stats = CorpusStats(self.vocab)
+        for ids in self:
+            stats.add(ids)
+        return stats
+
+    def save(self, path: str):
+        """Write <path>.ids.npy, <path>.offsets.npy and <path>.vocab.json."""
+        base = Path(path)
+        np.save(base.with_name(base.name + '.ids.npy'), self._flat())
+        np.save(base.with_name(base.name + '.offsets.npy'), np.asarray(self._offsets, dtype=np.int64))
+        self.vocab.save(str(base.with_name(base.name + '.vocab.json')))
+
+    @classmethod
+    def load(cls, path: str) -> 'EncodedCorpus':
+        """Open a saved corpus (token ids are memory-mapped, read-only)."""
+        base = Path(path)
+        corpus = cls(Vocabulary.load(str(base.with_name(base.name + '.vocab.json'))))
+        corpus._ids = np.load(base.with_name(base.name + '.ids.npy'), mmap_mode='r')
+        corpus._offsets = np.load(base.with_name(base.name + '.offsets.npy')).tolist()
+        return corpus
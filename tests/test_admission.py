@@ -0,0 +1,204 @@
+"""AdmissionController limits, client identification and the /evaluate rejections."""
+
+import asyncio
+import os
+import threading
+import unittest
+from unittest import mock
+
+from student_evaluator.service import client_id
+from student_evaluator.utils.admission import AdmissionController, AdmissionRejected
+
+CLASSES = {'interactive': {}, 'batch': {'max_concurrent': 1, 'queue_timeout': 0.05}}
+
+
+def controller(**limits) -> AdmissionController:
+    settings = {'max_concurrent': 2, 'queue_timeout': 0.05, 'classes': CLASSES}
+    settings.update(limits)
+    return AdmissionController(**settings)
+
+
+class SizeAndRateTest(unittest.TestCase):
+
+    def test_too_many_bytes(self):
+        with self.assertRaises(AdmissionRejected) as caught:
+            controller(max_bytes=10).precheck('c', 'é' * 6)
+        self.assertEqual(caught.exception.status, 413)
+
+    def test_too_many_words(self):
+        with self.assertRaises(AdmissionRejected) as caught:
+            controller(max_words=3).precheck('c', 'one two three four')
+        self.assertEqual(caught.exception.status, 413)
+        self.assertIsNone(caught.exception.retry_after)
+
+    def test_rate_limit_has_retry_after(self):
+        admission = controller(rate_per_second=0.5, burst=2)
+        admission.precheck('c', 'hello')
+        admission.precheck('c', 'hello')
+        with self.assertRaises(AdmissionRejected) as caught:
+            admission.precheck('c', 'hello')
+        self.assertEqual(caught.exception.status, 429)
+        self.assertGreater(caught.exception.retry_after, 1.0)
+        self.assertLessEqual(caught.exception.retry_after, 2.0)
+        # Other clients have their own bucket
+        admission.precheck('other', 'hello')
+        self.assertEqual(admission.stats()['rejected_rate_limited'], 1)
+
+    def test_priority_classes_share_one_bucket(self):
+        admission = controller(rate_per_second=0.001, burst=2)
+        admission.precheck('c', 'hello', 'interactive')
+        admission.precheck('c', 'hello', 'batch')
+        for priority in ('interactive', 'batch'):
+            with self.assertRaises(AdmissionRejected):
+                admission.precheck('c', 'hello', priority)
+
+    def test_unknown_priority(self):
+        with self.assertRaises(ValueError):
+            controller().precheck('c', 'hello', 'urgent')
+
+
+class SlotTest(unittest.TestCase):
+
+    def test_sync_slot_times_out(self):
+        admission = controller(max_concurrent=1)
+        with admission.slot():
+            with self.assertRaises(AdmissionRejected) as caught:
+                with admission.slot():
+                    pass
+        self.assertEqual(caught.exception.status, 429)
+        self.assertEqual(caught.exception.retry_after, 0.05)
+        stats = admission.stats()
+        self.assertEqual(stats['rejected_busy'], 1)
+        self.assertEqual(stats['in_flight'], 0)
+        with admission.slot():
+            self.assertEqual(admission.stats()['in_flight'], 1)
+
+    def test_sync_slot_waits_for_release(self):
+        admission = controller(max_concurrent=1, queue_timeout=5.0)
+        held = admission.slot()
+        held.__enter__()
+        threading.Timer(0.05, held.__exit__, (None, None, None)).start()
+        with admission.slot():
+            self.assertEqual(admission.stats()['in_flight'], 1)
+
+    def test_batch_sub_cap_leaves_slots_for_interactive(self):
+        admission = controller(max_concurrent=2)
+        with admission.slot('batch'):
+            with self.assertRaises(AdmissionRejected):
+                with admission.slot('batch'):
+                    pass
+            with admission.slot('interactive'):
+                classes = admission.stats()['classes']
+                self.assertEqual(classes['batch']['in_flight'], 1)
+                self.assertEqual(classes['interactive']['in_flight'], 1)
+                # The global cap covers every class
+                with self.assertRaises(AdmissionRejected):
+                    with admission.slot('interactive'):
+                        pass
+
+    def test_async_slot_times_out(self):
+        admission = controller(max_concurrent=1)
+
+        async def run():
+            async with admission.slot_async():
+                with self.assertRaises(AdmissionRejected) as caught:
+                    async with admission.slot_async():
+                        pass
+                self.assertEqual(caught.exception.status, 429)
+
+        asyncio.run(run())
+        self.assertEqual(admission.stats()['rejected_busy'], 1)
+        self.assertEqual(admission.stats()['in_flight'], 0)
+
+    def test_async_slot_woken_by_sync_release(self):
+        admission = controller(max_concurrent=1, queue_timeout=5.0)
+        held = admission.slot()
+        held.__enter__()
+
+        async def run():
+            threading.Timer(0.05, held.__exit__, (None, None, None)).start()
+            async with admission.slot_async():
+                return admission.stats()['in_flight']
+
+        self.assertEqual(asyncio.run(run()), 1)
+        self.assertEqual(admission.stats()['rejected_busy'], 0)
+
+
+class ClientIdTest(unittest.TestCase):
+
+    def test_header_ignored_without_trusted_proxies(self):
+        self.assertEqual(client_id('1.2.3.4', '10.0.0.1', trusted_proxies=0), '10.0.0.1')
+
+    def test_one_trusted_proxy(self):
+        self.assertEqual(client_id('1.2.3.4', '10.0.0.1', trusted_proxies=1), '1.2.3.4')
+
+    def test_spoofed_entries_are_ignored(self):
+        # The client sent "6.6.6.6"; the proxy appended the real address
+        self.assertEqual(client_id('6.6.6.6, 1.2.3.4', '10.0.0.1', trusted_proxies=1), '1.2.3.4')
+
+    def test_two_trusted_proxies(self):
+        self.assertEqual(client_id('6.6.6.6, 1.2.3.4, 10.0.0.2', '10.0.0.1', trusted_proxies=2), '1.2.3.4')
+
+    def test_short_chain(self):
+        self.assertEqual(client_id('1.2.3.4', '10.0.0.1', trusted_proxies=3), '1.2.3.4')
+
+    def test_environment_default(self):
+        with mock.patch.dict(os.environ, {'TRUSTED_PROXIES': '1'}):
+            self.assertEqual(client_id('1.2.3.4', '10.0.0.1'), '1.2.3.4')
+
+    def test_missing_address(self):
+        self.assertEqual(client_id(None, None, trusted_proxies=0), 'unknown')
+
+
+class EvaluateRejectionTest(unittest.TestCase):
+    """The Flask /evaluate handler turns rejections into status codes and headers."""
+
+    @classmethod
+    def setUpClass(cls):
+        import web_app
+        cls.web_app = web_app
+        cls.client = web_app.app.test_client()
+
+    def post(self, admission, headers=None, **fields):
+        body = {'transcript': 'Hello, my name is Asha. Thank you.', 'duration': 10, 'stages': ['speech_rate']}
+        body.update(fields)
+        with mock.patch.object(self.web_app, 'admission', admission), \
+                mock.patch('sys.stdout'):
+            return self.client.post('/evaluate', json=body, headers=headers or {})
+
+    def test_rate_limited_request_gets_retry_after(self):
+        admission = controller(rate_per_second=0.25, burst=1)
+        self.assertEqual(self.post(admission).status_code, 200)
+        response = self.post(admission)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '4')
+        self.assertFalse(response.get_json()['success'])
+
+    def test_too_large_transcript(self):
+        response = self.post(controller(max_words=3))
+        self.assertEqual(response.status_code, 413)
+        self.assertNotIn('Retry-After', response.headers)
+
+    def test_busy_server(self):
+        admission = controller(max_concurrent=1)
+        with admission.slot():
+            response = self.post(admission)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_batch_needs_token(self):
+        with mock.patch.dict(os.environ, {'BATCH_TOKEN': 'secret'}):
+            self.assertEqual(self.post(controller(), priority='batch').status_code, 403)
+            wrong = self.post(controller(), {'X-Batch-Token': 'guess'}, priority='batch')
+            self.assertEqual(wrong.status_code, 403)
+            allowed = self.post(controller(), {'X-Batch-Token': 'secret'}, priority='batch')
+            self.assertEqual(allowed.status_code, 200)
+        # Without a configured token nobody may use the batch class
+        with mock.patch.dict(os.environ, {}, clear=False):
+            os.environ.pop('BATCH_TOKEN', None)
+            anonymous = self.post(controller(), {'X-Batch-Token': ''}, priority='batch')
+            self.assertEqual(anonymous.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""Adversarial-input latency (benchmarks/adversarial_inputs.py) in both engagement modes."""
+
+import contextlib
+import io
+import unittest
+
+from benchmarks.adversarial_inputs import STAGES, OVERSIZED, check_cases
+from student_evaluator.config import ENGAGEMENT_MODES
+from student_evaluator.main import StudentEvaluator
+from student_evaluator.utils.safety import InputTooLarge
+
+
+# Twice the benchmark's default budget, so slower CI machines do not flake;
+# the super-linear blow-ups this guards against take tens of seconds
+BUDGET_SECONDS = 4.0
+
+
+class AdversarialLatencyTest(unittest.TestCase):
+    """Slow (about 10 s per mode): every case is evaluated at half and full size."""
+
+    def _check_mode(self, mode):
+        report = []
+        with StudentEvaluator(use_semantic=False, engagement_mode=mode) as evaluator, \
+                contextlib.redirect_stdout(io.StringIO()):
+            evaluator.evaluate('Hello, my name is Asha. Thank you.', 10, stages=STAGES)
+            failures = check_cases(evaluator, STAGES, BUDGET_SECONDS, report=report.append)
+        self.assertEqual(failures, [], '\n'.join(report))
+
+    def test_document_mode(self):
+        self._check_mode('document')
+
+    def test_sentence_mode(self):
+        self.assertIn('sentence', ENGAGEMENT_MODES)
+        self._check_mode('sentence')
+
+    def test_oversized_inputs_are_rejected(self):
+        with StudentEvaluator(use_semantic=False) as evaluator:
+            for transcript in OVERSIZED.values():
+                with self.assertRaises(InputTooLarge):
+                    evaluator.evaluate(transcript, 60, stages=STAGES)
+
+
+if __name__ == '__main__':
+    unittest.main()
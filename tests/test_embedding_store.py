@@ -0,0 +1,66 @@
+"""EmbeddingStore readers picking up rows appended by a writer."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from student_evaluator.utils.embedding_store import EmbeddingStore
+
+
+def vectors(count, dim=8, seed=0):
+    return np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+
+
+class RefreshTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cohort')
+
+    def check_refresh(self, dtype):
+        writer = EmbeddingStore(self.path, dim=8, dtype=dtype)
+        writer.add(['a', 'b'], vectors(2))
+        reader = EmbeddingStore(self.path, readonly=True)
+        self.assertEqual(len(reader), 2)
+
+        # Fits in the current capacity: rows land in the mapped file
+        writer.add(['c'], vectors(1, seed=1))
+        self.assertNotIn('c', reader)
+        self.assertEqual(reader.refresh(), 1)
+        np.testing.assert_allclose(reader.get('c'), writer.get('c'))
+
+        # Outgrows it: the writer moves to a new, larger file
+        capacity = reader.info()['capacity']
+        ids = [f'id{i}' for i in range(capacity)]
+        writer.add(ids, vectors(capacity, seed=2))
+        self.assertEqual(reader.refresh(), capacity)
+        self.assertEqual(reader.info()['capacity'], writer.info()['capacity'])
+        np.testing.assert_allclose(reader.get(ids[-1]), writer.get(ids[-1]))
+        self.assertEqual(reader.similarities(vectors(1)).shape, (len(writer), 1))
+
+        self.assertEqual(reader.refresh(), 0)
+
+    def test_float16(self):
+        self.check_refresh('float16')
+
+    def test_int8(self):
+        self.check_refresh('int8')
+
+    def test_torn_line_is_read_once_complete(self):
+        writer = EmbeddingStore(self.path, dim=8)
+        writer.add(['a'], vectors(1))
+        reader = EmbeddingStore(self.path, readonly=True)
+        with open(self.path + '.ids.jsonl', 'a', encoding='utf-8') as f:
+            f.write('"b')
+        self.assertEqual(reader.refresh(), 0)
+        with open(self.path + '.ids.jsonl', 'a', encoding='utf-8') as f:
+            f.write('"\n')
+        self.assertEqual(reader.refresh(), 1)
+        self.assertEqual(reader.ids, ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""EngagementAnalyzer sentence mode on unpunctuated (one-sentence) text."""
+
+import unittest
+
+from student_evaluator.analyzers.engagement_analyzer import EngagementAnalyzer
+from student_evaluator.config import ENGAGEMENT_SENTENCE_CACHE_MAX_CHARS
+
+
+class LongSentenceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = EngagementAnalyzer(mode='sentence')
+
+    def test_long_sentence_is_windowed_and_not_cached(self):
+        text = 'i really love my great school and my kind friends ' * 300
+        results = self.analyzer.analyze(text)
+
+        self.assertEqual(len(results['engagement_curve']), 1)
+        self.assertEqual(self.analyzer.cache_stats()['size'], 0)
+        # Scored in the same windows as document mode
+        document = EngagementAnalyzer(mode='document').analyze(text)
+        self.assertEqual(results['sentiment_compound'], document['sentiment_compound'])
+
+    def test_short_sentences_are_cached(self):
+        text = 'Hello everyone. Thank you for listening.'
+        self.analyzer.analyze(text)
+        self.analyzer.analyze(text)
+
+        stats = self.analyzer.cache_stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['hits'], 2)
+        self.assertLessEqual(len(text), ENGAGEMENT_SENTENCE_CACHE_MAX_CHARS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,37 @@
+"""ContentAnalyzer flow score under rubrics with custom maxima."""
+
+import unittest
+
+from student_evaluator.analyzers.content_analyzer import ContentAnalyzer
+from student_evaluator.rubric import RubricIndex, default_rubric
+
+
+# Neither a salutation in the first sentence nor a closing phrase
+UNSTRUCTURED = 'My name is Ann. I study in class eight. I like cricket.'
+
+
+class FlowPartialCreditTest(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = ContentAnalyzer()
+
+    def test_default_rubric_keeps_two_points(self):
+        flow = self.analyzer._analyze_flow(UNSTRUCTURED, default_rubric())
+        self.assertFalse(flow['order_followed'])
+        self.assertEqual(flow['score'], 2)
+
+    def test_partial_credit_stays_within_a_smaller_maximum(self):
+        rubric = RubricIndex({'max_scores': {'flow': 1}})
+        flow = self.analyzer._analyze_flow(UNSTRUCTURED, rubric)
+        self.assertEqual(flow['max_score'], 1)
+        self.assertLessEqual(flow['score'], flow['max_score'])
+        self.assertEqual(flow['score'], 0.4)
+
+    def test_partial_credit_scales_up(self):
+        rubric = RubricIndex({'max_scores': {'flow': 10}})
+        flow = self.analyzer._analyze_flow(UNSTRUCTURED, rubric)
+        self.assertEqual(flow['score'], 4.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
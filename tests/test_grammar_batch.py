@@ -0,0 +1,157 @@
+"""GrammarAnalyzer.check_batch and chunked checks with real language_tool_python Match objects."""
+
+import threading
+import time
+import unittest
+
+from language_tool_python.match import Match
+
+from student_evaluator.analyzers.grammar_analyzer import GrammarAnalyzer, QuickMatch, _shift_match
+from student_evaluator.rubric import default_rubric
+from student_evaluator.utils.scheduler import PriorityScheduler
+
+
+def make_match(text: str, offset: int, length: int) -> Match:
+    """Build a Match from the JSON LanguageTool returns for one finding."""
+    return Match({
+        'message': 'Use "an" instead of "a" before a vowel sound.',
+        'shortMessage': 'Wrong article',
+        'replacements': [{'value': 'an'}],
+        'offset': offset,
+        'length': length,
+        'context': {'text': text[max(0, offset - 10):offset + 10], 'offset': min(offset, 10), 'length': length},
+        'sentence': text,
+        'type': {'typeName': 'Other'},
+        'rule': {
+            'id': 'EN_A_VS_AN',
+            'description': 'a vs an',
+            'issueType': 'misspelling',
+            'category': {'id': 'MISC', 'name': 'Miscellaneous'}
+        },
+        'ignoreForIncompleteSentence': False,
+        'contextForSureMatch': 1
+    }, text)
+
+
+class ArticleTool:
+    """Stands in for the LanguageTool server: reports every 'a apple' in the checked text."""
+
+    def __init__(self):
+        self.calls = []
+
+    def check(self, text):
+        self.calls.append(text)
+        matches = []
+        start = text.find('a apple')
+        while start != -1:
+            matches.append(make_match(text, start, 1))
+            start = text.find('a apple', start + 1)
+        return matches
+
+
+class CheckBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = GrammarAnalyzer()
+        self.analyzer.tool = ArticleTool()
+
+    def test_two_texts_share_one_call(self):
+        texts = ['I ate a apple.', 'My name is Asha and I want a apple too.']
+        results = self.analyzer.check_batch(texts)
+
+        self.assertEqual(len(self.analyzer.tool.calls), 1)
+        self.assertEqual([len(found) for found in results], [1, 1])
+        for text, found in zip(texts, results):
+            match = found[0]
+            self.assertIsInstance(match, Match)
+            self.assertEqual(text[match.offset:match.offset + match.error_length], 'a')
+            self.assertEqual(text[match.offset:match.offset + 7], 'a apple')
+
+    def test_text_without_matches(self):
+        results = self.analyzer.check_batch(['Hello everyone.', 'I ate a apple.'])
+        self.assertEqual(results[0], [])
+        self.assertEqual(results[1][0].offset, 6)
+
+    def test_context_stays_within_each_text(self):
+        texts = ['My locker code is 4417 and my name is Zoya.', 'a apple a day, says my teacher.']
+        results = self.analyzer.check_batch(texts)
+
+        match = results[1][0]
+        self.assertEqual(match.offset, 0)
+        self.assertNotIn('Zoya', match.context)
+        self.assertNotIn('4417', match.context)
+        self.assertTrue(match.context[match.offset_in_context:].startswith('a apple'))
+
+        errors = self.analyzer._grammar_result(texts[1], results[1], default_rubric())['errors']
+        for error in errors:
+            self.assertNotIn('Zoya', error['context'])
+            self.assertTrue(texts[1].startswith(error['context'][:5]))
+
+    def test_shift_quick_match(self):
+        match = QuickMatch('message', 'context', 4, 2)
+        self.assertEqual(_shift_match(match, 10), QuickMatch('message', 'context', 14, 2))
+        self.assertEqual(_shift_match(match, 0, 'x' * 30 + 'abcdef').context, 'x' * 26)
+
+
+class SlowArticleTool(ArticleTool):
+    """ArticleTool whose calls take a while, recording how many overlap."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def check(self, text):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.02)
+            return super().check(text)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+# 24 sentences of which every third has an error, about 900 characters
+LONG_TEXT = ' '.join(
+    'I ate a apple at lunch today.' if i % 3 == 0 else f'Sentence number {i} is fine.'
+    for i in range(24)
+) + ' a apple'
+
+
+class ChunkedCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = GrammarAnalyzer(chunk_chars=100, max_workers=4)
+        self.analyzer.tool = SlowArticleTool()
+
+    def test_chunks_match_a_single_call(self):
+        single = ArticleTool().check(LONG_TEXT)
+        chunked = self.analyzer._check(LONG_TEXT)
+
+        self.assertGreater(len(self.analyzer.tool.calls), 1)
+        self.assertEqual([m.offset for m in chunked], [m.offset for m in single])
+        for match in chunked:
+            self.assertEqual(LONG_TEXT[match.offset:match.offset + 7], 'a apple')
+            self.assertTrue(match.context[match.offset_in_context:].startswith('a apple'))
+
+        result = self.analyzer._grammar_result(LONG_TEXT, chunked, default_rubric())
+        expected = self.analyzer._grammar_result(LONG_TEXT, single, default_rubric())
+        self.assertEqual(result['error_count'], expected['error_count'])
+        self.assertEqual([e['offset'] for e in result['errors']], [e['offset'] for e in expected['errors']])
+
+    def test_chunk_calls_stay_within_scheduler_capacity(self):
+        scheduler = PriorityScheduler(2, name='grammar')
+        self.analyzer.scheduler = scheduler
+        # The pipeline holds the request's own slot while the stage runs
+        with scheduler.slot('batch'):
+            self.analyzer._check(LONG_TEXT, 'batch')
+
+        self.assertLessEqual(self.analyzer.tool.max_active, 2)
+        self.assertEqual(scheduler.stats()['in_flight'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
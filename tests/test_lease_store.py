@@ -0,0 +1,143 @@
+"""LeaseStore leases, fencing and commits on a temporary SQLite file, locally and over TCP."""
+
+import os
+import tempfile
+import time
+import unittest
+
+from student_evaluator.distributed import LeaseStore, RemoteLeaseStore, serve, FAILED, DONE
+
+
+def items(count):
+    return [{'id': f'S{i}', 'transcript': f'Hello, I am student {i}.'} for i in range(count)]
+
+
+def results(lease):
+    return [{'id': item['id'], 'result': {'total': 50}} for item in lease['items']]
+
+
+class LeaseStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'leases.db')
+
+    def open(self, **options):
+        store = LeaseStore(self.path, **options)
+        self.addCleanup(store.close)
+        return store
+
+    def test_manifest_is_sharded_once(self):
+        store = self.open()
+        self.assertEqual(store.add_manifest(items(5), shard_size=2), (5, 3))
+        self.assertEqual(store.add_manifest(items(6), shard_size=2), (1, 1))
+        self.assertEqual(store.status()['items'], 6)
+
+    def test_expired_lease_is_reissued_with_a_new_token(self):
+        store = self.open(lease_seconds=0.05)
+        store.add_manifest(items(2), shard_size=2)
+
+        first = store.claim('a')
+        self.assertIsNone(store.claim('b'))
+        time.sleep(0.1)
+        second = store.claim('b')
+
+        self.assertEqual(second['shard'], first['shard'])
+        self.assertGreater(second['token'], first['token'])
+        self.assertEqual(len(second['items']), 2)
+        # The first worker's lease is fenced off
+        self.assertFalse(store.heartbeat(first['shard'], first['token']))
+        self.assertTrue(store.heartbeat(second['shard'], second['token']))
+        self.assertFalse(store.release(first['shard'], first['token']))
+
+    def test_commit_is_idempotent(self):
+        store = self.open(lease_seconds=0.05)
+        store.add_manifest(items(2), shard_size=2)
+        first = store.claim('a')
+        time.sleep(0.1)
+        second = store.claim('b')
+
+        late = store.commit(first['shard'], first['token'], results(first), worker='a')
+        self.assertTrue(late['stale'])
+        self.assertEqual(late['accepted'], 2)
+        self.assertTrue(late['done'])
+
+        retried = store.commit(second['shard'], second['token'], results(second), worker='b')
+        self.assertEqual((retried['accepted'], retried['duplicates']), (0, 2))
+        self.assertFalse(retried['stale'])
+        self.assertEqual(store.status()['shards'][DONE], 1)
+        self.assertEqual([r['id'] for r in store.results()], ['S0', 'S1'])
+        self.assertTrue(store.done())
+
+    def test_partial_commit_leaves_remaining_items(self):
+        store = self.open(lease_seconds=0.05)
+        store.add_manifest(items(3), shard_size=3)
+        lease = store.claim('a')
+        store.commit(lease['shard'], lease['token'], results(lease)[:1])
+        self.assertTrue(store.release(lease['shard'], lease['token']))
+
+        again = store.claim('b')
+        self.assertEqual([item['id'] for item in again['items']], ['S1', 'S2'])
+
+    def test_shard_fails_after_max_attempts(self):
+        store = self.open(lease_seconds=0.01, max_attempts=2)
+        store.add_manifest(items(1))
+        for _ in range(2):
+            self.assertIsNotNone(store.claim('a'))
+            time.sleep(0.03)
+
+        self.assertIsNone(store.claim('a'))
+        self.assertEqual(store.status()['shards'][FAILED], 1)
+        self.assertTrue(store.done())
+
+    def test_state_survives_reopening(self):
+        store = self.open()
+        store.add_manifest(items(2), shard_size=2)
+        lease = store.claim('a')
+        store.commit(lease['shard'], lease['token'], results(lease))
+        store.close()
+
+        reopened = self.open()
+        self.assertTrue(reopened.done())
+        self.assertEqual(reopened.status()['results'], 2)
+
+
+class RemoteLeaseStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = LeaseStore(os.path.join(directory.name, 'leases.db'))
+        self.addCleanup(self.store.close)
+        self.server = serve(self.store, port=0)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.remote = RemoteLeaseStore(*self.server.server_address, timeout=5.0)
+        self.addCleanup(self.remote.close)
+
+    def test_round_trip(self):
+        self.store.add_manifest(items(3), shard_size=3)
+
+        lease = self.remote.claim('remote-worker')
+        self.assertEqual([item['id'] for item in lease['items']], ['S0', 'S1', 'S2'])
+        self.assertTrue(self.remote.heartbeat(lease['shard'], lease['token']))
+        self.assertEqual(self.remote.status()['active_workers'], ['remote-worker'])
+
+        outcome = self.remote.commit(lease['shard'], lease['token'], results(lease), worker='remote-worker')
+        self.assertEqual(outcome, {'accepted': 3, 'duplicates': 0, 'done': True, 'stale': False})
+        self.assertTrue(self.remote.done())
+        self.assertIsNone(self.remote.claim('remote-worker'))
+
+    def test_errors_are_raised_on_the_client(self):
+        with self.assertRaises(RuntimeError):
+            self.remote.commit(1, 1, [{'result': {}}])
+
+    def test_reconnects_after_the_connection_drops(self):
+        self.assertTrue(self.remote.done())
+        self.remote._sock.close()
+        self.assertTrue(self.remote.done())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+"""Closeable and Transcriber are abstract; their implementations are complete."""
+
+import inspect
+import unittest
+
+from student_evaluator import distributed, store  # noqa: F401  (registers their Closeable subclasses)
+from student_evaluator.analyzers import semantic_analyzer  # noqa: F401
+from student_evaluator.ingestion import Transcriber
+from student_evaluator.main import StudentEvaluator  # noqa: F401
+from student_evaluator.utils.lifecycle import Closeable
+
+
+def subclasses(cls):
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from subclasses(subclass)
+
+
+class AbstractBaseTest(unittest.TestCase):
+
+    def test_bases_cannot_be_instantiated(self):
+        for base in (Closeable, Transcriber):
+            with self.assertRaises(TypeError):
+                base()
+
+    def test_missing_close_is_caught_at_construction(self):
+        class Leaky(Closeable):
+            pass
+
+        with self.assertRaises(TypeError):
+            Leaky()
+
+    def test_implementations_are_concrete(self):
+        found = [cls for cls in subclasses(Closeable) if cls.__module__.startswith('student_evaluator')]
+        found += list(subclasses(Transcriber))
+        self.assertGreaterEqual(len(found), 10)
+        for cls in found:
+            self.assertFalse(inspect.isabstract(cls), cls.__name__)
+
+    def test_context_manager_closes(self):
+        class Resource(Closeable):
+            closed = False
+
+            def close(self):
+                self.closed = True
+
+        with Resource() as resource:
+            self.assertFalse(resource.closed)
+        self.assertTrue(resource.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
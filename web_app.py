@@ -4,15 +4,44 @@ Provides a web interface accessible via Chrome browser.
 """
 
 from flask import Flask, render_template, request, jsonify
-from student_evaluator.main import StudentEvaluator
-import os
+from werkzeug.exceptions import RequestEntityTooLarge
+from student_evaluator.service import (
+    SAMPLE_TRANSCRIPT,
+    SAMPLE_DURATION,
+    InvalidRequest,
+    create_evaluator,
+    create_memory_sampler,
+    create_cohort_analytics,
+    create_evaluation_store,
+    history_query,
+    parse_cohort,
+    parse_evaluate_request,
+    authorize_priority,
+    client_id,
+    wants_profile
+)
+from student_evaluator.utils.admission import AdmissionController, AdmissionRejected
+from student_evaluator.utils import lifecycle
+from student_evaluator.config import ADMISSION_MAX_TRANSCRIPT_BYTES
 
 app = Flask(__name__)
+# Refuse oversized bodies before they are read (JSON escaping can roughly double a transcript)
+app.config['MAX_CONTENT_LENGTH'] = 2 * ADMISSION_MAX_TRANSCRIPT_BYTES + 4096
 
-# Initialize evaluator
-# Semantic analysis disabled for deployment (reduces build time from 10min to 2min, memory from 1.5GB to 300MB)
-# To enable semantic similarity scoring locally, change to: use_semantic=True
-evaluator = StudentEvaluator(use_semantic=False)
+# Size limits, per-client rate limits and concurrent evaluation slots per priority class
+admission = AdmissionController()
+
+# Initialize evaluator (configured through environment variables, see service.create_evaluator)
+evaluator = create_evaluator()
+
+# Optional RSS/tracemalloc sampling every N requests (MEMORY_SAMPLE_EVERY)
+memory_sampler = create_memory_sampler()
+
+# Streaming class/school/term aggregates for percentile ranks (ANALYTICS=0 disables)
+analytics = create_cohort_analytics()
+
+# Optional SQLite history of every evaluation (EVALUATION_STORE=<file>)
+evaluation_store = create_evaluation_store()
 
 
 @app.route('/')
@@ -28,30 +57,58 @@ def evaluate():
     """
     try:
         data = request.get_json()
-        transcript = data.get('transcript', '').strip()
-        duration = data.get('duration', 0)
-        
-        # Validation
-        if not transcript:
-            return jsonify({
-                'success': False,
-                'error': 'Please provide a transcript text.'
-            }), 400
         
-        if duration <= 0:
-            return jsonify({
-                'success': False,
-                'error': 'Please provide a valid duration (in seconds).'
-            }), 400
+        # Size and rate limits apply before any parsing work
+        client = client_id(request.headers.get('X-Forwarded-For'), request.remote_addr)
+        fields = data if isinstance(data, dict) else {}
+        batch_token = request.headers.get('X-Batch-Token')
+        priority = authorize_priority(fields.get('priority'), batch_token)
+        admission.precheck(client, fields.get('transcript'), priority)
+        params = parse_evaluate_request(data, evaluator, analytics, batch_token)
         
         # Run evaluation
-        results = evaluator.evaluate(transcript, int(duration))
+        with admission.slot(params['priority']):
+            results = evaluator.evaluate(
+                params['transcript'],
+                params['duration'],
+                submission_id=params['submission_id'],
+                stages=params['stages'],
+                rubric=params['rubric'],
+                word_timestamps=params['word_timestamps'],
+                profile=wants_profile(request.headers.get('X-Profile')),
+                time_budget=params['time_budget'],
+                priority=params['priority']
+            )
+        if memory_sampler is not None:
+            memory_sampler.record()
+        if analytics is not None:
+            results['percentiles'] = analytics.observe(results, **params['cohort'])
+        if evaluation_store is not None:
+            evaluation_store.add(results, student_id=params['student_id'], **params['cohort'])
         
         return jsonify({
             'success': True,
             'results': results
         })
     
+    except RequestEntityTooLarge:
+        raise
+    
+    except InvalidRequest as e:
+        return jsonify({
+            'success': False,
+            'error': e.message
+        }), e.status
+    
+    except AdmissionRejected as e:
+        response = jsonify({
+            'success': False,
+            'error': e.message
+        })
+        if e.retry_after is not None:
+            response.headers['Retry-After'] = str(max(1, round(e.retry_after)))
+        return response, e.status
+    
     except Exception as e:
         return jsonify({
             'success': False,
@@ -59,19 +116,78 @@ def evaluate():
         }), 500
 
 
+@app.errorhandler(413)
+def request_too_large(error):
+    """Return a JSON error for request bodies over MAX_CONTENT_LENGTH."""
+    return jsonify({
+        'success': False,
+        'error': 'Request is too large.'
+    }), 413
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Return runtime counters for monitoring."""
+    return jsonify({
+        **evaluator.metrics(),
+        'admission': admission.stats()
+    })
+
+
+@app.route('/analytics', methods=['GET'])
+def cohort_summary():
+    """Return per-criterion statistics for a cohort (?school=&class=&term=)."""
+    if analytics is None:
+        return jsonify({
+            'success': False,
+            'error': 'Analytics are disabled (ANALYTICS=0).'
+        }), 404
+    try:
+        cohort = parse_cohort(request.args.to_dict())
+    except InvalidRequest as e:
+        return jsonify({
+            'success': False,
+            'error': e.message
+        }), e.status
+    return jsonify(analytics.summary(**cohort))
+
+
+@app.route('/history', methods=['GET'])
+def history():
+    """Return a student's score history (?student_id=) or a class's latest results (?school=&class=)."""
+    if evaluation_store is None:
+        return jsonify({
+            'success': False,
+            'error': 'The evaluation store is disabled (set EVALUATION_STORE).'
+        }), 404
+    try:
+        return jsonify(history_query(evaluation_store, request.args.to_dict()))
+    except InvalidRequest as e:
+        return jsonify({
+            'success': False,
+            'error': e.message
+        }), e.status
+
+
+@app.route('/debug/memory', methods=['GET'])
+def debug_memory():
+    """Return memory samples (enable with MEMORY_SAMPLE_EVERY; ?sample=1 samples now)."""
+    if memory_sampler is None:
+        return jsonify({
+            'success': False,
+            'error': 'Memory sampling is disabled (set MEMORY_SAMPLE_EVERY).'
+        }), 404
+    if request.args.get('sample') == '1':
+        memory_sampler.sample()
+    return jsonify(memory_sampler.stats())
+
+
 @app.route('/sample', methods=['GET'])
 def get_sample():
     """Return sample transcript for testing."""
-    sample_transcript = """Hello everyone, myself Muskan, studying in class 8th B section from Christ Public School. 
-I am 13 years old. I live with my family. There are 3 people in my family, me, my mother and my father.
-One special thing about my family is that they are very kind hearted to everyone and soft spoken. One thing I really enjoy is play, playing cricket and taking wickets.
-A fun fact about me is that I see in mirror and talk by myself. One thing people don't know about me is that I once stole a toy from one of my cousin.
-My favorite subject is science because it is very interesting. Through science I can explore the whole world and make the discoveries and improve the lives of others. 
-Thank you for listening."""
-    
     return jsonify({
-        'transcript': sample_transcript,
-        'duration': 52
+        'transcript': SAMPLE_TRANSCRIPT,
+        'duration': SAMPLE_DURATION
     })
 
 
@@ -79,4 +195,6 @@ if __name__ == '__main__':
     print("🚀 Starting Student Introduction Evaluation Web App...")
     print("📱 Open in Chrome: http://localhost:5000")
     print("Press Ctrl+C to stop the server.")
+    # Stop the LanguageTool JVM when the server is stopped
+    lifecycle.install_signal_handlers()
     app.run(debug=True, host='0.0.0.0', port=5000)